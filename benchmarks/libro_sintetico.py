@@ -0,0 +1,140 @@
+"""
+ConSmart - Libro Sintético para Benchmarks
+==========================================
+Genera movimientos reproducibles sobre las hojas, locales y categorías de
+la base activa (los datos iniciales de una base nueva).
+
+Los valores "aleatorios" salen de hash(fila, semilla, campo) dentro de
+DuckDB: la misma semilla da el mismo libro con cualquier cantidad de hilos
+(con la misma versión de DuckDB), y 10M de filas se generan en una sola
+consulta INSERT ... SELECT.
+"""
+
+from datetime import date, timedelta
+
+from src.database import (
+    AgregadoMensualRepository, AnomaliaRepository, EstadisticaMontoRepository, get_db,
+)
+
+
+# Tamaños de libro predefinidos
+TAMAÑOS = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Movimientos por día en promedio, para repartir el libro en el tiempo
+MOVIMIENTOS_POR_DIA = 1_000
+
+DESCRIPCIONES = [
+    "Compra de insumos", "Pago a proveedor", "Venta del día", "Planilla",
+    "Alquiler", "Servicios luz y agua", "Transferencia", "Depósito en efectivo",
+    "Comisión bancaria", "Mantenimiento", "Movilidad", "Caja chica",
+]
+
+
+def _aleatorio(campo: int, semilla: int, fila: str = "t.i") -> str:
+    """Expresión SQL con un número en [0, 1) fijo para cada fila y campo."""
+    return f"((hash({fila}, {semilla}, {campo}) % 1000000) / 1000000.0)"
+
+
+def generar_libro(movimientos: int, semilla: int = 42, hasta: date = None) -> dict:
+    """
+    Inserta un libro sintético en la base activa (get_db()).
+    
+    Las fechas avanzan con el número de fila (como un libro real, que se
+    registra en orden) y terminan en `hasta`. Cada categoría tiene un monto
+    típico propio; el 1% de los movimientos es 10 veces mayor, para que la
+    detección de anomalías tenga qué encontrar.
+    
+    Args:
+        movimientos: Cantidad de movimientos a generar
+        semilla: Semilla de los valores pseudoaleatorios
+        hasta: Fecha del último movimiento (hoy si es None)
+    
+    Returns:
+        Dict con movimientos, semilla, desde, hasta y la cantidad de hojas
+        y categorías usadas
+    """
+    db = get_db()
+    hasta = hasta or date.today()
+    dias = max(movimientos // MOVIMIENTOS_POR_DIA, 365)
+    desde = hasta - timedelta(days=dias - 1)
+    
+    hojas = db.fetchone("SELECT COUNT(*) FROM hojas")[0]
+    categorias = db.fetchone("SELECT COUNT(*) FROM categorias WHERE local_id IS NOT NULL")[0]
+    if not hojas or not categorias:
+        raise RuntimeError("La base no tiene hojas o categorías con local")
+    
+    # Los índices se recrean al final: mantenerlos fila a fila es lo más lento
+    indices = db.fetchall(
+        "SELECT index_name, sql FROM duckdb_indexes() WHERE table_name = 'movimientos'"
+    )
+    for nombre, _ in indices:
+        db.execute(f"DROP INDEX {nombre}")
+    
+    descripciones = ", ".join(f"'{d}'" for d in DESCRIPCIONES)
+    db.execute(f"""
+        INSERT INTO movimientos (
+            fecha, hoja_id, local_id, categoria_id, num_documento,
+            responsable, descripcion, ingreso, egreso, created_by
+        )
+        WITH h AS (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS k FROM hojas
+        ),
+        c AS (
+            SELECT id, local_id, tipo,
+                   row_number() OVER (ORDER BY id) - 1 AS k,
+                   -- Monto típico de la categoría: entre 20 y 5000
+                   exp(ln(20) + {_aleatorio(0, semilla, 'id')} * ln(250)) AS monto_tipico
+            FROM categorias
+            WHERE local_id IS NOT NULL
+        ),
+        filas AS (
+            SELECT
+                t.i,
+                DATE '{desde.isoformat()}' + (t.i * {dias} // {movimientos})::INTEGER AS fecha,
+                (hash(t.i, {semilla}, 1) % {hojas})::INTEGER AS k_hoja,
+                (hash(t.i, {semilla}, 2) % {categorias})::INTEGER AS k_categoria,
+                {_aleatorio(3, semilla)} AS u_monto,
+                {_aleatorio(4, semilla)} AS u_sentido,
+                {_aleatorio(5, semilla)} AS u_documento,
+                {_aleatorio(6, semilla)} AS u_anomalia,
+                (hash(t.i, {semilla}, 7) % {len(DESCRIPCIONES)})::INTEGER + 1 AS k_descripcion
+            FROM range({movimientos}) t(i)
+        ),
+        montos AS (
+            SELECT
+                f.*, h.id AS hoja_id, c.id AS categoria_id, c.local_id,
+                round(c.monto_tipico * (0.5 + f.u_monto)
+                      * CASE WHEN f.u_anomalia < 0.01 THEN 10 ELSE 1 END, 2) AS monto,
+                c.tipo = 'ingreso' OR (c.tipo = 'ambos' AND f.u_sentido < 0.3) AS es_ingreso
+            FROM filas f
+            JOIN h ON h.k = f.k_hoja
+            JOIN c ON c.k = f.k_categoria
+        )
+        SELECT
+            fecha, hoja_id, local_id, categoria_id,
+            CASE WHEN u_documento < 0.6 THEN 'F' || (i % 100000)::VARCHAR ELSE '' END,
+            'benchmark',
+            [{descripciones}][k_descripcion],
+            CASE WHEN es_ingreso THEN monto ELSE 0 END,
+            CASE WHEN es_ingreso THEN 0 ELSE monto END,
+            'benchmark'
+        FROM montos
+        ORDER BY i
+    """)
+    
+    for _, sql in indices:
+        db.execute(sql)
+    
+    # Tablas derivadas que la app mantiene al escribir movimientos
+    AgregadoMensualRepository().reconstruir()
+    EstadisticaMontoRepository().reconstruir()
+    AnomaliaRepository().recalcular(hasta=hasta)
+    
+    return {
+        "movimientos": movimientos,
+        "semilla": semilla,
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "hojas": hojas,
+        "categorias": categorias,
+    }
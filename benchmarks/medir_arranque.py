@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+ConSmart - Benchmark de Importaciones al Arranque
+=================================================
+Mide lo que cuesta importar el punto de entrada con `python -X importtime`
+y lista los módulos más lentos.
+
+Ejecutar con: python benchmarks/medir_arranque.py [--modulo main] [--top 20]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Módulos que no deberían cargarse antes del login
+MODULOS_PESADOS = ["pandas", "numpy", "openpyxl", "pyarrow", "src.logic.services"]
+
+
+def medir_importacion(modulo: str) -> dict:
+    """
+    Importa un módulo en un intérprete nuevo con -X importtime.
+    
+    Returns:
+        Diccionario nombre -> (propio_us, acumulado_us) de cada módulo importado
+    """
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"Error importando {modulo}:\n{proceso.stderr[-2000:]}")
+    
+    tiempos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        tiempos[nombre.strip()] = (int(propio), int(acumulado))
+    return tiempos
+
+
+def resumir(modulo: str, repeticiones: int, top: int) -> dict:
+    """
+    Repite la medición y toma la mediana por módulo.
+    
+    Returns:
+        Resumen con el tiempo total, los más lentos y los pesados cargados
+    """
+    corridas = [medir_importacion(modulo) for _ in range(repeticiones)]
+    
+    nombres = set().union(*corridas)
+    medianas = {}
+    for nombre in nombres:
+        muestras = [c[nombre] for c in corridas if nombre in c]
+        medianas[nombre] = (
+            statistics.median(m[0] for m in muestras),
+            statistics.median(m[1] for m in muestras),
+        )
+    
+    def _tabla(indice: int) -> list:
+        ordenados = sorted(medianas.items(), key=lambda kv: kv[1][indice], reverse=True)
+        return [
+            {"modulo": n, "propio_ms": p / 1000, "acumulado_ms": a / 1000}
+            for n, (p, a) in ordenados[:top]
+        ]
+    
+    return {
+        "modulo": modulo,
+        "repeticiones": repeticiones,
+        "total_ms": medianas.get(modulo, (0, 0))[1] / 1000,
+        "modulos_importados": len(medianas),
+        "por_tiempo_propio": _tabla(0),
+        "por_tiempo_acumulado": _tabla(1),
+        "pesados_cargados": [m for m in MODULOS_PESADOS if m in medianas],
+    }
+
+
+def imprimir(resumen: dict):
+    """Imprime el resumen en consola."""
+    print(f"📦 import {resumen['modulo']}: {resumen['total_ms']:.1f} ms "
+          f"({resumen['modulos_importados']} módulos, mediana de "
+          f"{resumen['repeticiones']} corridas)")
+    
+    for titulo, clave in (("Tiempo propio", "por_tiempo_propio"),
+                          ("Tiempo acumulado", "por_tiempo_acumulado")):
+        print(f"\n{titulo}:")
+        print(f"  {'ms propio':>10} {'ms acum.':>10}  módulo")
+        for fila in resumen[clave]:
+            print(f"  {fila['propio_ms']:>10.1f} {fila['acumulado_ms']:>10.1f}  {fila['modulo']}")
+    
+    pesados = resumen["pesados_cargados"]
+    if pesados:
+        print(f"\n⚠️  Módulos pesados cargados al arranque: {', '.join(pesados)}")
+    else:
+        print("\n✅ Ningún módulo pesado se carga al arranque")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación al arranque")
+    parser.add_argument("--modulo", default="main", help="Módulo a importar (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="Cantidad de módulos a listar")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Corridas a promediar")
+    parser.add_argument("--json", type=Path, help="Guardar el resumen en un archivo JSON")
+    args = parser.parse_args()
+    
+    resumen = resumir(args.modulo, args.repeticiones, args.top)
+    imprimir(resumen)
+    
+    if args.json:
+        args.json.write_text(json.dumps(resumen, indent=2, ensure_ascii=False))
+        print(f"\n💾 Resumen guardado en {args.json}")
+    
+    return 1 if resumen["pesados_cargados"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+ConSmart - Benchmark de Repositorios y Servicios
+================================================
+Genera un libro sintético reproducible (10k / 1M / 10M movimientos) en una
+base DuckDB temporal y mide las consultas principales de repositorios y
+servicios. Cada tamaño corre en un intérprete nuevo, porque get_db() es un
+singleton por proceso.
+
+Ejecutar con: python benchmarks/medir_repositorios.py [--tamaños 10k,1m] [--json salida.json]
+Comparar:     python benchmarks/medir_repositorios.py --comparar anterior.json
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict
+
+RAIZ = Path(__file__).resolve().parent.parent
+RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+
+def medir(funcion: Callable, repeticiones: int, calentamiento: int = 1) -> dict:
+    """
+    Ejecuta una función varias veces y resume sus tiempos.
+    
+    Returns:
+        Dict con repeticiones, min_ms, mediana_ms, p95_ms y max_ms
+    """
+    for _ in range(calentamiento):
+        funcion()
+    
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "min_ms": round(tiempos[0], 3),
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(0.95 * len(tiempos)))], 3),
+        "max_ms": round(tiempos[-1], 3),
+    }
+
+
+def ejecutar_tamaño(movimientos: int, semilla: int, repeticiones: int, directorio: Path) -> dict:
+    """
+    Genera el libro en una base nueva dentro de `directorio` y mide.
+    
+    Debe correr en un proceso propio: apunta la conexión a la base temporal
+    antes del primer get_db().
+    """
+    sys.path.insert(0, str(RAIZ))
+    import src.database.connection as conexion
+    conexion.DB_PATH = directorio / "benchmark.duckdb"
+    
+    from src.database import AnomaliaRepository, MovimientoRepository, get_db
+    from src.logic import BalanceCalculator
+    from benchmarks.libro_sintetico import generar_libro
+    
+    get_db()
+    
+    inicio = time.perf_counter()
+    libro = generar_libro(movimientos, semilla=semilla)
+    libro["generacion_s"] = round(time.perf_counter() - inicio, 3)
+    
+    mov_repo = MovimientoRepository()
+    calculator = BalanceCalculator()
+    hoja_id, local_id, categoria_id = get_db().fetchone("""
+        SELECT hoja_id, local_id, categoria_id FROM movimientos
+        GROUP BY ALL ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    
+    hoy = date.today()
+    inicio_mes = hoy.replace(day=1)
+    creados = iter(range(1, 1_000_000))
+    
+    def _crear():
+        mov_repo.crear({
+            "fecha": hoy,
+            "hoja_id": hoja_id,
+            "local_id": local_id,
+            "categoria_id": categoria_id,
+            "num_documento": f"BENCH-{next(creados)}",
+            "descripcion": "Movimiento de benchmark",
+            "egreso": 100.0,
+        })
+    
+    casos: Dict[str, tuple] = {
+        "crear": (_crear, repeticiones),
+        "obtener_historial_filtrado": (
+            lambda: mov_repo.obtener_historial_filtrado(
+                hoja_id, fecha_inicio=hoy - timedelta(days=30), fecha_fin=hoy),
+            repeticiones),
+        "obtener_historial_filtrado_texto": (
+            lambda: mov_repo.obtener_historial_filtrado(
+                hoja_id, fecha_inicio=hoy - timedelta(days=30), fecha_fin=hoy,
+                texto_busqueda="alquiler"),
+            repeticiones),
+        "obtener_saldo_actual": (lambda: mov_repo.obtener_saldo_actual(hoja_id), repeticiones),
+        "obtener_saldos_todas_cuentas": (calculator.obtener_saldos_todas_cuentas, repeticiones),
+        "obtener_resumen_filtrado": (
+            lambda: mov_repo.obtener_resumen_filtrado(
+                hoja_id, fecha_inicio=hoy - timedelta(days=365), fecha_fin=hoy),
+            repeticiones),
+        "obtener_resumen_periodo": (
+            lambda: calculator.obtener_resumen_periodo(hoja_id, inicio_mes, hoy), repeticiones),
+        "obtener_tendencia_mensual": (calculator.obtener_tendencia_mensual, repeticiones),
+        "detectar_anomalias": (lambda: calculator.detectar_anomalias(hoja_id), repeticiones),
+        "recalcular_anomalias": (AnomaliaRepository().recalcular, max(1, repeticiones // 10)),
+    }
+    
+    mediciones = {}
+    for nombre, (funcion, veces) in casos.items():
+        mediciones[nombre] = medir(funcion, veces)
+        print(f"   {nombre:<34} {mediciones[nombre]['mediana_ms']:>10.2f} ms", file=sys.stderr)
+    
+    return {"libro": libro, "mediciones": mediciones}
+
+
+def ejecutar(tamaños: list, semilla: int, repeticiones: int, conservar: bool) -> dict:
+    """Corre cada tamaño en un intérprete nuevo y junta los resultados."""
+    from benchmarks.libro_sintetico import TAMAÑOS
+    import duckdb
+    
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "duckdb": duckdb.__version__,
+        "plataforma": platform.platform(),
+        "semilla": semilla,
+        "tamaños": {},
+    }
+    
+    for tamaño in tamaños:
+        directorio = Path(tempfile.mkdtemp(prefix=f"consmart_bench_{tamaño}_"))
+        print(f"📒 Libro de {tamaño} movimientos en {directorio}", file=sys.stderr)
+        try:
+            proceso = subprocess.run(
+                [sys.executable, __file__, "--interno", str(TAMAÑOS[tamaño]),
+                 "--semilla", str(semilla), "--repeticiones", str(repeticiones),
+                 "--directorio", str(directorio)],
+                cwd=RAIZ, stdout=subprocess.PIPE, text=True,
+            )
+            if proceso.returncode != 0:
+                raise RuntimeError(f"Falló el benchmark de {tamaño}")
+            resultados["tamaños"][tamaño] = json.loads(proceso.stdout.splitlines()[-1])
+        finally:
+            if not conservar:
+                shutil.rmtree(directorio, ignore_errors=True)
+    
+    return resultados
+
+
+def imprimir(resultados: dict, anterior: dict = None):
+    """Imprime la mediana de cada medición, y la razón contra una corrida anterior."""
+    for tamaño, datos in resultados["tamaños"].items():
+        libro = datos["libro"]
+        print(f"\n📊 {tamaño}: {libro['movimientos']:,} movimientos "
+              f"({libro['desde']} a {libro['hasta']}), generado en {libro['generacion_s']:.1f} s")
+        print(f"  {'mediana ms':>12} {'p95 ms':>10}  {'vs. anterior':>12}  llamada")
+        
+        previas = (anterior or {}).get("tamaños", {}).get(tamaño, {}).get("mediciones", {})
+        for nombre, medicion in datos["mediciones"].items():
+            comparacion = ""
+            if nombre in previas and previas[nombre]["mediana_ms"] > 0:
+                razon = medicion["mediana_ms"] / previas[nombre]["mediana_ms"]
+                comparacion = f"x{razon:.2f}"
+            print(f"  {medicion['mediana_ms']:>12.2f} {medicion['p95_ms']:>10.2f}  "
+                  f"{comparacion:>12}  {nombre}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide repositorios y servicios sobre un libro sintético")
+    parser.add_argument("--tamaños", default="10k,1m",
+                        help="Tamaños separados por coma: 10k, 1m, 10m (default: 10k,1m)")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla del libro sintético")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Repeticiones por llamada")
+    parser.add_argument("--json", type=Path,
+                        help="Archivo de resultados (default: benchmarks/resultados/repositorios_<fecha>.json)")
+    parser.add_argument("--comparar", type=Path, help="Resultados anteriores para comparar")
+    parser.add_argument("--conservar", action="store_true", help="No borrar las bases temporales")
+    parser.add_argument("--interno", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--directorio", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.interno:
+        resultado = ejecutar_tamaño(args.interno, args.semilla, args.repeticiones, args.directorio)
+        print(json.dumps(resultado))
+        return 0
+    
+    sys.path.insert(0, str(RAIZ))
+    from benchmarks.libro_sintetico import TAMAÑOS
+    
+    tamaños = [t.strip().lower() for t in args.tamaños.split(",") if t.strip()]
+    desconocidos = [t for t in tamaños if t not in TAMAÑOS]
+    if desconocidos:
+        parser.error(f"Tamaños no soportados: {', '.join(desconocidos)} (usar {', '.join(TAMAÑOS)})")
+    
+    anterior = json.loads(args.comparar.read_text()) if args.comparar else None
+    
+    resultados = ejecutar(tamaños, args.semilla, args.repeticiones, args.conservar)
+    imprimir(resultados, anterior)
+    
+    salida = args.json or RESULTADOS / f"repositorios_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+    print(f"\n💾 Resultados guardados en {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
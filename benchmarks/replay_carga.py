@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+ConSmart - Replay de Carga Mixta
+================================
+Simula una jornada de trabajo sobre una base local: varios hilos ejecutan
+una mezcla configurable de operaciones de la capa de servicios (cajeros
+guardando lotes, un supervisor filtrando el historial, el dashboard
+refrescando saldos y proyección) y se reporta la latencia p50/p95/p99 y el
+throughput de cada operación.
+
+La base de trabajo es siempre temporal: un libro sintético nuevo o una
+copia de --base, que no se modifica.
+
+Ejecutar con: python benchmarks/replay_carga.py [--hilos 8] [--duracion 60] [--tamaño 1m]
+Mezcla:       python benchmarks/replay_carga.py --mezcla guardar_lote=5,filtrar_historial=3,dashboard=1
+Comparar:     python benchmarks/replay_carga.py --comparar anterior.json
+
+Al terminar verifica que agg_mensual y estadisticas_montos coincidan con un
+recálculo desde movimientos; termina con código 1 si hubo errores o
+diferencias.
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+RAIZ = Path(__file__).resolve().parent.parent
+RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+# Peso relativo de cada operación en la mezcla por defecto
+MEZCLA_DEFECTO = {
+    "guardar_lote": 5,
+    "filtrar_historial": 3,
+    "dashboard": 1,
+    "editar_movimiento": 1,
+}
+
+TEXTOS_BUSQUEDA = ["alquiler", "proveedor", "planilla", "caja", "venta"]
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    """Percentil por el método del rango más cercano (lista ya ordenada)."""
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))]
+
+
+def parsear_mezcla(texto: str) -> Dict[str, int]:
+    """'guardar_lote=5,dashboard=1' -> {'guardar_lote': 5, 'dashboard': 1}."""
+    mezcla = {}
+    for parte in texto.split(","):
+        if not parte.strip():
+            continue
+        nombre, _, peso = parte.partition("=")
+        mezcla[nombre.strip()] = int(peso) if peso.strip() else 1
+    return mezcla
+
+
+class Operaciones:
+    """
+    Operaciones de la capa de servicios que componen la carga.
+    
+    Cada hilo crea su propia instancia (y sus servicios), como cada vista
+    de la app; los valores al azar salen de un random.Random por hilo, así
+    que la secuencia de operaciones depende solo de la semilla.
+    """
+    
+    def __init__(self, semilla: int, hilo: int, tamaño_lote: int, desde: date, hasta: date):
+        from src.database import get_db
+        from src.logic import (
+            BalanceCalculator, ConsolidacionService, MovimientoService, ProyeccionService,
+        )
+        
+        self.azar = random.Random(semilla * 1000 + hilo)
+        self.hilo = hilo
+        self.tamaño_lote = tamaño_lote
+        self.desde = desde
+        self.hasta = hasta
+        self.secuencia = 0
+        
+        self.mov_service = MovimientoService()
+        self.calculator = BalanceCalculator()
+        self.proyeccion = ProyeccionService()
+        self.consolidacion = ConsolidacionService()
+        
+        db = get_db()
+        self.hoja_ids = [fila[0] for fila in db.fetchall("SELECT id FROM hojas ORDER BY id")]
+        self.categorias = db.fetchall("""
+            SELECT id, local_id, tipo FROM categorias
+            WHERE local_id IS NOT NULL ORDER BY id
+        """)
+        self.max_id = db.fetchone("SELECT MAX(id) FROM movimientos")[0] or 0
+    
+    def guardar_lote(self):
+        """Un cajero guarda un lote de movimientos desde el grid de registro."""
+        hoja_id = self.azar.choice(self.hoja_ids)
+        lista = []
+        for _ in range(self.tamaño_lote):
+            categoria_id, local_id, tipo = self.azar.choice(self.categorias)
+            monto = round(self.azar.uniform(20, 2000), 2)
+            es_ingreso = tipo == "ingreso" or (tipo == "ambos" and self.azar.random() < 0.3)
+            self.secuencia += 1
+            lista.append({
+                "fecha": self.hasta,
+                "hoja_id": hoja_id,
+                "local_id": local_id,
+                "categoria_id": categoria_id,
+                "num_documento": f"CARGA-{self.hilo}-{self.secuencia}",
+                "descripcion": "Movimiento de replay de carga",
+                "ingreso": monto if es_ingreso else 0.0,
+                "egreso": 0.0 if es_ingreso else monto,
+                "created_by": f"cajero{self.hilo}",
+            })
+        
+        guardados, errores, _ = self.mov_service.crear_movimientos(lista)
+        if errores:
+            raise RuntimeError(next(iter(errores.values()))[0])
+        return len(guardados)
+    
+    def filtrar_historial(self):
+        """El supervisor filtra el historial de una hoja: totales y filas."""
+        dias = (self.hasta - self.desde).days
+        fin = self.hasta - timedelta(days=self.azar.randint(0, max(0, dias - 30)))
+        filtros = {
+            "hoja_id": self.azar.choice(self.hoja_ids),
+            "fecha_inicio": fin - timedelta(days=30),
+            "fecha_fin": fin,
+            "texto_busqueda": (self.azar.choice(TEXTOS_BUSQUEDA)
+                               if self.azar.random() < 0.3 else None),
+        }
+        self.mov_service.obtener_resumen_filtrado(**filtros)
+        return len(self.mov_service.obtener_historial_filtrado(**filtros))
+    
+    def dashboard(self):
+        """El dashboard refresca saldos, proyección y saldo consolidado."""
+        saldos = self.calculator.obtener_saldos_todas_cuentas()
+        self.proyeccion.proyectar(hoja_ids=[s['id'] for s in saldos])
+        self.consolidacion.obtener_saldo_consolidado()
+        return len(saldos)
+    
+    def editar_movimiento(self):
+        """Un supervisor corrige el monto de un movimiento existente."""
+        movimiento_id = self.azar.randint(1, self.max_id)
+        movimiento = self.mov_service.obtener_movimiento(movimiento_id)
+        if not movimiento:
+            return 0
+        
+        campo = "ingreso" if movimiento['ingreso'] else "egreso"
+        datos = {campo: round(float(movimiento[campo]) * self.azar.uniform(0.9, 1.1), 2) or 1.0}
+        if self.mov_service.actualizar_movimiento_con_delta(movimiento_id, datos) is None:
+            raise RuntimeError(f"No se pudo actualizar el movimiento {movimiento_id}")
+        return 1
+
+
+def trabajador(operaciones: Operaciones, mezcla: Dict[str, int], duracion: float,
+               pausa_s: float, inicio: threading.Barrier, registro: Dict[str, dict]):
+    """Ejecuta operaciones al azar (según sus pesos) durante `duracion` segundos."""
+    nombres = list(mezcla)
+    pesos = [mezcla[n] for n in nombres]
+    
+    # Todos los hilos arrancan juntos
+    inicio.wait()
+    fin = time.perf_counter() + duracion
+    while time.perf_counter() < fin:
+        nombre = operaciones.azar.choices(nombres, weights=pesos)[0]
+        funcion: Callable = getattr(operaciones, nombre)
+        
+        t0 = time.perf_counter()
+        try:
+            funcion()
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        transcurrido = (time.perf_counter() - t0) * 1000
+        
+        datos = registro[nombre]
+        if error:
+            datos["errores"].append(error)
+        else:
+            datos["tiempos"].append(transcurrido)
+        
+        if pausa_s:
+            time.sleep(operaciones.azar.expovariate(1 / pausa_s))
+
+
+def preparar_base(directorio: Path, base: Path, tamaño: int, semilla: int) -> dict:
+    """
+    Apunta la conexión a una base nueva en `directorio` y la llena.
+    
+    Returns:
+        Dict con el origen de los datos y el rango de fechas del libro
+    """
+    sys.path.insert(0, str(RAIZ))
+    import src.database.connection as conexion
+    conexion.DB_PATH = directorio / "carga.duckdb"
+    
+    if base:
+        shutil.copy2(base, conexion.DB_PATH)
+    
+    from src.database import get_db
+    db = get_db()
+    
+    if base:
+        desde, hasta = db.fetchone("SELECT MIN(fecha), MAX(fecha) FROM movimientos")
+        return {"origen": str(base), "movimientos": db.fetchone("SELECT COUNT(*) FROM movimientos")[0],
+                "desde": desde.isoformat(), "hasta": hasta.isoformat()}
+    
+    from benchmarks.libro_sintetico import generar_libro
+    inicio = time.perf_counter()
+    libro = generar_libro(tamaño, semilla=semilla)
+    libro["origen"] = "sintético"
+    libro["generacion_s"] = round(time.perf_counter() - inicio, 3)
+    return libro
+
+
+def ejecutar(mezcla: Dict[str, int], hilos: int, duracion: float, pausa_ms: float,
+             tamaño_lote: int, semilla: int, libro: dict) -> dict:
+    """Corre la carga con `hilos` trabajadores y resume las latencias."""
+    desde = date.fromisoformat(libro["desde"])
+    hasta = date.fromisoformat(libro["hasta"])
+    
+    registro = {nombre: {"tiempos": [], "errores": []} for nombre in mezcla}
+    participantes = [Operaciones(semilla, k, tamaño_lote, desde, hasta) for k in range(hilos)]
+    
+    barrera = threading.Barrier(hilos + 1)
+    lock = threading.Lock()
+    
+    def _correr(operaciones: Operaciones):
+        # Cada hilo llena su propio registro y lo junta al terminar
+        propio = {nombre: {"tiempos": [], "errores": []} for nombre in mezcla}
+        trabajador(operaciones, mezcla, duracion, pausa_ms / 1000, barrera, propio)
+        with lock:
+            for nombre, datos in propio.items():
+                registro[nombre]["tiempos"].extend(datos["tiempos"])
+                registro[nombre]["errores"].extend(datos["errores"])
+    
+    hebras = [threading.Thread(target=_correr, args=(p,), name=f"carga-{p.hilo}")
+              for p in participantes]
+    for hebra in hebras:
+        hebra.start()
+    
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hebra in hebras:
+        hebra.join()
+    total_s = time.perf_counter() - inicio
+    
+    operaciones = {}
+    for nombre, datos in registro.items():
+        tiempos = sorted(datos["tiempos"])
+        operaciones[nombre] = {
+            "peso": mezcla[nombre],
+            "completadas": len(tiempos),
+            "errores": len(datos["errores"]),
+            "ejemplos_error": sorted(set(datos["errores"]))[:3],
+            "por_segundo": round(len(tiempos) / total_s, 3),
+            "p50_ms": round(percentil(tiempos, 50), 3),
+            "p95_ms": round(percentil(tiempos, 95), 3),
+            "p99_ms": round(percentil(tiempos, 99), 3),
+            "max_ms": round(tiempos[-1], 3) if tiempos else 0.0,
+        }
+    
+    completadas = sum(o["completadas"] for o in operaciones.values())
+    return {
+        "duracion_s": round(total_s, 3),
+        "completadas": completadas,
+        "errores": sum(o["errores"] for o in operaciones.values()),
+        "por_segundo": round(completadas / total_s, 3),
+        "operaciones": operaciones,
+    }
+
+
+def verificar_consistencia() -> dict:
+    """
+    Compara las tablas derivadas con un recálculo desde movimientos.
+    
+    Los errores de la carga solo cuentan excepciones; una carrera entre
+    escrituras puede dejar agg_mensual o estadisticas_montos desfasadas
+    sin que ninguna operación falle.
+    
+    Returns:
+        Dict tabla -> lista de claves con diferencias
+    """
+    from src.database import AgregadoMensualRepository, EstadisticaMontoRepository
+    
+    return {
+        "agg_mensual": [list(map(str, clave)) for clave in AgregadoMensualRepository().verificar()],
+        "estadisticas_montos": [list(map(str, clave))
+                                for clave in EstadisticaMontoRepository().verificar()],
+    }
+
+
+def imprimir(resultados: dict, anterior: dict = None):
+    """Imprime latencias y throughput, y la razón de p95 contra una corrida anterior."""
+    libro = resultados["libro"]
+    carga = resultados["carga"]
+    print(f"\n📊 {resultados['hilos']} hilos durante {carga['duracion_s']:.1f} s sobre "
+          f"{libro['movimientos']:,} movimientos ({libro['origen']})")
+    print(f"  {'op/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}  "
+          f"{'p95 vs. ant.':>12}  operación")
+    
+    previas = (anterior or {}).get("carga", {}).get("operaciones", {})
+    for nombre, datos in carga["operaciones"].items():
+        comparacion = ""
+        if nombre in previas and previas[nombre]["p95_ms"] > 0:
+            comparacion = f"x{datos['p95_ms'] / previas[nombre]['p95_ms']:.2f}"
+        print(f"  {datos['por_segundo']:>8.2f} {datos['p50_ms']:>9.2f} {datos['p95_ms']:>9.2f} "
+              f"{datos['p99_ms']:>9.2f} {datos['errores']:>8}  {comparacion:>12}  {nombre}")
+    
+    print(f"  {carga['por_segundo']:>8.2f} {'':>9} {'':>9} {'':>9} {carga['errores']:>8}  "
+          f"{'':>12}  total")
+    
+    for nombre, datos in carga["operaciones"].items():
+        for ejemplo in datos["ejemplos_error"]:
+            print(f"  ⚠️ {nombre}: {ejemplo}")
+    
+    for tabla, diferencias in resultados["consistencia"].items():
+        if diferencias:
+            print(f"  ❌ {tabla}: {len(diferencias)} grupo(s) no coinciden con los movimientos, "
+                  f"p. ej. {', '.join(diferencias[0])}")
+        else:
+            print(f"  ✅ {tabla} coincide con los movimientos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de una carga mixta desde varios hilos")
+    parser.add_argument("--hilos", type=int, default=8, help="Hilos concurrentes (default: 8)")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos de carga (default: 60)")
+    parser.add_argument("--mezcla", default=",".join(f"{n}={p}" for n, p in MEZCLA_DEFECTO.items()),
+                        help="Operaciones y pesos: nombre=peso separados por coma")
+    parser.add_argument("--pausa-ms", type=float, default=0,
+                        help="Pausa media entre operaciones de un hilo (default: 0, sin pausa)")
+    parser.add_argument("--lote", type=int, default=20, help="Movimientos por guardar_lote (default: 20)")
+    parser.add_argument("--tamaño", default="1m",
+                        help="Libro sintético: 10k, 1m o 10m (default: 1m)")
+    parser.add_argument("--base", type=Path, help="Usar una copia de esta base en lugar del libro sintético")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla del libro y de la carga")
+    parser.add_argument("--json", type=Path,
+                        help="Archivo de resultados (default: benchmarks/resultados/carga_<fecha>.json)")
+    parser.add_argument("--comparar", type=Path, help="Resultados anteriores para comparar")
+    args = parser.parse_args()
+    
+    sys.path.insert(0, str(RAIZ))
+    from benchmarks.libro_sintetico import TAMAÑOS
+    
+    mezcla = parsear_mezcla(args.mezcla)
+    desconocidas = [n for n in mezcla if n.startswith("_") or not callable(getattr(Operaciones, n, None))]
+    if desconocidas:
+        parser.error(f"Operaciones desconocidas: {', '.join(desconocidas)} "
+                     f"(usar {', '.join(MEZCLA_DEFECTO)})")
+    mezcla = {n: p for n, p in mezcla.items() if p > 0}
+    if not mezcla:
+        parser.error("La mezcla no tiene operaciones con peso positivo")
+    if not args.base and args.tamaño not in TAMAÑOS:
+        parser.error(f"Tamaño no soportado: {args.tamaño} (usar {', '.join(TAMAÑOS)})")
+    if args.base and not args.base.exists():
+        parser.error(f"No existe la base {args.base}")
+    
+    anterior = json.loads(args.comparar.read_text()) if args.comparar else None
+    
+    import duckdb
+    directorio = Path(tempfile.mkdtemp(prefix="consmart_carga_"))
+    try:
+        print(f"📒 Preparando base en {directorio}", file=sys.stderr)
+        libro = preparar_base(directorio, args.base, TAMAÑOS.get(args.tamaño), args.semilla)
+        
+        print(f"🏃 {args.hilos} hilos durante {args.duracion:g} s", file=sys.stderr)
+        carga = ejecutar(mezcla, args.hilos, args.duracion, args.pausa_ms,
+                         args.lote, args.semilla, libro)
+        consistencia = verificar_consistencia()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "duckdb": duckdb.__version__,
+        "plataforma": platform.platform(),
+        "semilla": args.semilla,
+        "hilos": args.hilos,
+        "pausa_ms": args.pausa_ms,
+        "lote": args.lote,
+        "libro": libro,
+        "carga": carga,
+        "consistencia": consistencia,
+    }
+    imprimir(resultados, anterior)
+    
+    salida = args.json or RESULTADOS / f"carga_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+    print(f"\n💾 Resultados guardados en {salida}")
+    inconsistente = any(consistencia.values())
+    return 0 if not carga["errores"] and not inconsistente else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,7 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 from src.config import APP_CONFIG, UI_CONFIG
 from src.database import get_db
 from src.ui.theme import AppTheme, Icons
-from src.ui.views import DashboardView, EntryView, HistoryView, AdminView, LoginView
+from src.ui.views import RegistroVistas, version_datos_config
 from src.logic import get_auth
 
 
@@ -40,72 +40,63 @@ def main(page: ft.Page):
     
     # Estado de navegación
     current_route = "/"
+    registro_actual = [None]  # Registro de vistas de la sesión activa
     
     def construir_app_principal():
         """Construye la interfaz principal de la aplicación."""
         
         sesion = auth.sesion
         
-        # Contenedor para las vistas
-        vista_actual = [None]  # Usar lista para permitir modificación en closure
-        
-        def crear_vista_dashboard():
-            print("DEBUG: Creando vista Dashboard")
-            v = DashboardView(page).build()
-            print(f"DEBUG: Dashboard creado: {type(v)}")
-            return v
-        
-        def crear_vista_registro():
-            print("DEBUG: Creando vista Registro")
-            v = EntryView(page).build()
-            print(f"DEBUG: Registro creado: {type(v)}")
-            return v
-        
-        def crear_vista_historial():
-            print("DEBUG: Creando vista Historial")
-            v = HistoryView(page).build()
-            print(f"DEBUG: Historial creado: {type(v)}")
-            return v
-        
-        def crear_vista_admin():
-            print("DEBUG: Creando vista Admin")
-            v = AdminView(page).build()
-            print(f"DEBUG: Admin creado: {type(v)}")
-            return v
+        # Vistas vivas durante la sesión (se construyen una sola vez)
+        registro = RegistroVistas(page, max_vistas=UI_CONFIG['max_vistas_en_memoria'])
+        registro_actual[0] = registro
+        
+        # Las vistas se importan al mostrarlas por primera vez: pandas y los
+        # componentes pesados no se cargan antes del login
+        def crear_vista(nombre_clase: str):
+            import src.ui.views as vistas_app
+            return getattr(vistas_app, nombre_clase)(page)
+        
+        registro.registrar("dashboard", lambda: crear_vista("DashboardView"))
+        registro.registrar("registro", lambda: crear_vista("EntryView"))
+        registro.registrar("historial", lambda: crear_vista("HistoryView"))
+        registro.registrar("admin", lambda: crear_vista("AdminView"), version=version_datos_config)
         
         # Mapeo de índice a vista
-        vistas = [crear_vista_dashboard]
+        vistas = ["dashboard"]
         destinations = [
             ft.NavigationRailDestination(icon=ft.Icons.DASHBOARD, label="Dashboard"),
         ]
         
         if auth.puede('puede_registrar'):
             destinations.append(ft.NavigationRailDestination(icon=ft.Icons.ADD_CIRCLE, label="Registro"))
-            vistas.append(crear_vista_registro)
+            vistas.append("registro")
         
         if auth.puede('puede_ver_historial'):
             destinations.append(ft.NavigationRailDestination(icon=ft.Icons.HISTORY, label="Historial"))
-            vistas.append(crear_vista_historial)
+            vistas.append("historial")
         
         if auth.puede('puede_gestionar_config') or auth.es_admin():
             destinations.append(ft.NavigationRailDestination(icon=ft.Icons.SETTINGS, label="Config"))
-            vistas.append(crear_vista_admin)
+            vistas.append("admin")
         
         # Contenedor de contenido
         contenido = ft.Container(
-            content=crear_vista_dashboard(),
             expand=True,
             padding=20,
             bgcolor="#FAFAFA",
         )
+        registro.mostrar("dashboard", contenido)
+        
+        # Puntajes de anomalía: si el job nocturno no corrió hoy, recalcular
+        from src.logic import AnomaliaService
+        AnomaliaService().actualizar_si_vencido()
         
         def cambiar_vista(e):
             idx = e.control.selected_index
             if idx < len(vistas):
                 try:
-                    nueva_vista = vistas[idx]()
-                    contenido.content = nueva_vista
-                    page.update()
+                    registro.mostrar(vistas[idx], contenido)
                 except Exception as ex:
                     print(f"ERROR en vista {idx}: {ex}")
                     import traceback
@@ -217,6 +208,9 @@ def main(page: ft.Page):
     
     def cerrar_sesion():
         """Cierra la sesión actual."""
+        if registro_actual[0]:
+            registro_actual[0].limpiar()
+            registro_actual[0] = None
         auth.logout()
         page.title = f"{APP_CONFIG['nombre']} v{APP_CONFIG['version']}"
         mostrar_login()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Recalcula los puntajes de anomalía de todas las cuentas (job nocturno)
+Programar una vez al día, por ejemplo con cron:
+    0 2 * * *  cd /ruta/ConSmart && python3 recalcular_anomalias.py
+"""
+
+import argparse
+import sys
+import time
+
+from src.database import AnomaliaRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula los puntajes de anomalía")
+    parser.add_argument("--dias", type=int, default=90,
+                        help="Días recientes a puntuar (default: 90)")
+    parser.add_argument("--ventana", type=int, default=180,
+                        help="Días de historia de la base de cada movimiento (default: 180)")
+    parser.add_argument("--min-base", type=int, default=5,
+                        help="Movimientos mínimos en la base para puntuar (default: 5)")
+    args = parser.parse_args()
+    
+    repo = AnomaliaRepository()
+    
+    inicio = time.perf_counter()
+    puntuados = repo.recalcular(dias=args.dias, ventana_dias=args.ventana, min_base=args.min_base)
+    print(f"✅ {puntuados} movimientos puntuados en {time.perf_counter() - inicio:.2f} s")
+    
+    anomalias = repo.obtener(limite=10)
+    if anomalias:
+        print("\n⚠️  Movimientos más inusuales (MAD):")
+        for a in anomalias:
+            monto = a['ingreso'] or a['egreso']
+            print(f"   {a['fecha']}  {a['hoja']} / {a['local']} / {a['categoria']}: "
+                  f"{monto:,.2f} (mediana {a['mediana']:,.2f}, puntaje {a['puntaje']:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Reconstruye la tabla agg_mensual (totales mensuales de movimientos) y
+estadisticas_montos (media y varianza de montos por hoja y categoría)
+Usar tras importar movimientos directamente en la base de datos, o con
+--verificar para comprobar que los agregados coinciden con los movimientos.
+"""
+
+import argparse
+import sys
+import time
+
+from src.database import AgregadoMensualRepository, EstadisticaMontoRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye los agregados mensuales")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Solo comparar agg_mensual con movimientos, sin modificar")
+    args = parser.parse_args()
+    
+    repo = AgregadoMensualRepository()
+    
+    if args.verificar:
+        diferencias = repo.verificar()
+        if not diferencias:
+            print("✅ agg_mensual coincide con movimientos")
+            return 0
+        
+        print(f"⚠️  {len(diferencias)} grupo(s) con diferencias (hoja, local, categoría, mes):")
+        for clave in diferencias[:20]:
+            print(f"   {clave}")
+        print("\nEjecuta: python3 reconstruir_agregados.py")
+        return 1
+    
+    inicio = time.perf_counter()
+    filas = repo.reconstruir()
+    print(f"✅ agg_mensual reconstruida: {filas} filas en {time.perf_counter() - inicio:.2f} s")
+    
+    inicio = time.perf_counter()
+    grupos = EstadisticaMontoRepository().reconstruir()
+    print(f"✅ estadisticas_montos reconstruida: {grupos} grupos en {time.perf_counter() - inicio:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+ConSmart - Carga Diferida de Módulos
+====================================
+Exportaciones de paquete que se importan en el primer uso (PEP 562).
+"""
+
+import importlib
+from typing import Callable, Dict
+
+
+def exportar_bajo_demanda(paquete: str, exportaciones: Dict[str, str]) -> Callable:
+    """
+    Crea el __getattr__ de un paquete que importa sus exportaciones al usarlas.
+    
+    Así `from src.logic import get_auth` solo carga auth_service, y no
+    services/pandas, hasta que alguien pide un nombre que los necesita.
+    
+    Args:
+        paquete: __name__ del paquete
+        exportaciones: Nombre exportado -> submódulo relativo que lo define
+    
+    Returns:
+        Función para asignar como __getattr__ del paquete
+    """
+    espacio = importlib.import_module(paquete).__dict__
+    
+    def __getattr__(nombre: str):
+        submodulo = exportaciones.get(nombre)
+        if submodulo is None:
+            raise AttributeError(f"module {paquete!r} has no attribute {nombre!r}")
+        
+        valor = getattr(importlib.import_module(submodulo, paquete), nombre)
+        espacio[nombre] = valor  # Las siguientes búsquedas no pasan por aquí
+        return valor
+    
+    return __getattr__
@@ -29,6 +29,7 @@ UI_CONFIG = {
     "window_width": 1400,
     "window_height": 900,
     "theme_mode": "light",  # light, dark, system
+    "max_vistas_en_memoria": 4,  # Vistas que se mantienen vivas entre pestañas
 }
 
 # Datos iniciales para poblar la base de datos
@@ -1,13 +1,34 @@
 """
 Módulo de Base de Datos de ConSmart
+
+Los repositorios se importan en el primer uso (ver src.carga_diferida).
 """
 
+from src.carga_diferida import exportar_bajo_demanda
+
 from .connection import DatabaseConnection, get_db
-from .repositories import MovimientoRepository, ConfigRepository
+from .versiones import VersionesDatos, get_versiones
+
+__getattr__ = exportar_bajo_demanda(__name__, {
+    "MovimientoRepository": ".repositories",
+    "ConfigRepository": ".repositories",
+    "ReporteRepository": ".repositories",
+    "AgregadoMensualRepository": ".repositories",
+    "AnomaliaRepository": ".repositories",
+    "EstadisticaMontoRepository": ".repositories",
+    "ConciliacionRepository": ".repositories",
+})
 
 __all__ = [
     "DatabaseConnection",
     "get_db",
+    "VersionesDatos",
+    "get_versiones",
     "MovimientoRepository", 
     "ConfigRepository",
+    "ReporteRepository",
+    "AgregadoMensualRepository",
+    "AnomaliaRepository",
+    "EstadisticaMontoRepository",
+    "ConciliacionRepository",
 ]
@@ -5,6 +5,8 @@ Maneja la conexión a DuckDB y la creación del esquema.
 """
 
 import duckdb
+import threading
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import Optional
 import sys
@@ -15,12 +17,54 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from src.config import DB_PATH, DATA_DIR, DATOS_INICIALES
 
 
+# Agrega movimientos por hoja, local, categoría y mes (sin local/categoría = 0)
+SQL_POBLAR_AGG_MENSUAL = """
+    INSERT INTO agg_mensual (hoja_id, local_id, categoria_id, mes, ingresos, egresos, n)
+    SELECT
+        hoja_id,
+        COALESCE(local_id, 0),
+        COALESCE(categoria_id, 0),
+        date_trunc('month', fecha)::DATE,
+        SUM(ingreso),
+        SUM(egreso),
+        COUNT(*)
+    FROM movimientos
+    GROUP BY ALL
+"""
+
+# Media y suma de cuadrados (Welford) de los montos por hoja, categoría y sentido
+SQL_ESTADISTICAS_MONTOS = """
+    SELECT
+        hoja_id,
+        COALESCE(categoria_id, 0) AS categoria_id,
+        ingreso > 0 AS es_ingreso,
+        COUNT(*) AS n,
+        AVG((ingreso + egreso)::DOUBLE) AS media,
+        COALESCE(VAR_POP((ingreso + egreso)::DOUBLE), 0) * COUNT(*) AS m2
+    FROM movimientos
+    GROUP BY ALL
+"""
+
+SQL_POBLAR_ESTADISTICAS_MONTOS = (
+    "INSERT INTO estadisticas_montos (hoja_id, categoria_id, es_ingreso, n, media, m2)"
+    + SQL_ESTADISTICAS_MONTOS
+)
+
+
 class DatabaseConnection:
     """Singleton para manejar la conexión a DuckDB."""
     
     _instance: Optional['DatabaseConnection'] = None
     _connection: Optional[duckdb.DuckDBPyConnection] = None
     
+    # Cursor propio de cada hilo que no sea el que abrió la conexión
+    _local = threading.local()
+    _hilo_principal: Optional[int] = None
+    
+    # Una transacción de escritura a la vez: DuckDB aborta (no espera) las
+    # transacciones concurrentes que tocan las mismas filas de agregados
+    _lock_escritura = threading.Lock()
+    
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -37,6 +81,7 @@ class DatabaseConnection:
         
         # Conectar a DuckDB
         self._connection = duckdb.connect(str(DB_PATH))
+        self._hilo_principal = threading.get_ident()
         
         # Crear esquema
         self._crear_esquema()
@@ -177,6 +222,73 @@ class DatabaseConnection:
             )
         """)
         
+        # Totales mensuales de movimientos, mantenidos al escribir movimientos
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS agg_mensual (
+                hoja_id INTEGER NOT NULL,
+                local_id INTEGER NOT NULL,
+                categoria_id INTEGER NOT NULL,
+                mes DATE NOT NULL,
+                ingresos DECIMAL(18,2) NOT NULL,
+                egresos DECIMAL(18,2) NOT NULL,
+                n BIGINT NOT NULL,
+                PRIMARY KEY (hoja_id, local_id, categoria_id, mes)
+            )
+        """)
+        
+        # Puntajes de anomalía de movimientos recientes (recalculados cada día)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS anomalias (
+                movimiento_id INTEGER PRIMARY KEY,
+                hoja_id INTEGER NOT NULL,
+                local_id INTEGER,
+                categoria_id INTEGER,
+                fecha DATE NOT NULL,
+                monto DECIMAL(15,2) NOT NULL,
+                es_ingreso BOOLEAN NOT NULL,
+                n_base INTEGER NOT NULL,
+                mediana DOUBLE,
+                mad DOUBLE,
+                media DOUBLE,
+                desviacion DOUBLE,
+                z DOUBLE,
+                z_robusto DOUBLE,
+                calculado_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Último recálculo de anomalias (una sola fila), aunque no puntúe nada
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS anomalias_calculo (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                calculado_at TIMESTAMP NOT NULL,
+                hasta DATE NOT NULL,
+                puntuados INTEGER NOT NULL
+            )
+        """)
+        
+        # Estadísticas de montos para puntuar cada movimiento al crearlo
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS estadisticas_montos (
+                hoja_id INTEGER NOT NULL,
+                categoria_id INTEGER NOT NULL,
+                es_ingreso BOOLEAN NOT NULL,
+                n BIGINT NOT NULL,
+                media DOUBLE NOT NULL,
+                m2 DOUBLE NOT NULL,
+                PRIMARY KEY (hoja_id, categoria_id, es_ingreso)
+            )
+        """)
+        
+        # Bases creadas antes de agg_mensual: se puebla una vez desde movimientos
+        vacia = self._connection.execute("SELECT COUNT(*) FROM agg_mensual").fetchone()[0] == 0
+        if vacia:
+            self._connection.execute(SQL_POBLAR_AGG_MENSUAL)
+        
+        vacia = self._connection.execute("SELECT COUNT(*) FROM estadisticas_montos").fetchone()[0] == 0
+        if vacia:
+            self._connection.execute(SQL_POBLAR_ESTADISTICAS_MONTOS)
+        
         # Índices para rendimiento
         self._connection.execute("""
             CREATE INDEX IF NOT EXISTS idx_mov_fecha ON movimientos(fecha)
@@ -286,14 +398,84 @@ class DatabaseConnection:
     
     @property
     def con(self) -> duckdb.DuckDBPyConnection:
-        """Retorna la conexión activa."""
-        return self._connection
+        """
+        Retorna la conexión activa del hilo actual.
+        
+        El hilo que abrió la base usa la conexión principal; cualquier otro
+        (handlers de Flet, tareas en segundo plano) recibe un cursor propio
+        la primera vez, para que sus consultas y transacciones no se
+        mezclen con las de otros hilos.
+        """
+        if threading.get_ident() == self._hilo_principal:
+            return self._connection
+        
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._connection.cursor()
+        return cursor
+    
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Crea un cursor independiente sobre la misma base de datos.
+        
+        Útil para ejecutar consultas desde otro hilo y poder cancelarlas
+        con cursor.interrupt() sin afectar la conexión principal.
+        """
+        return self._connection.cursor()
+    
+    @contextmanager
+    def transaccion(self, cursor: duckdb.DuckDBPyConnection = None,
+                    exclusiva: bool = True):
+        """
+        Ejecuta un bloque en una transacción.
+        
+        Hace COMMIT al salir y ROLLBACK si el bloque lanza una excepción.
+        Las funciones registradas con al_confirmar() dentro del bloque se
+        ejecutan tras el COMMIT y antes de liberar el lock de escritura,
+        así ninguna otra transacción exclusiva ve el estado intermedio.
+        
+        Args:
+            cursor: Cursor propio (p. ej. desde otro hilo); por defecto la
+                conexión del hilo actual
+            exclusiva: Esperar a que terminen las transacciones exclusivas
+                de otros hilos. Solo conviene False para transacciones
+                largas que escriben tablas que nadie más modifica
+        """
+        con = cursor if cursor is not None else self.con
+        with self._lock_escritura if exclusiva else nullcontext():
+            self._local.al_confirmar = []
+            try:
+                con.execute("BEGIN TRANSACTION")
+                try:
+                    yield con
+                except Exception:
+                    con.execute("ROLLBACK")
+                    raise
+                con.execute("COMMIT")
+                
+                for funcion in self._local.al_confirmar:
+                    funcion()
+            finally:
+                self._local.al_confirmar = None
+    
+    def al_confirmar(self, funcion):
+        """
+        Ejecuta `funcion` cuando se confirme la transacción en curso del hilo.
+        
+        Si se descarta (ROLLBACK) no se ejecuta; fuera de una transacción se
+        ejecuta de inmediato.
+        """
+        pendientes = getattr(self._local, "al_confirmar", None)
+        if pendientes is None:
+            funcion()
+        else:
+            pendientes.append(funcion)
     
     def execute(self, query: str, params: list = None):
-        """Ejecuta una consulta SQL."""
+        """Ejecuta una consulta SQL en la conexión del hilo actual."""
         if params:
-            return self._connection.execute(query, params)
-        return self._connection.execute(query)
+            return self.con.execute(query, params)
+        return self.con.execute(query)
     
     def fetchall(self, query: str, params: list = None) -> list:
         """Ejecuta y retorna todos los resultados."""
@@ -310,6 +492,11 @@ class DatabaseConnection:
         result = self.execute(query, params)
         return result.df()
     
+    def fetchnumpy(self, query: str, params: list = None) -> dict:
+        """Ejecuta y retorna un diccionario columna -> arreglo de NumPy."""
+        result = self.execute(query, params)
+        return result.fetchnumpy()
+    
     def close(self):
         """Cierra la conexión."""
         if self._connection:
@@ -1,9 +1,31 @@
 """
 Repositorios de ConSmart
+
+Se importan en el primer uso: movimiento_repo carga pandas.
 """
 
-from .movimiento_repo import MovimientoRepository
-from .config_repo import ConfigRepository
-from .usuario_repo import UsuarioRepository, RolRepository
+from src.carga_diferida import exportar_bajo_demanda
+
+__getattr__ = exportar_bajo_demanda(__name__, {
+    "MovimientoRepository": ".movimiento_repo",
+    "ConfigRepository": ".config_repo",
+    "UsuarioRepository": ".usuario_repo",
+    "RolRepository": ".usuario_repo",
+    "ReporteRepository": ".reporte_repo",
+    "AgregadoMensualRepository": ".agregado_repo",
+    "AnomaliaRepository": ".anomalia_repo",
+    "EstadisticaMontoRepository": ".estadistica_repo",
+    "ConciliacionRepository": ".conciliacion_repo",
+})
 
-__all__ = ["MovimientoRepository", "ConfigRepository", "UsuarioRepository", "RolRepository"]
+__all__ = [
+    "MovimientoRepository",
+    "ConfigRepository",
+    "UsuarioRepository",
+    "RolRepository",
+    "ReporteRepository",
+    "AgregadoMensualRepository",
+    "AnomaliaRepository",
+    "EstadisticaMontoRepository",
+    "ConciliacionRepository",
+]
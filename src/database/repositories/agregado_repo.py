@@ -0,0 +1,368 @@
+"""
+ConSmart - Repositorio de Agregados Mensuales
+=============================================
+Tabla agg_mensual: totales de movimientos por hoja, local, categoría y mes.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.database.connection import get_db, SQL_POBLAR_AGG_MENSUAL
+from src.database.versiones import get_versiones
+
+
+def _inicio_mes(fecha: date) -> date:
+    """Primer día del mes de una fecha."""
+    return fecha.replace(day=1)
+
+
+def _meses_completos(fecha_inicio: Optional[date],
+                     fecha_fin: Optional[date]) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Meses enteros contenidos en un rango de fechas.
+    
+    Returns:
+        Tupla (desde, hasta) con el primer día del primer mes completo y el
+        primer día del mes siguiente al último completo (hasta es exclusivo).
+        None donde el rango no tiene límite.
+    """
+    desde = None
+    if fecha_inicio:
+        desde = _inicio_mes(fecha_inicio)
+        if desde != fecha_inicio:
+            desde = _inicio_mes(desde + timedelta(days=32))
+    
+    hasta = _inicio_mes(fecha_fin + timedelta(days=1)) if fecha_fin else None
+    return desde, hasta
+
+
+class AgregadoMensualRepository:
+    """
+    Mantiene y consulta la tabla agg_mensual.
+    
+    MovimientoRepository aplica cada alta, edición o baja como un cambio
+    (+1/-1) en la misma transacción que el movimiento. Las consultas
+    alineadas a meses leen agg_mensual y solo recorren movimientos en los
+    días sueltos de los extremos del rango.
+    """
+    
+    def __init__(self):
+        self.db = get_db()
+    
+    def aplicar_cambios(self, cambios: List[tuple]):
+        """
+        Suma o resta movimientos de los totales mensuales.
+        
+        Args:
+            cambios: Tuplas (hoja_id, local_id, categoria_id, fecha, ingreso,
+                egreso, signo) con signo +1 para altas y -1 para bajas
+        """
+        if not cambios:
+            return
+        
+        valores = ", ".join(
+            ["(?::INTEGER, ?::INTEGER, ?::INTEGER, ?::DATE, "
+             "?::DECIMAL(15,2), ?::DECIMAL(15,2), ?::INTEGER)"] * len(cambios)
+        )
+        self.db.execute(f"""
+            INSERT INTO agg_mensual (hoja_id, local_id, categoria_id, mes, ingresos, egresos, n)
+            SELECT
+                hoja_id,
+                COALESCE(local_id, 0),
+                COALESCE(categoria_id, 0),
+                date_trunc('month', fecha)::DATE,
+                SUM(signo * ingreso),
+                SUM(signo * egreso),
+                SUM(signo)
+            FROM (VALUES {valores}) AS d(hoja_id, local_id, categoria_id, fecha,
+                                         ingreso, egreso, signo)
+            GROUP BY ALL
+            ON CONFLICT (hoja_id, local_id, categoria_id, mes) DO UPDATE SET
+                ingresos = agg_mensual.ingresos + EXCLUDED.ingresos,
+                egresos = agg_mensual.egresos + EXCLUDED.egresos,
+                n = agg_mensual.n + EXCLUDED.n
+        """, [valor for cambio in cambios for valor in cambio])
+        
+        self.db.execute("DELETE FROM agg_mensual WHERE n = 0")
+    
+    def reconstruir(self) -> int:
+        """
+        Recalcula agg_mensual completo desde movimientos.
+        
+        Returns:
+            Cantidad de filas (hoja, local, categoría, mes) generadas
+        """
+        with self.db.transaccion():
+            self.db.execute("DELETE FROM agg_mensual")
+            self.db.execute(SQL_POBLAR_AGG_MENSUAL)
+        
+        hoja_ids = [fila[0] for fila in self.db.fetchall("SELECT id FROM hojas")]
+        get_versiones().registrar_cambio_movimientos(*hoja_ids)
+        
+        return int(self.db.fetchone("SELECT COUNT(*) FROM agg_mensual")[0])
+    
+    def verificar(self) -> List[tuple]:
+        """
+        Compara agg_mensual con los movimientos.
+        
+        Returns:
+            Claves (hoja_id, local_id, categoria_id, mes) con diferencias
+        """
+        return self.db.fetchall("""
+            WITH esperado AS (
+                SELECT
+                    hoja_id,
+                    COALESCE(local_id, 0) AS local_id,
+                    COALESCE(categoria_id, 0) AS categoria_id,
+                    date_trunc('month', fecha)::DATE AS mes,
+                    SUM(ingreso) AS ingresos,
+                    SUM(egreso) AS egresos,
+                    COUNT(*) AS n
+                FROM movimientos
+                GROUP BY ALL
+            )
+            SELECT COALESCE(e.hoja_id, a.hoja_id), COALESCE(e.local_id, a.local_id),
+                   COALESCE(e.categoria_id, a.categoria_id), COALESCE(e.mes, a.mes)
+            FROM esperado e
+            FULL OUTER JOIN agg_mensual a USING (hoja_id, local_id, categoria_id, mes)
+            WHERE e.n IS DISTINCT FROM a.n
+               OR e.ingresos IS DISTINCT FROM a.ingresos
+               OR e.egresos IS DISTINCT FROM a.egresos
+            ORDER BY 1, 2, 3, 4
+        """)
+    
+    def origen_movimientos(self, fecha_inicio: date = None,
+                           fecha_fin: date = None,
+                           hoja_ids: Iterable[int] = None,
+                           local_ids: Iterable[int] = None,
+                           moneda_mensual: str = None,
+                           mensual: bool = True) -> Tuple[str, list]:
+        """
+        Subconsulta equivalente a los movimientos de un rango, leyendo meses agregados.
+        
+        Los meses completos del rango salen de agg_mensual (una fila por hoja,
+        local, categoría y mes, fechada el día 1) y los días sueltos de los
+        extremos, de movimientos.
+        
+        Args:
+            moneda_mensual: Si se indica, solo las hojas en esa moneda se leen
+                agregadas; las demás se leen por día (p. ej. para convertirlas
+                con el tipo de cambio de cada fecha)
+            mensual: False para leer todo de movimientos (agrupaciones por día)
+        
+        Returns:
+            Tupla (sql, parametros); el SQL produce las columnas fecha, hoja_id,
+            local_id, categoria_id, ingreso, egreso y n (movimientos que representa)
+        """
+        hoja_ids = list(hoja_ids or [])
+        local_ids = list(local_ids or [])
+        
+        def _filtros(alias: str) -> Tuple[str, list]:
+            sql = ""
+            params = []
+            if hoja_ids:
+                sql += f" AND {alias}.hoja_id IN ({', '.join('?' * len(hoja_ids))})"
+                params += hoja_ids
+            if local_ids:
+                sql += f" AND {alias}.local_id IN ({', '.join('?' * len(local_ids))})"
+                params += local_ids
+            return sql, params
+        
+        # Movimientos por día: los extremos del rango (o todo si no es mensual)
+        filtros_m, params_m = _filtros("m")
+        sql_dias = f"""
+            SELECT m.fecha, m.hoja_id, m.local_id, m.categoria_id,
+                   m.ingreso, m.egreso, 1 AS n
+            FROM movimientos m
+            WHERE 1=1 {filtros_m}
+        """
+        params_dias = list(params_m)
+        if fecha_inicio:
+            sql_dias += " AND m.fecha >= ?"
+            params_dias.append(fecha_inicio)
+        if fecha_fin:
+            sql_dias += " AND m.fecha <= ?"
+            params_dias.append(fecha_fin)
+        
+        if not mensual:
+            return sql_dias, params_dias
+        
+        desde, hasta = _meses_completos(fecha_inicio, fecha_fin)
+        
+        fuera_de_meses = []
+        if desde:
+            fuera_de_meses.append("m.fecha < ?")
+            params_dias.append(desde)
+        if hasta:
+            fuera_de_meses.append("m.fecha >= ?")
+            params_dias.append(hasta)
+        if moneda_mensual:
+            fuera_de_meses.append("m.hoja_id IN (SELECT id FROM hojas WHERE moneda <> ?)")
+            params_dias.append(moneda_mensual)
+        sql_dias += f" AND ({' OR '.join(fuera_de_meses) or 'FALSE'})"
+        
+        # Meses completos desde agg_mensual
+        filtros_a, params_a = _filtros("a")
+        sql_meses = f"""
+            SELECT a.mes AS fecha, a.hoja_id, NULLIF(a.local_id, 0) AS local_id,
+                   NULLIF(a.categoria_id, 0) AS categoria_id,
+                   a.ingresos AS ingreso, a.egresos AS egreso, a.n
+            FROM agg_mensual a
+            WHERE 1=1 {filtros_a}
+        """
+        params_meses = list(params_a)
+        if desde:
+            sql_meses += " AND a.mes >= ?"
+            params_meses.append(desde)
+        if hasta:
+            sql_meses += " AND a.mes < ?"
+            params_meses.append(hasta)
+        if moneda_mensual:
+            sql_meses += " AND a.hoja_id IN (SELECT id FROM hojas WHERE moneda = ?)"
+            params_meses.append(moneda_mensual)
+        
+        return f"{sql_meses} UNION ALL {sql_dias}", params_meses + params_dias
+    
+    def obtener_resumen(self, hoja_id: int = None,
+                        local_id: int = None,
+                        fecha_inicio: date = None,
+                        fecha_fin: date = None,
+                        cursor=None) -> dict:
+        """
+        Totales de un rango leyendo los meses completos de agg_mensual.
+        
+        Returns:
+            Dict con total_ingresos, total_egresos, balance y num_movimientos
+        """
+        origen, params = self.origen_movimientos(
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            hoja_ids=[hoja_id] if hoja_id else None,
+            local_ids=[local_id] if local_id else None,
+        )
+        query = f"""
+            SELECT
+                COALESCE(SUM(o.ingreso), 0),
+                COALESCE(SUM(o.egreso), 0),
+                COALESCE(SUM(o.n), 0)
+            FROM ({origen}) o
+        """
+        
+        if cursor is not None:
+            result = cursor.execute(query, params).fetchone()
+        else:
+            result = self.db.fetchone(query, params)
+        
+        total_ingresos = float(result[0])
+        total_egresos = float(result[1])
+        return {
+            "total_ingresos": total_ingresos,
+            "total_egresos": total_egresos,
+            "balance": total_ingresos - total_egresos,
+            "num_movimientos": int(result[2]),
+        }
+    
+    def obtener_resumenes(self, hoja_ids: List[int],
+                          periodos: List[Tuple[date, date]],
+                          cursor=None) -> List[tuple]:
+        """
+        Totales de varias hojas en varios períodos con una sola consulta.
+        
+        Cada período se parte en sus meses completos (agg_mensual) y sus días
+        sueltos (movimientos); ambas partes se agrupan por período y hoja.
+        
+        Args:
+            hoja_ids: Hojas a resumir
+            periodos: Rangos (fecha_inicio, fecha_fin), ambos inclusive
+        
+        Returns:
+            Tuplas (indice_periodo, hoja_id, ingresos, egresos, n) para cada
+            combinación, con ceros si no hubo movimientos
+        """
+        if not hoja_ids or not periodos:
+            return []
+        
+        filas_periodos = []
+        params = []
+        for i, (fecha_inicio, fecha_fin) in enumerate(periodos):
+            desde, hasta = _meses_completos(fecha_inicio, fecha_fin)
+            filas_periodos.append("(?::INTEGER, ?::DATE, ?::DATE, ?::DATE, ?::DATE)")
+            params += [i, fecha_inicio, fecha_fin, desde, hasta]
+        
+        marcas = ", ".join("?" * len(hoja_ids))
+        query = f"""
+            WITH periodos(i, inicio, fin, desde, hasta) AS (
+                VALUES {", ".join(filas_periodos)}
+            ),
+            partes AS (
+                SELECT p.i, a.hoja_id, a.ingresos AS ingreso, a.egresos AS egreso, a.n
+                FROM periodos p
+                JOIN agg_mensual a ON a.mes >= p.desde AND a.mes < p.hasta
+                WHERE a.hoja_id IN ({marcas})
+                UNION ALL
+                SELECT p.i, m.hoja_id, m.ingreso, m.egreso, 1
+                FROM periodos p
+                JOIN movimientos m ON m.fecha BETWEEN p.inicio AND p.fin
+                    AND (m.fecha < p.desde OR m.fecha >= p.hasta)
+                WHERE m.hoja_id IN ({marcas})
+            ),
+            totales AS (
+                SELECT i, hoja_id, SUM(ingreso) AS ingresos, SUM(egreso) AS egresos,
+                       SUM(n) AS n
+                FROM partes
+                GROUP BY i, hoja_id
+            )
+            SELECT p.i, h.hoja_id,
+                   COALESCE(t.ingresos, 0)::DOUBLE,
+                   COALESCE(t.egresos, 0)::DOUBLE,
+                   COALESCE(t.n, 0)::BIGINT
+            FROM periodos p
+            CROSS JOIN (SELECT UNNEST(?::INTEGER[]) AS hoja_id) h
+            LEFT JOIN totales t ON t.i = p.i AND t.hoja_id = h.hoja_id
+            ORDER BY p.i, h.hoja_id
+        """
+        params += list(hoja_ids) * 2 + [list(hoja_ids)]
+        
+        if cursor is not None:
+            return cursor.execute(query, params).fetchall()
+        return self.db.fetchall(query, params)
+    
+    def obtener_saldos(self, hoja_ids: List[int], fecha: date = None,
+                       cursor=None) -> Dict[int, float]:
+        """
+        Saldo de varias hojas al cierre de una fecha (o actual) en una consulta.
+        
+        Returns:
+            Dict hoja_id -> saldo (0 para hojas sin movimientos)
+        """
+        if not hoja_ids:
+            return {}
+        
+        origen, params = self.origen_movimientos(fecha_fin=fecha, hoja_ids=hoja_ids)
+        query = f"""
+            SELECT o.hoja_id, SUM(o.ingreso - o.egreso)::DOUBLE
+            FROM ({origen}) o
+            GROUP BY o.hoja_id
+        """
+        
+        if cursor is not None:
+            filas = cursor.execute(query, params).fetchall()
+        else:
+            filas = self.db.fetchall(query, params)
+        
+        saldos = dict.fromkeys(hoja_ids, 0.0)
+        saldos.update(filas)
+        return saldos
+    
+    def obtener_saldo(self, hoja_id: int, cursor=None) -> float:
+        """Saldo total de una hoja, sumando sus meses."""
+        query = """
+            SELECT COALESCE(SUM(ingresos - egresos), 0)
+            FROM agg_mensual
+            WHERE hoja_id = ?
+        """
+        if cursor is not None:
+            result = cursor.execute(query, [hoja_id]).fetchone()
+        else:
+            result = self.db.fetchone(query, [hoja_id])
+        return float(result[0]) if result else 0.0
@@ -0,0 +1,166 @@
+"""
+ConSmart - Repositorio de Anomalías
+===================================
+Puntajes de anomalía de movimientos calculados con funciones de ventana.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from src.database.connection import get_db
+
+
+class AnomaliaRepository:
+    """
+    Calcula y consulta la tabla anomalias.
+    
+    Cada movimiento se compara con los movimientos de días anteriores de su
+    mismo grupo (hoja, local, categoría y sentido ingreso/egreso) dentro de
+    una ventana de días: un alquiler se compara con alquileres y una compra
+    de pan con compras de pan. Los del mismo día quedan fuera de la base,
+    así dos pagos inusuales del mismo día no se ocultan entre sí. Se guardan dos puntajes:
+    
+    - z: (monto - media) / desviación estándar
+    - z_robusto: 0.6745 · (monto - mediana) / MAD, poco sensible a los
+      propios valores atípicos de la base
+    """
+    
+    # Método de puntaje -> columna de la tabla
+    METODOS = {"mad": "z_robusto", "zscore": "z"}
+    
+    def __init__(self):
+        self.db = get_db()
+    
+    def recalcular(self, dias: int = 90, ventana_dias: int = 180,
+                   min_base: int = 5, hasta: date = None, cursor=None) -> int:
+        """
+        Recalcula los puntajes de todas las cuentas en una sola consulta.
+        
+        Args:
+            dias: Movimientos a puntuar: los de los últimos `dias` días
+            ventana_dias: Días anteriores a cada movimiento que forman su base
+            min_base: Movimientos mínimos en la base para puntuar
+            hasta: Último día a puntuar (hoy si es None)
+            cursor: Cursor opcional para ejecutar desde otro hilo
+        
+        Returns:
+            Cantidad de movimientos puntuados
+        """
+        hasta = hasta or date.today()
+        desde = hasta - timedelta(days=dias - 1)
+        ventana_dias = int(ventana_dias)
+        
+        query = f"""
+            INSERT INTO anomalias (
+                movimiento_id, hoja_id, local_id, categoria_id, fecha, monto,
+                es_ingreso, n_base, mediana, mad, media, desviacion, z, z_robusto
+            )
+            WITH base AS (
+                SELECT id, hoja_id, local_id, categoria_id, fecha,
+                       (ingreso + egreso)::DOUBLE AS monto,
+                       ingreso > 0 AS es_ingreso
+                FROM movimientos
+                WHERE fecha >= ? AND fecha <= ?
+            ),
+            puntuado AS (
+                SELECT *,
+                    COUNT(*) OVER w AS n_base,
+                    median(monto) OVER w AS mediana,
+                    mad(monto) OVER w AS mad,
+                    avg(monto) OVER w AS media,
+                    stddev_samp(monto) OVER w AS desviacion
+                FROM base
+                WINDOW w AS (
+                    PARTITION BY hoja_id, local_id, categoria_id, es_ingreso
+                    ORDER BY fecha
+                    RANGE BETWEEN INTERVAL {ventana_dias} DAYS PRECEDING AND CURRENT ROW
+                    EXCLUDE GROUP
+                )
+            )
+            SELECT
+                id, hoja_id, local_id, categoria_id, fecha, monto, es_ingreso,
+                n_base, mediana, mad, media, desviacion,
+                (monto - media) / NULLIF(desviacion, 0),
+                0.6745 * (monto - mediana) / NULLIF(mad, 0)
+            FROM puntuado
+            WHERE fecha >= ? AND n_base >= ?
+        """
+        
+        # Solo escribe anomalias: no hace esperar a quienes guardan movimientos
+        with self.db.transaccion(cursor, exclusiva=False) as con:
+            con.execute("DELETE FROM anomalias")
+            con.execute(query, [
+                desde - timedelta(days=ventana_dias), hasta, desde, min_base,
+            ])
+            puntuados = int(con.execute("SELECT COUNT(*) FROM anomalias").fetchone()[0])
+            
+            # Se registra aparte: un recálculo sin movimientos puntuados también cuenta
+            con.execute("""
+                INSERT INTO anomalias_calculo (id, calculado_at, hasta, puntuados)
+                VALUES (1, CURRENT_TIMESTAMP, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    calculado_at = EXCLUDED.calculado_at,
+                    hasta = EXCLUDED.hasta,
+                    puntuados = EXCLUDED.puntuados
+            """, [hasta, puntuados])
+            return puntuados
+    
+    def obtener(self, hoja_ids: List[int] = None,
+                umbral: float = 3.5,
+                metodo: str = "mad",
+                fecha_inicio: date = None,
+                limite: int = None) -> List[Dict]:
+        """
+        Movimientos cuyo puntaje supera un umbral (montos inusualmente altos).
+        
+        Args:
+            hoja_ids: Limitar a estas hojas (todas si es None)
+            umbral: Puntaje mínimo para considerar anomalía
+            metodo: 'mad' (z robusto) o 'zscore'
+            fecha_inicio: Solo movimientos desde esta fecha
+            limite: Máximo de filas a retornar
+        
+        Returns:
+            Lista de movimientos con su base (mediana, mad, media, desviacion,
+            n_base) y su puntaje, del más al menos anómalo
+        """
+        if metodo not in self.METODOS:
+            raise ValueError(f"Método no soportado: {metodo}")
+        columna = self.METODOS[metodo]
+        
+        query = f"""
+            SELECT
+                a.movimiento_id AS id, a.fecha, a.hoja_id, h.nombre AS hoja,
+                l.nombre AS local, c.nombre AS categoria,
+                m.num_documento, m.responsable, m.descripcion, m.ingreso, m.egreso,
+                a.n_base, a.mediana, a.mad, a.media, a.desviacion,
+                a.{columna} AS puntaje
+            FROM anomalias a
+            JOIN movimientos m ON m.id = a.movimiento_id
+            LEFT JOIN hojas h ON a.hoja_id = h.id
+            LEFT JOIN locales l ON a.local_id = l.id
+            LEFT JOIN categorias c ON a.categoria_id = c.id
+            WHERE a.{columna} >= ?
+        """
+        params = [umbral]
+        
+        if hoja_ids:
+            query += f" AND a.hoja_id IN ({', '.join('?' * len(hoja_ids))})"
+            params.extend(hoja_ids)
+        
+        if fecha_inicio:
+            query += " AND a.fecha >= ?"
+            params.append(fecha_inicio)
+        
+        query += f" ORDER BY a.{columna} DESC"
+        if limite:
+            query += f" LIMIT {int(limite)}"
+        
+        result = self.db.execute(query, params)
+        columnas = [d[0] for d in result.description]
+        return [dict(zip(columnas, fila)) for fila in result.fetchall()]
+    
+    def ultima_actualizacion(self) -> Optional[datetime]:
+        """Momento del último recálculo (None si nunca se calculó)."""
+        result = self.db.fetchone("SELECT calculado_at FROM anomalias_calculo WHERE id = 1")
+        return result[0] if result else None
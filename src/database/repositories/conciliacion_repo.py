@@ -0,0 +1,212 @@
+"""
+ConSmart - Repositorio de Conciliación Bancaria
+===============================================
+Empareja las líneas de un extracto bancario con los movimientos de una hoja.
+"""
+
+from datetime import timedelta
+from typing import Dict
+
+import pandas as pd
+
+from src.database.connection import get_db
+
+
+# Número de documento comparable: sin espacios, en mayúsculas y sin ceros a la izquierda
+SQL_DOCUMENTO = "NULLIF(ltrim(upper(replace(COALESCE({columna}, ''), ' ', '')), '0'), '')"
+
+
+class ConciliacionRepository:
+    """
+    Conciliación de un extracto contra movimientos, resuelta en DuckDB.
+    
+    Cada línea del extracto es candidata a los movimientos de la hoja con
+    el mismo monto (en céntimos, ingreso positivo y egreso negativo) y una
+    fecha a lo sumo `dias_tolerancia` días de distancia: un hash join por
+    monto filtrado por fecha. Los pares se emparejan uno a uno:
+    
+    1. Coincidencias exactas (monto, fecha y documento) en orden: la k-ésima
+       línea repetida con el k-ésimo movimiento repetido.
+    2. Rondas de "mejor mutuo": un par se acepta si es el único mejor
+       candidato de la línea y del movimiento (primero documento igual,
+       luego menos días de diferencia). Cada ronda descarta lo ya
+       emparejado, hasta que una ronda no agregue pares.
+    
+    Tras cada ronda se descartan de los candidatos las líneas y movimientos
+    ya emparejados; las líneas que aún tienen candidatos quedan como
+    ambiguas.
+    """
+    
+    def __init__(self):
+        self.db = get_db()
+    
+    def conciliar(self, hoja_id: int, extracto: pd.DataFrame,
+                  dias_tolerancia: int = 3,
+                  max_rondas: int = 10) -> Dict[str, pd.DataFrame]:
+        """
+        Empareja un extracto con los movimientos de una hoja.
+        
+        Args:
+            hoja_id: Hoja (cuenta) a conciliar
+            extracto: Columnas linea, fecha, monto (con signo) y
+                num_documento (puede ser nulo)
+            dias_tolerancia: Diferencia máxima de días entre línea y movimiento
+            max_rondas: Rondas máximas de emparejamiento por mejor mutuo
+        
+        Returns:
+            Dict de DataFrames:
+            - conciliados: línea y movimiento emparejados, con dias y doc_igual
+            - ambiguos: líneas sin emparejar con sus movimientos candidatos
+            - sin_movimiento: líneas sin ningún candidato
+            - sin_extracto: movimientos del período del extracto sin línea
+        """
+        tolerancia = int(dias_tolerancia)
+        inicio = extracto['fecha'].min()
+        fin = extracto['fecha'].max()
+        
+        # Cursor propio: las tablas temporales desaparecen al cerrarlo
+        con = self.db.cursor()
+        try:
+            con.register("extracto_df", extracto)
+            con.execute(f"""
+                CREATE TEMP TABLE ext AS
+                SELECT
+                    linea,
+                    fecha::DATE AS fecha,
+                    round(monto * 100)::BIGINT AS centimos,
+                    {SQL_DOCUMENTO.format(columna='num_documento::VARCHAR')} AS doc
+                FROM extracto_df
+            """)
+            
+            con.execute(f"""
+                CREATE TEMP TABLE mov AS
+                SELECT
+                    id,
+                    fecha,
+                    round((ingreso - egreso) * 100)::BIGINT AS centimos,
+                    {SQL_DOCUMENTO.format(columna='num_documento')} AS doc
+                FROM movimientos
+                WHERE hoja_id = ? AND fecha BETWEEN ? AND ?
+            """, [hoja_id, inicio - timedelta(days=tolerancia), fin + timedelta(days=tolerancia)])
+            
+            # 1. Coincidencias exactas, emparejadas por orden dentro de cada grupo
+            con.execute("""
+                CREATE TEMP TABLE conciliados AS
+                SELECT e.linea, m.id AS movimiento_id, 0 AS dias,
+                       e.doc IS NOT NULL AS doc_igual, 0 AS ronda
+                FROM (
+                    SELECT *, row_number() OVER (PARTITION BY centimos, fecha, doc ORDER BY linea) AS k
+                    FROM ext
+                ) e
+                JOIN (
+                    SELECT *, row_number() OVER (PARTITION BY centimos, fecha, doc ORDER BY id) AS k
+                    FROM mov
+                ) m
+                    ON m.centimos = e.centimos
+                    AND m.fecha = e.fecha
+                    AND m.doc IS NOT DISTINCT FROM e.doc
+                    AND m.k = e.k
+            """)
+            
+            # 2. Candidatos del resto: mismo monto y fecha dentro de la tolerancia
+            con.execute(f"""
+                CREATE TEMP TABLE pares AS
+                SELECT
+                    e.linea,
+                    m.id AS movimiento_id,
+                    abs(date_diff('day', e.fecha, m.fecha)) AS dias,
+                    COALESCE(e.doc = m.doc, false) AS doc_igual
+                FROM ext e
+                JOIN mov m
+                    ON m.centimos = e.centimos
+                    AND m.fecha BETWEEN e.fecha - {tolerancia} AND e.fecha + {tolerancia}
+                WHERE e.linea NOT IN (SELECT linea FROM conciliados)
+                  AND m.id NOT IN (SELECT movimiento_id FROM conciliados)
+            """)
+            
+            # 3. Mejor candidato único de la línea y del movimiento
+            for ronda in range(1, max_rondas + 1):
+                agregados = con.execute("""
+                    INSERT INTO conciliados
+                    WITH rangos AS (
+                        SELECT *,
+                            rank() OVER (PARTITION BY linea ORDER BY doc_igual DESC, dias) AS rango_linea,
+                            rank() OVER (PARTITION BY movimiento_id ORDER BY doc_igual DESC, dias) AS rango_mov
+                        FROM pares
+                    ),
+                    empates AS (
+                        SELECT *,
+                            SUM((rango_linea = 1)::INTEGER) OVER (PARTITION BY linea) AS mejores_linea,
+                            SUM((rango_mov = 1)::INTEGER) OVER (PARTITION BY movimiento_id) AS mejores_mov
+                        FROM rangos
+                    )
+                    SELECT linea, movimiento_id, dias, doc_igual, ? AS ronda
+                    FROM empates
+                    WHERE rango_linea = 1 AND rango_mov = 1
+                      AND mejores_linea = 1 AND mejores_mov = 1
+                """, [ronda]).fetchone()[0]
+                if not agregados:
+                    break
+                self._descartar_conciliados(con)
+            
+            conciliados = con.execute("""
+                SELECT
+                    c.linea, x.fecha, x.monto, x.num_documento, x.descripcion,
+                    c.movimiento_id, m.fecha AS fecha_movimiento,
+                    m.num_documento AS documento_movimiento,
+                    m.descripcion AS descripcion_movimiento,
+                    c.dias, c.doc_igual, c.ronda
+                FROM conciliados c
+                JOIN extracto_df x ON x.linea = c.linea
+                JOIN movimientos m ON m.id = c.movimiento_id
+                ORDER BY c.linea
+            """).fetchdf()
+            
+            ambiguos = con.execute("""
+                SELECT
+                    p.linea, x.fecha, x.monto, x.num_documento, x.descripcion,
+                    p.movimiento_id, m.fecha AS fecha_movimiento,
+                    m.num_documento AS documento_movimiento,
+                    m.descripcion AS descripcion_movimiento,
+                    p.dias, p.doc_igual
+                FROM pares p
+                JOIN extracto_df x ON x.linea = p.linea
+                JOIN movimientos m ON m.id = p.movimiento_id
+                ORDER BY p.linea, p.doc_igual DESC, p.dias, p.movimiento_id
+            """).fetchdf()
+            
+            sin_movimiento = con.execute("""
+                SELECT x.linea, x.fecha, x.monto, x.num_documento, x.descripcion
+                FROM extracto_df x
+                WHERE x.linea NOT IN (SELECT linea FROM conciliados)
+                  AND x.linea NOT IN (SELECT linea FROM pares)
+                ORDER BY x.linea
+            """).fetchdf()
+            
+            sin_extracto = con.execute("""
+                SELECT m.id AS movimiento_id, m.fecha, m.ingreso - m.egreso AS monto,
+                       m.num_documento, m.descripcion
+                FROM movimientos m
+                WHERE m.hoja_id = ? AND m.fecha BETWEEN ? AND ?
+                  AND m.id NOT IN (SELECT movimiento_id FROM conciliados)
+                  AND m.id NOT IN (SELECT movimiento_id FROM pares)
+                ORDER BY m.fecha, m.id
+            """, [hoja_id, inicio, fin]).fetchdf()
+        finally:
+            con.close()
+        
+        return {
+            "conciliados": conciliados,
+            "ambiguos": ambiguos,
+            "sin_movimiento": sin_movimiento,
+            "sin_extracto": sin_extracto,
+        }
+    
+    @staticmethod
+    def _descartar_conciliados(con):
+        """Quita de los pares candidatos las líneas y movimientos ya emparejados."""
+        con.execute("""
+            DELETE FROM pares
+            WHERE linea IN (SELECT linea FROM conciliados)
+               OR movimiento_id IN (SELECT movimiento_id FROM conciliados)
+        """)
@@ -6,6 +6,7 @@ CRUD para tablas de configuración: hojas, locales, categorías.
 
 from typing import Optional
 from src.database.connection import get_db
+from src.database.versiones import get_versiones
 
 
 class ConfigRepository:
@@ -35,6 +36,7 @@ class ConfigRepository:
             INSERT INTO hojas (nombre, tipo, moneda) VALUES (?, ?, ?)
             RETURNING id
         """, [nombre, tipo, moneda])
+        get_versiones().registrar_cambio_config()
         return result.fetchone()[0]
     
     def actualizar_hoja(self, hoja_id: int, **kwargs) -> bool:
@@ -53,11 +55,13 @@ class ConfigRepository:
         valores.append(hoja_id)
         query = f"UPDATE hojas SET {', '.join(campos)} WHERE id = ?"
         self.db.execute(query, valores)
+        get_versiones().registrar_cambio_config()
         return True
     
     def eliminar_hoja(self, hoja_id: int) -> bool:
         """Desactiva una hoja (soft delete)."""
         self.db.execute("UPDATE hojas SET activo = FALSE WHERE id = ?", [hoja_id])
+        get_versiones().registrar_cambio_config()
         return True
     
     # ==================== LOCALES ====================
@@ -91,6 +95,7 @@ class ConfigRepository:
             INSERT INTO locales (nombre) VALUES (?)
             RETURNING id
         """, [nombre])
+        get_versiones().registrar_cambio_config()
         return result.fetchone()[0]
     
     def actualizar_local(self, local_id: int, **kwargs) -> bool:
@@ -109,11 +114,13 @@ class ConfigRepository:
         valores.append(local_id)
         query = f"UPDATE locales SET {', '.join(campos)} WHERE id = ?"
         self.db.execute(query, valores)
+        get_versiones().registrar_cambio_config()
         return True
     
     def eliminar_local(self, local_id: int) -> bool:
         """Desactiva un local (soft delete)."""
         self.db.execute("UPDATE locales SET activo = FALSE WHERE id = ?", [local_id])
+        get_versiones().registrar_cambio_config()
         return True
     
     # ==================== CATEGORÍAS ====================
@@ -166,6 +173,7 @@ class ConfigRepository:
             INSERT INTO categorias (nombre, local_id, tipo) VALUES (?, ?, ?)
             RETURNING id
         """, [nombre, local_id, tipo])
+        get_versiones().registrar_cambio_config()
         return result.fetchone()[0]
     
     def actualizar_categoria(self, categoria_id: int, **kwargs) -> bool:
@@ -184,6 +192,7 @@ class ConfigRepository:
         valores.append(categoria_id)
         query = f"UPDATE categorias SET {', '.join(campos)} WHERE id = ?"
         self.db.execute(query, valores)
+        get_versiones().registrar_cambio_config()
         return True
     
     def eliminar_categoria(self, categoria_id: int) -> bool:
@@ -192,6 +201,7 @@ class ConfigRepository:
             "UPDATE categorias SET activo = FALSE WHERE id = ?", 
             [categoria_id]
         )
+        get_versiones().registrar_cambio_config()
         return True
     
     # ==================== TIPO DE CAMBIO ====================
@@ -212,10 +222,17 @@ class ConfigRepository:
             return {"fecha": result[0], "compra": result[1], "venta": result[2]}
         return None
     
+    def obtener_serie_tipo_cambio(self) -> list:
+        """Obtiene todos los tipos de cambio como tuplas (fecha, compra, venta) ordenadas."""
+        return self.db.fetchall(
+            "SELECT fecha, compra, venta FROM tipo_cambio ORDER BY fecha"
+        )
+    
     def guardar_tipo_cambio(self, fecha, compra: float, venta: float) -> bool:
         """Guarda o actualiza el tipo de cambio para una fecha."""
         self.db.execute("""
             INSERT INTO tipo_cambio (fecha, compra, venta) VALUES (?, ?, ?)
             ON CONFLICT (fecha) DO UPDATE SET compra = ?, venta = ?
         """, [fecha, compra, venta, compra, venta])
+        get_versiones().registrar_cambio_tipo_cambio()
         return True
@@ -0,0 +1,228 @@
+"""
+ConSmart - Repositorio de Estadísticas de Montos
+================================================
+Media y varianza acumuladas de los montos por hoja, categoría y sentido.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional
+
+from src.database.connection import (
+    get_db, SQL_ESTADISTICAS_MONTOS, SQL_POBLAR_ESTADISTICAS_MONTOS,
+)
+
+
+def _sumar(estado: tuple, monto: float, signo: int) -> tuple:
+    """
+    Agrega (signo +1) o quita (signo -1) un monto con el método de Welford.
+    
+    El estado es (n, media, m2), con m2 la suma de los cuadrados de las
+    desviaciones. Quitar es la operación inversa de agregar, así que una
+    edición se aplica como quitar el monto anterior y agregar el nuevo.
+    """
+    n, media, m2 = estado
+    if signo > 0:
+        n += 1
+        delta = monto - media
+        media += delta / n
+        m2 += delta * (monto - media)
+    else:
+        if n <= 1:
+            return (0, 0.0, 0.0)
+        n -= 1
+        delta = monto - media
+        media -= delta / n
+        m2 -= delta * (monto - media)
+    return (n, media, max(m2, 0.0))
+
+
+class EstadisticaMontoRepository:
+    """
+    Mantiene la tabla estadisticas_montos y su copia en memoria.
+    
+    MovimientoRepository aplica cada alta, edición o baja en la misma
+    transacción que el movimiento (como con agg_mensual). La copia en
+    memoria es compartida por todas las instancias y se actualiza al
+    confirmar la transacción, todavía bajo el lock de escritura: los
+    nuevos estados se calculan desde la copia, así que otra transacción no
+    debe leerla antes de que refleje lo confirmado. Puntuar un monto es
+    una búsqueda en un dict, sin consultar la historia.
+    """
+    
+    # Movimientos mínimos del grupo para puntuar
+    MIN_BASE = 5
+    
+    _cache: Optional[Dict[tuple, tuple]] = None
+    _lock = threading.Lock()
+    
+    def __init__(self):
+        self.db = get_db()
+    
+    @staticmethod
+    def _clave(hoja_id: int, categoria_id: Optional[int], ingreso: float) -> tuple:
+        """Clave del grupo de un movimiento (sin categoría = 0)."""
+        return (hoja_id, categoria_id or 0, float(ingreso or 0) > 0)
+    
+    def _estados(self) -> Dict[tuple, tuple]:
+        """Copia en memoria de la tabla (se carga en el primer uso)."""
+        cls = type(self)
+        with cls._lock:
+            if cls._cache is None:
+                filas = self.db.fetchall(
+                    "SELECT hoja_id, categoria_id, es_ingreso, n, media, m2 FROM estadisticas_montos"
+                )
+                cls._cache = {
+                    (hoja_id, categoria_id, es_ingreso): (n, media, m2)
+                    for hoja_id, categoria_id, es_ingreso, n, media, m2 in filas
+                }
+            return cls._cache
+    
+    def aplicar_cambios(self, cambios: List[tuple]) -> Dict[tuple, tuple]:
+        """
+        Suma o resta movimientos de las estadísticas en la base.
+        
+        Debe llamarse dentro de db.transaccion(): la copia en memoria se
+        actualiza (confirmar) al confirmarse la transacción, y no cambia si
+        se descarta.
+        
+        Args:
+            cambios: Tuplas (hoja_id, local_id, categoria_id, fecha, ingreso,
+                egreso, signo), las mismas que AgregadoMensualRepository
+        
+        Returns:
+            Nuevo estado (n, media, m2) de cada grupo modificado
+        """
+        if not cambios:
+            return {}
+        
+        actuales = self._estados()
+        estados = {}
+        for hoja_id, _, categoria_id, _, ingreso, egreso, signo in cambios:
+            clave = self._clave(hoja_id, categoria_id, ingreso)
+            estado = estados.get(clave) or actuales.get(clave, (0, 0.0, 0.0))
+            estados[clave] = _sumar(estado, float(ingreso) + float(egreso), signo)
+        
+        vigentes = [clave + estado for clave, estado in estados.items() if estado[0] > 0]
+        if vigentes:
+            valores = ", ".join(
+                ["(?::INTEGER, ?::INTEGER, ?::BOOLEAN, ?::BIGINT, ?::DOUBLE, ?::DOUBLE)"]
+                * len(vigentes)
+            )
+            self.db.execute(f"""
+                INSERT INTO estadisticas_montos (hoja_id, categoria_id, es_ingreso, n, media, m2)
+                VALUES {valores}
+                ON CONFLICT (hoja_id, categoria_id, es_ingreso) DO UPDATE SET
+                    n = EXCLUDED.n,
+                    media = EXCLUDED.media,
+                    m2 = EXCLUDED.m2
+            """, [valor for fila in vigentes for valor in fila])
+        
+        for clave, estado in estados.items():
+            if estado[0] == 0:
+                self.db.execute(
+                    "DELETE FROM estadisticas_montos "
+                    "WHERE hoja_id = ? AND categoria_id = ? AND es_ingreso = ?",
+                    list(clave)
+                )
+        
+        self.db.al_confirmar(lambda: self.confirmar(estados))
+        return estados
+    
+    def confirmar(self, estados: Dict[tuple, tuple]):
+        """Pasa a la copia en memoria los estados ya guardados."""
+        if not estados:
+            return
+        cache = self._estados()
+        with self._lock:
+            for clave, estado in estados.items():
+                if estado[0] > 0:
+                    cache[clave] = estado
+                else:
+                    cache.pop(clave, None)
+    
+    def _invalidar(self):
+        """Descarta la copia en memoria; se recarga en el próximo uso."""
+        with self._lock:
+            type(self)._cache = None
+    
+    def reconstruir(self) -> int:
+        """
+        Recalcula estadisticas_montos completa desde movimientos.
+        
+        Returns:
+            Cantidad de grupos (hoja, categoría, sentido)
+        """
+        with self.db.transaccion():
+            self.db.execute("DELETE FROM estadisticas_montos")
+            self.db.execute(SQL_POBLAR_ESTADISTICAS_MONTOS)
+            self.db.al_confirmar(self._invalidar)
+        
+        return int(self.db.fetchone("SELECT COUNT(*) FROM estadisticas_montos")[0])
+    
+    def verificar(self, tolerancia: float = 1e-6) -> List[tuple]:
+        """
+        Compara estadisticas_montos (y la copia en memoria) con los movimientos.
+        
+        Args:
+            tolerancia: Diferencia relativa admitida en media y m2, que se
+                acumulan en punto flotante
+        
+        Returns:
+            Claves (hoja_id, categoria_id, es_ingreso) con diferencias
+        """
+        diferentes = self.db.fetchall(f"""
+            WITH esperado AS ({SQL_ESTADISTICAS_MONTOS})
+            SELECT COALESCE(e.hoja_id, s.hoja_id), COALESCE(e.categoria_id, s.categoria_id),
+                   COALESCE(e.es_ingreso, s.es_ingreso)
+            FROM esperado e
+            FULL OUTER JOIN estadisticas_montos s USING (hoja_id, categoria_id, es_ingreso)
+            WHERE e.n IS DISTINCT FROM s.n
+               OR abs(e.media - s.media) > ? * greatest(1, abs(e.media))
+               OR abs(e.m2 - s.m2) > ? * greatest(1, abs(e.m2))
+            ORDER BY 1, 2, 3
+        """, [tolerancia, tolerancia])
+        
+        tabla = {
+            (hoja_id, categoria_id, es_ingreso): (n, media, m2)
+            for hoja_id, categoria_id, es_ingreso, n, media, m2 in self.db.fetchall(
+                "SELECT hoja_id, categoria_id, es_ingreso, n, media, m2 FROM estadisticas_montos"
+            )
+        }
+        cache = dict(self._estados())
+        for clave in sorted(set(tabla) | set(cache)):
+            if tabla.get(clave) != cache.get(clave) and clave not in diferentes:
+                diferentes.append(clave)
+        return diferentes
+    
+    def puntuar(self, hoja_id: int, categoria_id: Optional[int],
+                ingreso: float, egreso: float) -> Optional[Dict]:
+        """
+        Puntaje z de un monto frente a los movimientos de su grupo.
+        
+        Args:
+            hoja_id: Hoja del movimiento
+            categoria_id: Categoría (None = sin categoría)
+            ingreso: Monto de ingreso
+            egreso: Monto de egreso
+        
+        Returns:
+            Dict con n, media, desviacion y z; None si el grupo tiene menos
+            de MIN_BASE movimientos o todos sus montos son iguales
+        """
+        estado = self._estados().get(self._clave(hoja_id, categoria_id, ingreso))
+        if estado is None or estado[0] < self.MIN_BASE:
+            return None
+        
+        n, media, m2 = estado
+        desviacion = math.sqrt(m2 / (n - 1))
+        if desviacion == 0:
+            return None
+        
+        monto = float(ingreso or 0) + float(egreso or 0)
+        return {
+            "n": n,
+            "media": media,
+            "desviacion": desviacion,
+            "z": (monto - media) / desviacion,
+        }
@@ -5,10 +5,17 @@ CRUD y consultas para la tabla de movimientos.
 """
 
 from datetime import date
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 
 from src.database.connection import get_db
+from src.database.versiones import get_versiones
+from .agregado_repo import AgregadoMensualRepository
+from .estadistica_repo import EstadisticaMontoRepository
+
+
+# Columnas que identifican y suman un movimiento en agg_mensual
+COLUMNAS_AGREGADO = "hoja_id, local_id, categoria_id, fecha, ingreso, egreso"
 
 
 class MovimientoRepository:
@@ -16,6 +23,8 @@ class MovimientoRepository:
     
     def __init__(self):
         self.db = get_db()
+        self.agregados = AgregadoMensualRepository()
+        self.estadisticas = EstadisticaMontoRepository()
     
     def crear(self, datos: dict) -> int:
         """
@@ -23,38 +32,161 @@ class MovimientoRepository:
         
         Args:
             datos: Diccionario con los campos del movimiento
-            
+        
         Returns:
             ID del movimiento creado
         """
+        creados, _ = self.crear_lote([datos])
+        return creados[0]
+    
+    def crear_lote(self, lista: List[dict],
+                   verificar_duplicados: bool = False) -> Tuple[Dict[int, int], Dict[int, List[dict]]]:
+        """
+        Crea varios movimientos en una sola transacción.
+        
+        Con verificar_duplicados, el lote se compara con los movimientos ya
+        guardados (ver buscar_duplicados) dentro de la misma transacción y
+        bajo el lock de escritura: dos usuarios que guardan el mismo
+        movimiento a la vez no pueden registrarlo ambos. Los posibles
+        duplicados no se guardan, salvo los que traen 'permitir_duplicado'.
+        
+        Args:
+            lista: Diccionarios con los campos de cada movimiento
+            verificar_duplicados: Omitir los que parecen ya registrados
+        
+        Returns:
+            Tupla (creados, duplicados) por posición en lista: el ID de cada
+            movimiento creado y los movimientos existentes que coinciden con
+            cada posición omitida
+        """
+        if not lista:
+            return ({}, {})
+        
         query = """
             INSERT INTO movimientos 
-            (fecha, hoja_id, local_id, categoria_id, num_documento, 
+            (id, fecha, hoja_id, local_id, categoria_id, num_documento, 
              responsable, descripcion, ingreso, egreso, created_by)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            RETURNING id
+            VALUES {valores}
+            RETURNING {columnas}
+        """
+        
+        # Los movimientos y su aporte a agg_mensual y estadisticas_montos
+        # se escriben juntos
+        with self.db.transaccion():
+            duplicados = {}
+            if verificar_duplicados:
+                por_verificar = [i for i, datos in enumerate(lista)
+                                 if not datos.get('permitir_duplicado')]
+                encontrados = self.buscar_duplicados([lista[i] for i in por_verificar])
+                duplicados = {por_verificar[j]: existentes for j, existentes in encontrados.items()}
+            
+            posiciones = [i for i in range(len(lista)) if i not in duplicados]
+            if not posiciones:
+                return ({}, duplicados)
+            
+            # Los ids se reservan antes de insertar y se asignan por posición:
+            # ni RETURNING ni la secuencia garantizan el orden de VALUES
+            ids = sorted(
+                fila[0] for fila in self.db.fetchall(
+                    "SELECT nextval('seq_movimiento_id') FROM range(?)", [len(posiciones)]
+                )
+            )
+            creados = dict(zip(posiciones, ids))
+            
+            params = []
+            for i in posiciones:
+                datos = lista[i]
+                params.extend([
+                    creados[i],
+                    datos.get('fecha', date.today()),
+                    datos.get('hoja_id'),
+                    datos.get('local_id'),
+                    datos.get('categoria_id'),
+                    datos.get('num_documento', ''),
+                    datos.get('responsable', ''),
+                    datos.get('descripcion', ''),
+                    float(datos.get('ingreso', 0)),
+                    float(datos.get('egreso', 0)),
+                    datos.get('created_by', 'sistema'),
+                ])
+            
+            insertados = self.db.fetchall(query.format(
+                valores=", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(posiciones)),
+                columnas=COLUMNAS_AGREGADO,
+            ), params)
+            cambios = [fila + (1,) for fila in insertados]
+            self.agregados.aplicar_cambios(cambios)
+            self.estadisticas.aplicar_cambios(cambios)
+        
+        get_versiones().registrar_cambio_movimientos(*[fila[0] for fila in insertados])
+        
+        # Actualizar descripciones favoritas de las que tienen texto
+        for i in posiciones:
+            if lista[i].get('descripcion'):
+                self._actualizar_descripcion_favorita(lista[i]['descripcion'])
+        
+        return (creados, duplicados)
+    
+    def buscar_duplicados(self, lista: List[dict]) -> Dict[int, List[dict]]:
+        """
+        Busca movimientos ya guardados iguales a los de un lote.
+        
+        Un movimiento es posible duplicado si coincide en hoja, fecha,
+        ingreso, egreso y número de documento. Todo el lote se compara con
+        una sola consulta (hash join con el lote); el rango de hojas y
+        fechas del lote acota la lectura de movimientos, así el costo no
+        crece con la historia.
+        
+        Args:
+            lista: Diccionarios con los campos de cada movimiento
+        
+        Returns:
+            Dict posición en lista -> movimientos existentes que coinciden
         """
+        lote = [
+            (i, datos.get('hoja_id'), datos.get('fecha', date.today()),
+             float(datos.get('ingreso', 0)), float(datos.get('egreso', 0)),
+             (datos.get('num_documento') or '').strip())
+            for i, datos in enumerate(lista)
+            if datos.get('hoja_id')
+        ]
+        if not lote:
+            return {}
+        
+        valores = ", ".join(
+            ["(?::INTEGER, ?::INTEGER, ?::DATE, ?::DECIMAL(15,2), ?::DECIMAL(15,2), ?::VARCHAR)"]
+            * len(lote)
+        )
+        hoja_ids = sorted({fila[1] for fila in lote})
         
-        result = self.db.execute(query, [
-            datos.get('fecha', date.today()),
-            datos.get('hoja_id'),
-            datos.get('local_id'),
-            datos.get('categoria_id'),
-            datos.get('num_documento', ''),
-            datos.get('responsable', ''),
-            datos.get('descripcion', ''),
-            float(datos.get('ingreso', 0)),
-            float(datos.get('egreso', 0)),
-            datos.get('created_by', 'sistema'),
-        ])
-        
-        nuevo_id = result.fetchone()[0]
-        
-        # Actualizar descripción favorita si tiene texto
-        if datos.get('descripcion'):
-            self._actualizar_descripcion_favorita(datos['descripcion'])
-        
-        return nuevo_id
+        query = f"""
+            WITH lote AS (
+                SELECT * FROM (VALUES {valores})
+                    AS l(posicion, hoja_id, fecha, ingreso, egreso, num_documento)
+            )
+            SELECT l.posicion, m.id, m.fecha, m.ingreso, m.egreso,
+                   m.num_documento, m.descripcion, m.created_by, m.created_at
+            FROM movimientos m
+            JOIN lote l
+                ON m.hoja_id = l.hoja_id
+                AND m.fecha = l.fecha
+                AND m.ingreso = l.ingreso
+                AND m.egreso = l.egreso
+                AND COALESCE(trim(m.num_documento), '') = l.num_documento
+            WHERE m.hoja_id IN ({', '.join('?' * len(hoja_ids))})
+              AND m.fecha BETWEEN (SELECT MIN(fecha) FROM lote) AND (SELECT MAX(fecha) FROM lote)
+            ORDER BY l.posicion, m.id
+        """
+        params = [valor for fila in lote for valor in fila] + hoja_ids
+        
+        result = self.db.execute(query, params)
+        columnas = [d[0] for d in result.description]
+        
+        duplicados: Dict[int, List[dict]] = {}
+        for fila in result.fetchall():
+            existente = dict(zip(columnas, fila))
+            duplicados.setdefault(existente.pop('posicion'), []).append(existente)
+        return duplicados
     
     def obtener_por_id(self, movimiento_id: int) -> Optional[dict]:
         """Obtiene un movimiento por su ID."""
@@ -87,7 +219,7 @@ class MovimientoRepository:
             hoja_id: ID de la hoja/cuenta
             fecha_inicio: Filtro opcional de fecha inicio
             fecha_fin: Filtro opcional de fecha fin
-            
+        
         Returns:
             DataFrame con movimientos y saldo acumulado
         """
@@ -131,9 +263,14 @@ class MovimientoRepository:
                                     local_id: int = None,
                                     fecha_inicio: date = None,
                                     fecha_fin: date = None,
-                                    texto_busqueda: str = None) -> pd.DataFrame:
+                                    texto_busqueda: str = None,
+                                    cursor=None) -> pd.DataFrame:
         """
         Obtiene el historial con múltiples filtros opcionales.
+        
+        Args:
+            cursor: Cursor opcional (ver DatabaseConnection.cursor) para
+                    ejecutar la consulta fuera de la conexión principal
         """
         query = """
             SELECT 
@@ -158,6 +295,81 @@ class MovimientoRepository:
             WHERE 1=1
         """
         
+        condiciones, params = self._condiciones_filtro(
+            hoja_id, local_id, fecha_inicio, fecha_fin, texto_busqueda
+        )
+        query += condiciones
+        
+        query += " ORDER BY m.fecha DESC, m.id DESC"
+        
+        if cursor is not None:
+            return cursor.execute(query, params).df()
+        return self.db.fetchdf(query, params)
+    
+    def obtener_resumen_filtrado(self, hoja_id: int = None,
+                                  local_id: int = None,
+                                  fecha_inicio: date = None,
+                                  fecha_fin: date = None,
+                                  texto_busqueda: str = None,
+                                  cursor=None) -> dict:
+        """
+        Obtiene totales del historial filtrado con una sola consulta agregada.
+        
+        Usa los mismos filtros que obtener_historial_filtrado, sin traer filas.
+        Sin búsqueda de texto, los meses completos del rango se leen de agg_mensual.
+        
+        Returns:
+            Dict con total_ingresos, total_egresos, balance y num_movimientos
+        """
+        if not texto_busqueda:
+            return self.agregados.obtener_resumen(
+                hoja_id=hoja_id,
+                local_id=local_id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                cursor=cursor,
+            )
+        
+        query = """
+            SELECT 
+                COALESCE(SUM(m.ingreso), 0) as total_ingresos,
+                COALESCE(SUM(m.egreso), 0) as total_egresos,
+                COUNT(*) as num_movimientos
+            FROM movimientos m
+            WHERE 1=1
+        """
+        
+        condiciones, params = self._condiciones_filtro(
+            hoja_id, local_id, fecha_inicio, fecha_fin, texto_busqueda
+        )
+        query += condiciones
+        
+        if cursor is not None:
+            result = cursor.execute(query, params).fetchone()
+        else:
+            result = self.db.fetchone(query, params)
+        
+        total_ingresos = float(result[0])
+        total_egresos = float(result[1])
+        return {
+            "total_ingresos": total_ingresos,
+            "total_egresos": total_egresos,
+            "balance": total_ingresos - total_egresos,
+            "num_movimientos": int(result[2]),
+        }
+    
+    def _condiciones_filtro(self, hoja_id: int = None,
+                            local_id: int = None,
+                            fecha_inicio: date = None,
+                            fecha_fin: date = None,
+                            texto_busqueda: str = None) -> tuple:
+        """
+        Construye las condiciones WHERE compartidas por las consultas filtradas.
+        
+        Returns:
+            Tupla (sql_condiciones, parametros)
+        """
+        query = ""
         params = []
         
         if hoja_id:
@@ -180,9 +392,7 @@ class MovimientoRepository:
             query += " AND LOWER(m.descripcion) LIKE ?"
             params.append(f"%{texto_busqueda.lower()}%")
         
-        query += " ORDER BY m.fecha DESC, m.id DESC"
-        
-        return self.db.fetchdf(query, params)
+        return query, params
     
     def contar_movimientos_por_fecha(self, fecha: date) -> int:
         """Cuenta los movimientos de una fecha específica."""
@@ -192,15 +402,14 @@ class MovimientoRepository:
         result = self.db.fetchone(query, [fecha])
         return int(result[0]) if result else 0
     
-    def obtener_saldo_actual(self, hoja_id: int) -> float:
-        """Calcula el saldo actual de una hoja."""
-        query = """
-            SELECT COALESCE(SUM(ingreso - egreso), 0) as saldo
-            FROM movimientos
-            WHERE hoja_id = ?
+    def obtener_saldo_actual(self, hoja_id: int, cursor=None) -> float:
         """
-        result = self.db.fetchone(query, [hoja_id])
-        return float(result[0]) if result else 0.0
+        Calcula el saldo actual de una hoja sumando sus meses en agg_mensual.
+        
+        Args:
+            cursor: Cursor opcional para ejecutar desde otro hilo
+        """
+        return self.agregados.obtener_saldo(hoja_id, cursor=cursor)
     
     def obtener_resumen_por_local(self, hoja_id: int, 
                                    fecha_inicio: date = None,
@@ -255,15 +464,39 @@ class MovimientoRepository:
             UPDATE movimientos 
             SET {', '.join(campos)}
             WHERE id = ?
+            RETURNING {COLUMNAS_AGREGADO}
         """
         
-        self.db.execute(query, valores)
+        with self.db.transaccion():
+            # Valores anteriores: se restan de su mes (y hoja, si cambia de cuenta)
+            anterior = self.db.fetchone(
+                f"SELECT {COLUMNAS_AGREGADO} FROM movimientos WHERE id = ?", [movimiento_id]
+            )
+            nuevo = self.db.fetchone(query, valores)
+            if anterior and nuevo:
+                cambios = [anterior + (-1,), nuevo + (1,)]
+                self.agregados.aplicar_cambios(cambios)
+                self.estadisticas.aplicar_cambios(cambios)
+        
+        get_versiones().registrar_cambio_movimientos(
+            anterior[0] if anterior else None, datos.get('hoja_id')
+        )
         return True
     
     def eliminar(self, movimiento_id: int) -> bool:
         """Elimina un movimiento (soft delete recomendado en producción)."""
         # Por ahora hacemos hard delete
-        self.db.execute("DELETE FROM movimientos WHERE id = ?", [movimiento_id])
+        with self.db.transaccion():
+            eliminado = self.db.fetchone(
+                f"DELETE FROM movimientos WHERE id = ? RETURNING {COLUMNAS_AGREGADO}",
+                [movimiento_id]
+            )
+            if eliminado:
+                cambios = [eliminado + (-1,)]
+                self.agregados.aplicar_cambios(cambios)
+                self.estadisticas.aplicar_cambios(cambios)
+        
+        get_versiones().registrar_cambio_movimientos(eliminado[0] if eliminado else None)
         return True
     
     def _actualizar_descripcion_favorita(self, texto: str):
@@ -0,0 +1,317 @@
+"""
+ConSmart - Repositorio de Reportes
+==================================
+Consultas agregadas de solo lectura: consolidación multimoneda y reportes.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from src.database.connection import get_db
+from .agregado_repo import AgregadoMensualRepository
+
+
+class ReporteRepository:
+    """Consultas agregadas sobre movimientos para reportes."""
+    
+    # Granularidad de período -> unidad de date_trunc
+    PERIODOS = {"dia": "day", "mes": "month", "trimestre": "quarter", "año": "year"}
+    
+    # Dimensión -> columnas (id, nombre) en la consulta
+    DIMENSIONES = {
+        "hoja": ("mov.hoja_id", "h.nombre"),
+        "local": ("mov.local_id", "l.nombre"),
+    }
+    
+    # Tipo de cambio a usar: compra o venta de la tabla tipo_cambio
+    TASAS = ("compra", "venta")
+    
+    MONEDA_BASE = "PEN"
+    
+    # Valor de GROUPING(local_id, categoria_id, periodo) -> nivel de la fila
+    NIVELES_RESULTADOS = {
+        0: "detalle",        # local, categoría y período
+        1: "categoria",      # local y categoría, todos los períodos
+        2: "local_periodo",  # subtotal del local en el período
+        3: "local",          # subtotal del local
+        6: "periodo",        # total del período, todos los locales
+        7: "total",          # total general
+    }
+    
+    def __init__(self):
+        self.db = get_db()
+        self.agregados = AgregadoMensualRepository()
+    
+    def obtener_consolidado(self, agrupar_por: Iterable[str] = ("hoja", "periodo"),
+                            periodo: str = "mes",
+                            fecha_inicio: date = None,
+                            fecha_fin: date = None,
+                            hoja_ids: List[int] = None,
+                            tasa: str = "compra",
+                            cursor=None) -> pd.DataFrame:
+        """
+        Totales de movimientos convertidos a soles con el tipo de cambio de su fecha.
+        
+        Cada movimiento en moneda extranjera se une con ASOF JOIN al último
+        tipo de cambio registrado en o antes de su fecha (un día sin registro
+        usa el anterior). Los movimientos anteriores al primer tipo de cambio
+        no se pueden convertir: se cuentan en sin_tipo_cambio y no suman.
+        
+        Salvo por día, las hojas en moneda base se leen de agg_mensual; las
+        de moneda extranjera siempre por día, para usar la tasa de cada fecha.
+        
+        Args:
+            agrupar_por: Dimensiones entre 'hoja', 'local' y 'periodo'
+            periodo: Granularidad ('dia', 'mes', 'trimestre', 'año')
+            hoja_ids: Limitar a estas hojas (todas si es None)
+            tasa: 'compra' o 'venta'
+            cursor: Cursor opcional para ejecutar fuera de la conexión principal
+        
+        Returns:
+            DataFrame con las dimensiones pedidas y las columnas ingreso_pen,
+            egreso_pen, neto_pen, num_movimientos y sin_tipo_cambio. Si se agrupa
+            por hoja incluye además moneda, ingreso y egreso en moneda original.
+        """
+        agrupar_por = list(agrupar_por)
+        self._validar(agrupar_por, periodo, tasa)
+        
+        columnas = []
+        grupos = []
+        if "periodo" in agrupar_por:
+            columnas.append(f"date_trunc('{self.PERIODOS[periodo]}', mov.fecha)::DATE AS periodo")
+            grupos.append("1")
+        for dimension in ("hoja", "local"):
+            if dimension in agrupar_por:
+                col_id, col_nombre = self.DIMENSIONES[dimension]
+                columnas += [f"{col_id} AS {dimension}_id", f"{col_nombre} AS {dimension}"]
+                grupos += [col_id, col_nombre]
+        if "hoja" in agrupar_por:
+            columnas += [
+                "mov.moneda",
+                "SUM(mov.ingreso) AS ingreso",
+                "SUM(mov.egreso) AS egreso",
+            ]
+            grupos.append("mov.moneda")
+        
+        origen, params = self._origen(fecha_inicio, fecha_fin, hoja_ids,
+                                      mensual=periodo != "dia" or "periodo" not in agrupar_por)
+        factor = self._factor(tasa)
+        query = f"""
+            WITH mov AS ({origen})
+            SELECT
+                {", ".join(columnas + [""])}
+                COALESCE(SUM(mov.ingreso * {factor}), 0)::DOUBLE AS ingreso_pen,
+                COALESCE(SUM(mov.egreso * {factor}), 0)::DOUBLE AS egreso_pen,
+                COALESCE(SUM((mov.ingreso - mov.egreso) * {factor}), 0)::DOUBLE AS neto_pen,
+                COALESCE(SUM(mov.n), 0)::BIGINT AS num_movimientos,
+                COALESCE(SUM(mov.n) FILTER (WHERE {factor} IS NULL), 0)::BIGINT AS sin_tipo_cambio
+            FROM mov
+            ASOF LEFT JOIN tipo_cambio tc ON mov.fecha >= tc.fecha
+            LEFT JOIN hojas h ON mov.hoja_id = h.id
+            LEFT JOIN locales l ON mov.local_id = l.id
+        """
+        if grupos:
+            query += f" GROUP BY {', '.join(grupos)} ORDER BY {', '.join(grupos)}"
+        
+        if cursor is not None:
+            return cursor.execute(query, params).df()
+        return self.db.fetchdf(query, params)
+    
+    def obtener_estado_resultados(self, fecha_inicio: date = None,
+                                  fecha_fin: date = None,
+                                  periodo: str = "mes",
+                                  hoja_ids: List[int] = None,
+                                  local_ids: List[int] = None,
+                                  tasa: str = "compra") -> Dict[str, np.ndarray]:
+        """
+        Estado de resultados por local × categoría × período con subtotales.
+        
+        Una sola consulta con GROUP BY GROUPING SETS arma el detalle y los
+        subtotales por categoría, por local y por período, y el total general.
+        Los montos en moneda extranjera se convierten a soles y los meses
+        completos se leen de agg_mensual, igual que en obtener_consolidado.
+        
+        Args:
+            periodo: Granularidad ('dia', 'mes', 'trimestre', 'año')
+            hoja_ids: Limitar a estas hojas (todas si es None)
+            local_ids: Limitar a estos locales (todos si es None)
+            tasa: 'compra' o 'venta'
+        
+        Returns:
+            Columnas como arreglos de NumPy: nivel, periodo, local_id, local,
+            categoria_id, categoria, ingreso, egreso, neto, num_movimientos y
+            sin_tipo_cambio. En las filas de subtotal las dimensiones
+            agregadas vienen nulas.
+        """
+        self._validar([], periodo, tasa)
+        origen, params = self._origen(fecha_inicio, fecha_fin, hoja_ids, local_ids,
+                                      mensual=periodo != "dia")
+        factor = self._factor(tasa)
+        
+        niveles = " ".join(
+            f"WHEN {grupo} THEN '{nivel}'" for grupo, nivel in self.NIVELES_RESULTADOS.items()
+        )
+        query = f"""
+            WITH mov AS (
+                SELECT date_trunc('{self.PERIODOS[periodo]}', o.fecha)::DATE AS periodo, o.*
+                FROM ({origen}) o
+            ),
+            agregado AS (
+                SELECT
+                    GROUPING(mov.local_id, mov.categoria_id, mov.periodo) AS grupo,
+                    mov.periodo, mov.local_id, mov.categoria_id,
+                    COALESCE(SUM(mov.ingreso * {factor}), 0)::DOUBLE AS ingreso,
+                    COALESCE(SUM(mov.egreso * {factor}), 0)::DOUBLE AS egreso,
+                    COALESCE(SUM(mov.n), 0)::BIGINT AS num_movimientos,
+                    COALESCE(SUM(mov.n) FILTER (WHERE {factor} IS NULL), 0)::BIGINT
+                        AS sin_tipo_cambio
+                FROM mov
+                ASOF LEFT JOIN tipo_cambio tc ON mov.fecha >= tc.fecha
+                GROUP BY GROUPING SETS (
+                    (mov.local_id, mov.categoria_id, mov.periodo),
+                    (mov.local_id, mov.categoria_id),
+                    (mov.local_id, mov.periodo),
+                    (mov.local_id),
+                    (mov.periodo),
+                    ()
+                )
+            )
+            SELECT
+                CASE a.grupo {niveles} END AS nivel,
+                a.periodo,
+                a.local_id,
+                l.nombre AS local,
+                a.categoria_id,
+                c.nombre AS categoria,
+                a.ingreso,
+                a.egreso,
+                a.ingreso - a.egreso AS neto,
+                a.num_movimientos,
+                a.sin_tipo_cambio
+            FROM agregado a
+            LEFT JOIN locales l ON a.local_id = l.id
+            LEFT JOIN categorias c ON a.categoria_id = c.id
+            ORDER BY (a.grupo & 4) <> 0, l.nombre, (a.grupo & 2) <> 0, c.nombre,
+                     a.periodo NULLS LAST
+        """
+        return self.db.fetchnumpy(query, params)
+    
+    def obtener_flujos_diarios(self, fecha_inicio: date, fecha_fin: date,
+                               hoja_ids: List[int] = None,
+                               cursor=None) -> Dict[str, np.ndarray]:
+        """
+        Flujo neto (ingreso - egreso) por hoja y día, en moneda de cada hoja.
+        
+        Solo incluye los días con movimientos.
+        
+        Returns:
+            Columnas hoja_id, fecha y neto como arreglos de NumPy
+        """
+        query = """
+            SELECT m.hoja_id, m.fecha, SUM(m.ingreso - m.egreso)::DOUBLE AS neto
+            FROM movimientos m
+            WHERE m.fecha >= ? AND m.fecha <= ?
+        """
+        params = [fecha_inicio, fecha_fin]
+        if hoja_ids:
+            query += f" AND m.hoja_id IN ({', '.join('?' * len(hoja_ids))})"
+            params.extend(hoja_ids)
+        query += " GROUP BY m.hoja_id, m.fecha"
+        
+        if cursor is not None:
+            return cursor.execute(query, params).fetchnumpy()
+        return self.db.fetchnumpy(query, params)
+    
+    def obtener_saldos_consolidados(self, fecha: date = None,
+                                    tasa: str = "compra") -> pd.DataFrame:
+        """
+        Saldo de cada hoja activa a una fecha, convertido a soles.
+        
+        Usa el último tipo de cambio registrado en o antes de la fecha; los
+        meses completos se suman desde agg_mensual.
+        
+        Returns:
+            DataFrame con hoja_id, hoja, moneda, saldo, fecha_tipo_cambio,
+            tipo_cambio y saldo_pen (nulo si falta el tipo de cambio)
+        """
+        self._validar([], "mes", tasa)
+        fecha = fecha or date.today()
+        
+        origen, params = self.agregados.origen_movimientos(fecha_fin=fecha)
+        query = f"""
+            WITH mov AS ({origen}),
+            saldos AS (
+                SELECT
+                    h.id AS hoja_id,
+                    h.nombre AS hoja,
+                    h.moneda,
+                    COALESCE(SUM(mov.ingreso - mov.egreso), 0)::DOUBLE AS saldo
+                FROM hojas h
+                LEFT JOIN mov ON mov.hoja_id = h.id
+                WHERE h.activo = TRUE
+                GROUP BY h.id, h.nombre, h.moneda
+            ),
+            tc AS (
+                SELECT fecha, {tasa}::DOUBLE AS tasa
+                FROM tipo_cambio
+                WHERE fecha <= ?
+                ORDER BY fecha DESC
+                LIMIT 1
+            )
+            SELECT
+                s.*,
+                tc.fecha AS fecha_tipo_cambio,
+                tc.tasa AS tipo_cambio,
+                CASE WHEN s.moneda = '{self.MONEDA_BASE}' THEN s.saldo
+                     ELSE s.saldo * tc.tasa END AS saldo_pen
+            FROM saldos s
+            LEFT JOIN tc ON TRUE
+            ORDER BY s.hoja
+        """
+        return self.db.fetchdf(query, params + [fecha])
+    
+    def _validar(self, agrupar_por: List[str], periodo: str, tasa: str):
+        """Valida los parámetros que se interpolan en el SQL."""
+        desconocidas = set(agrupar_por) - set(self.DIMENSIONES) - {"periodo"}
+        if desconocidas:
+            raise ValueError(f"Dimensiones no soportadas: {', '.join(sorted(desconocidas))}")
+        if periodo not in self.PERIODOS:
+            raise ValueError(f"Período no soportado: {periodo}")
+        if tasa not in self.TASAS:
+            raise ValueError(f"Tasa no soportada: {tasa}")
+    
+    def _factor(self, tasa: str) -> str:
+        """
+        Factor de conversión a soles de un movimiento del CTE mov.
+        
+        En moneda base es 1; en otra, la tasa del tipo de cambio unido con
+        ASOF JOIN (alias tc), nula si no hay tipo de cambio a esa fecha.
+        """
+        return f"CASE WHEN mov.moneda = '{self.MONEDA_BASE}' THEN 1 ELSE tc.{tasa} END"
+    
+    def _origen(self, fecha_inicio: Optional[date], fecha_fin: Optional[date],
+                hoja_ids: Optional[List[int]], local_ids: Optional[List[int]] = None,
+                mensual: bool = True) -> tuple:
+        """
+        Movimientos del rango con su moneda, para el CTE mov.
+        
+        Returns:
+            Tupla (sql, parametros) con las columnas de
+            AgregadoMensualRepository.origen_movimientos más moneda
+        """
+        origen, params = self.agregados.origen_movimientos(
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            hoja_ids=hoja_ids,
+            local_ids=local_ids,
+            moneda_mensual=self.MONEDA_BASE,
+            mensual=mensual,
+        )
+        query = f"""
+            SELECT o.*, h.moneda
+            FROM ({origen}) o
+            JOIN hojas h ON o.hoja_id = h.id
+        """
+        return query, params
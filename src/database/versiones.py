@@ -0,0 +1,88 @@
+"""
+ConSmart - Versiones de Datos
+=============================
+Contadores de cambio por tabla y por hoja para invalidar cachés.
+"""
+
+import threading
+from typing import Callable, Optional
+
+
+class VersionesDatos:
+    """
+    Singleton con la versión de cambio de cada conjunto de datos.
+    
+    Los repositorios incrementan la versión al escribir; los cachés y vistas
+    comparan versiones para saber si sus datos siguen vigentes.
+    """
+    
+    MOVIMIENTOS = "movimientos"
+    CONFIG = "config"
+    TIPO_CAMBIO = "tipo_cambio"
+    
+    _instance: Optional['VersionesDatos'] = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._versiones = {}
+            cls._instance._observers = []
+        return cls._instance
+    
+    def version(self, clave: str) -> int:
+        """Retorna la versión actual de una clave."""
+        return self._versiones.get(clave, 0)
+    
+    def version_movimientos(self, hoja_id: int = None) -> int:
+        """Versión de los movimientos de una hoja, o de todos si no se indica."""
+        if hoja_id:
+            return self.version(f"{self.MOVIMIENTOS}:{hoja_id}")
+        return self.version(self.MOVIMIENTOS)
+    
+    def incrementar(self, *claves: str):
+        """Marca como modificadas las claves indicadas."""
+        with self._lock:
+            for clave in claves:
+                self._versiones[clave] = self._versiones.get(clave, 0) + 1
+        
+        self._notificar_cambio(claves)
+    
+    def registrar_cambio_movimientos(self, *hoja_ids: int):
+        """Marca como modificados los movimientos (global y de cada hoja)."""
+        claves = [self.MOVIMIENTOS] + [
+            f"{self.MOVIMIENTOS}:{h}" for h in set(hoja_ids) if h
+        ]
+        self.incrementar(*claves)
+    
+    def registrar_cambio_config(self):
+        """Marca como modificada la configuración (hojas, locales, categorías)."""
+        self.incrementar(self.CONFIG)
+    
+    def registrar_cambio_tipo_cambio(self):
+        """Marca como modificada la tabla de tipos de cambio."""
+        self.incrementar(self.TIPO_CAMBIO)
+    
+    def agregar_observer(self, callback: Callable):
+        """Agrega un observer que recibe las claves modificadas."""
+        if callback not in self._observers:
+            self._observers.append(callback)
+    
+    def remover_observer(self, callback: Callable):
+        """Remueve un observer."""
+        if callback in self._observers:
+            self._observers.remove(callback)
+    
+    def _notificar_cambio(self, claves: tuple):
+        """Notifica a todos los observers del cambio."""
+        for callback in list(self._observers):
+            try:
+                callback(claves)
+            except Exception as e:
+                print(f"Error notificando observer: {e}")
+
+
+# Instancia global
+def get_versiones() -> VersionesDatos:
+    """Obtiene el registro de versiones de datos."""
+    return VersionesDatos()
@@ -1,11 +1,35 @@
 """
 Módulo de Lógica de Negocio de ConSmart
+
+Los servicios se importan en el primer uso (ver src.carga_diferida), para
+que el login no cargue pandas ni los servicios de movimientos.
 """
 
-from .validators import MovimientoValidator, ConfigValidator
-from .balance_utils import BalanceCalculator
-from .services import MovimientoService, ConfigService
-from .auth_service import AuthService, get_auth, SesionUsuario, Permisos
+from src.carga_diferida import exportar_bajo_demanda
+
+__getattr__ = exportar_bajo_demanda(__name__, {
+    "MovimientoValidator": ".validators",
+    "ConfigValidator": ".validators",
+    "BalanceCalculator": ".balance_utils",
+    "MovimientoService": ".services",
+    "ConfigService": ".services",
+    "AuthService": ".auth_service",
+    "get_auth": ".auth_service",
+    "SesionUsuario": ".auth_service",
+    "Permisos": ".auth_service",
+    "BusquedaEnVivo": ".busqueda",
+    "CacheResultados": ".cache",
+    "CargadorSaldos": ".carga_saldos",
+    "CatalogoNombres": ".pegado",
+    "preparar_pegado": ".pegado",
+    "ConsolidacionService": ".consolidacion",
+    "IndiceTipoCambio": ".tipo_cambio",
+    "get_indice_tipo_cambio": ".tipo_cambio",
+    "EstadoResultadosService": ".reportes",
+    "ProyeccionService": ".proyeccion",
+    "AnomaliaService": ".anomalias",
+    "ConciliacionService": ".conciliacion",
+})
 
 __all__ = [
     "MovimientoValidator",
@@ -17,4 +41,16 @@ __all__ = [
     "get_auth",
     "SesionUsuario",
     "Permisos",
+    "BusquedaEnVivo",
+    "CacheResultados",
+    "CargadorSaldos",
+    "CatalogoNombres",
+    "preparar_pegado",
+    "ConsolidacionService",
+    "IndiceTipoCambio",
+    "get_indice_tipo_cambio",
+    "EstadoResultadosService",
+    "ProyeccionService",
+    "AnomaliaService",
+    "ConciliacionService",
 ]
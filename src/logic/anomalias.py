@@ -0,0 +1,131 @@
+"""
+ConSmart - Detección de Anomalías
+=================================
+Marca movimientos inusuales respecto de su hoja, local y categoría.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional
+
+from src.database import AnomaliaRepository, EstadisticaMontoRepository, get_db
+
+
+class AnomaliaService:
+    """
+    Consulta y mantiene los puntajes de anomalía.
+    
+    Los puntajes se calculan para todas las cuentas de una vez
+    (AnomaliaRepository.recalcular) en el job nocturno
+    recalcular_anomalias.py; si no corrió, la app los recalcula en segundo
+    plano al iniciar sesión. Consultar anomalías es solo un filtro sobre la
+    tabla.
+    
+    Los movimientos aún no guardados se evalúan con evaluar_monto(), que
+    usa las estadísticas acumuladas en memoria (EstadisticaMontoRepository).
+    """
+    
+    # Puntaje z desde el que se advierte un monto antes de guardarlo
+    UMBRAL_INSERCION = 3.0
+    
+    # Compartidos entre instancias: un recálculo a la vez
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anomalias")
+    _en_curso: Optional[Future] = None
+    _lock = threading.Lock()
+    
+    def __init__(self):
+        self.db = get_db()
+        self.repo = AnomaliaRepository()
+        self.estadisticas = EstadisticaMontoRepository()
+    
+    def detectar(self, hoja_ids: List[int] = None,
+                 umbral: float = 3.5,
+                 metodo: str = "mad",
+                 fecha_inicio: date = None,
+                 limite: int = None) -> List[Dict]:
+        """
+        Movimientos inusualmente altos para su grupo.
+        
+        Args:
+            hoja_ids: Limitar a estas hojas (todas si es None)
+            umbral: Puntaje mínimo (3.5 es el corte habitual para MAD)
+            metodo: 'mad' (z robusto) o 'zscore'
+            fecha_inicio: Solo movimientos desde esta fecha
+            limite: Máximo de filas
+        
+        Returns:
+            Lista de movimientos con su puntaje, del más al menos anómalo
+        """
+        return self.repo.obtener(
+            hoja_ids=hoja_ids,
+            umbral=umbral,
+            metodo=metodo,
+            fecha_inicio=fecha_inicio,
+            limite=limite,
+        )
+    
+    def evaluar_monto(self, datos: dict, umbral: float = None) -> Optional[Dict]:
+        """
+        Indica si el monto de un movimiento por guardar es inusualmente alto.
+        
+        No consulta la base: compara con la media y desviación de su hoja,
+        categoría y sentido mantenidas al guardar cada movimiento.
+        
+        Args:
+            datos: Campos del movimiento (hoja_id, categoria_id, ingreso, egreso)
+            umbral: Puntaje z mínimo (UMBRAL_INSERCION si es None)
+        
+        Returns:
+            Dict con n, media, desviacion y z si supera el umbral, o None
+        """
+        if not datos.get('hoja_id'):
+            return None
+        
+        puntaje = self.estadisticas.puntuar(
+            datos['hoja_id'], datos.get('categoria_id'),
+            datos.get('ingreso', 0), datos.get('egreso', 0),
+        )
+        umbral = self.UMBRAL_INSERCION if umbral is None else umbral
+        if puntaje is None or puntaje['z'] < umbral:
+            return None
+        return puntaje
+    
+    def esta_vigente(self) -> bool:
+        """Indica si los puntajes ya se calcularon hoy."""
+        ultima = self.repo.ultima_actualizacion()
+        return ultima is not None and ultima.date() >= date.today()
+    
+    def actualizar(self, cursor=None, **kwargs) -> int:
+        """
+        Recalcula los puntajes de todas las cuentas.
+        
+        Returns:
+            Cantidad de movimientos puntuados
+        """
+        return self.repo.recalcular(cursor=cursor, **kwargs)
+    
+    def actualizar_si_vencido(self) -> Optional[Future]:
+        """
+        Recalcula en segundo plano si hoy no se calcularon los puntajes.
+        
+        Returns:
+            Future del recálculo, o None si estaban vigentes o ya hay uno en curso
+        """
+        with self._lock:
+            if self._en_curso is not None and not self._en_curso.done():
+                return None
+            if self.esta_vigente():
+                return None
+            type(self)._en_curso = self._executor.submit(self._actualizar_en_hilo)
+            return self._en_curso
+    
+    def _actualizar_en_hilo(self):
+        """Recalcula con un cursor propio, sin usar la conexión de la UI."""
+        cursor = self.db.cursor()
+        try:
+            self.actualizar(cursor=cursor)
+        except Exception as e:
+            print(f"Error recalculando anomalías: {e}")
+        finally:
+            cursor.close()
@@ -4,11 +4,14 @@ ConSmart - Utilidades de Cálculo de Saldos
 Funciones para cálculos contables y análisis de saldos.
 """
 
+from calendar import monthrange
 from datetime import date, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 
-from src.database import MovimientoRepository, ConfigRepository
+from src.database import MovimientoRepository, ConfigRepository, AgregadoMensualRepository
+from .anomalias import AnomaliaService
+from .proyeccion import ProyeccionService
 
 
 class BalanceCalculator:
@@ -17,27 +20,27 @@ class BalanceCalculator:
     def __init__(self):
         self.mov_repo = MovimientoRepository()
         self.config_repo = ConfigRepository()
+        self.agg_repo = AgregadoMensualRepository()
     
     def obtener_saldo_cuenta(self, hoja_id: int) -> float:
         """Obtiene el saldo actual de una cuenta/hoja."""
         return self.mov_repo.obtener_saldo_actual(hoja_id)
     
     def obtener_saldos_todas_cuentas(self) -> List[Dict]:
-        """Obtiene el saldo de todas las cuentas activas."""
+        """Obtiene el saldo de todas las cuentas activas (en una sola consulta)."""
         hojas = self.config_repo.obtener_hojas()
+        saldos = self.agg_repo.obtener_saldos([hoja['id'] for hoja in hojas])
         
-        saldos = []
-        for hoja in hojas:
-            saldo = self.mov_repo.obtener_saldo_actual(hoja['id'])
-            saldos.append({
+        return [
+            {
                 "id": hoja['id'],
                 "nombre": hoja['nombre'],
                 "tipo": hoja['tipo'],
                 "moneda": hoja['moneda'],
-                "saldo": saldo
-            })
-        
-        return saldos
+                "saldo": saldos[hoja['id']],
+            }
+            for hoja in hojas
+        ]
     
     def obtener_resumen_periodo(self, hoja_id: int, 
                                  fecha_inicio: date,
@@ -45,32 +48,71 @@ class BalanceCalculator:
         """
         Obtiene resumen de un período específico.
         
+        Los meses completos del período se leen de agg_mensual; solo los
+        días sueltos de los extremos recorren movimientos.
+        
         Returns:
-            Dict con total_ingresos, total_egresos, balance
+            Dict con total_ingresos, total_egresos, balance y num_movimientos
         """
-        df = self.mov_repo.obtener_historial_con_saldo(
-            hoja_id, fecha_inicio, fecha_fin
+        return self.agg_repo.obtener_resumen(
+            hoja_id=hoja_id, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin
         )
+    
+    def obtener_resumenes(self, hoja_ids: List[int],
+                          periodos: List[Tuple[date, date]]) -> Dict[int, List[Dict]]:
+        """
+        Resume varias hojas en varios períodos con una sola consulta.
         
-        if df.empty:
-            return {
-                "total_ingresos": 0,
-                "total_egresos": 0,
-                "balance": 0,
-                "num_movimientos": 0
+        Args:
+            hoja_ids: Hojas a resumir
+            periodos: Rangos (fecha_inicio, fecha_fin), ambos inclusive
+        
+        Returns:
+            Dict hoja_id -> lista de resúmenes en el orden de periodos, cada
+            uno con fecha_inicio, fecha_fin, total_ingresos, total_egresos,
+            balance y num_movimientos
+        """
+        periodos = list(periodos)
+        resumenes = {hoja_id: [None] * len(periodos) for hoja_id in hoja_ids}
+        
+        for i, hoja_id, ingresos, egresos, num in self.agg_repo.obtener_resumenes(
+                list(hoja_ids), periodos):
+            resumenes[hoja_id][i] = {
+                "fecha_inicio": periodos[i][0],
+                "fecha_fin": periodos[i][1],
+                "total_ingresos": ingresos,
+                "total_egresos": egresos,
+                "balance": ingresos - egresos,
+                "num_movimientos": num,
             }
         
-        return {
-            "total_ingresos": df['ingreso'].sum(),
-            "total_egresos": df['egreso'].sum(),
-            "balance": df['ingreso'].sum() - df['egreso'].sum(),
-            "num_movimientos": len(df)
-        }
+        return resumenes
+    
+    def obtener_tendencia_mensual(self, hoja_ids: List[int] = None,
+                                  meses: int = 12,
+                                  hasta: date = None) -> Dict[int, List[Dict]]:
+        """
+        Resumen de los últimos meses de cada hoja (el mes de 'hasta' incluido).
+        
+        Args:
+            hoja_ids: Hojas a resumir (todas las activas si es None)
+            meses: Cantidad de meses
+            hasta: Fecha dentro del último mes (hoy si es None)
+        """
+        if hoja_ids is None:
+            hoja_ids = [h['id'] for h in self.config_repo.obtener_hojas()]
+        
+        hasta = hasta or date.today()
+        periodos = []
+        año, mes = hasta.year, hasta.month
+        for _ in range(meses):
+            periodos.append((date(año, mes, 1), date(año, mes, monthrange(año, mes)[1])))
+            año, mes = (año, mes - 1) if mes > 1 else (año - 1, 12)
+        
+        return self.obtener_resumenes(hoja_ids, periodos[::-1])
     
     def obtener_resumen_mensual(self, hoja_id: int, año: int, mes: int) -> Dict:
         """Obtiene resumen de un mes específico."""
-        from calendar import monthrange
-        
         fecha_inicio = date(año, mes, 1)
         ultimo_dia = monthrange(año, mes)[1]
         fecha_fin = date(año, mes, ultimo_dia)
@@ -82,77 +124,61 @@ class BalanceCalculator:
         """
         Proyecta el saldo futuro basado en tendencias pasadas.
         
-        Usa promedio de últimos 30 días para proyectar.
-        """
-        fecha_fin = date.today()
-        fecha_inicio = fecha_fin - timedelta(days=30)
-        
-        resumen = self.obtener_resumen_periodo(hoja_id, fecha_inicio, fecha_fin)
+        Usa el modelo de ProyeccionService (tendencia y estacionalidad de los
+        últimos 180 días); para varias cuentas conviene llamarlo directamente.
         
-        if resumen['num_movimientos'] == 0:
-            return {
-                "saldo_actual": self.obtener_saldo_cuenta(hoja_id),
-                "promedio_diario": 0,
-                "proyeccion_30_dias": self.obtener_saldo_cuenta(hoja_id),
-                "tendencia": "estable"
-            }
-        
-        promedio_diario = resumen['balance'] / 30
-        saldo_actual = self.obtener_saldo_cuenta(hoja_id)
-        proyeccion = saldo_actual + (promedio_diario * dias_proyeccion)
+        Returns:
+            Dict con saldo_actual, promedio_diario, tendencia, dias_proyeccion
+            y proyeccion_30_dias: el saldo proyectado a `dias_proyeccion`
+            días (el nombre de la clave se conserva por compatibilidad; con
+            0 días es el saldo actual)
+        """
+        if dias_proyeccion < 0:
+            raise ValueError("dias_proyeccion no puede ser negativo")
         
-        if promedio_diario > 0:
-            tendencia = "positiva"
-        elif promedio_diario < 0:
-            tendencia = "negativa"
-        else:
-            tendencia = "estable"
+        # El modelo necesita al menos un día de horizonte para la tendencia
+        proyeccion = ProyeccionService().proyectar(
+            [hoja_id], horizonte=max(dias_proyeccion, 1)
+        )[hoja_id]
         
+        saldo_final = proyeccion['saldo'][-1] if dias_proyeccion else proyeccion['saldo_actual']
         return {
-            "saldo_actual": saldo_actual,
-            "promedio_diario": promedio_diario,
-            "proyeccion_30_dias": proyeccion,
-            "tendencia": tendencia
+            "saldo_actual": proyeccion['saldo_actual'],
+            "promedio_diario": proyeccion['flujo_diario'],
+            "dias_proyeccion": dias_proyeccion,
+            "proyeccion_30_dias": float(saldo_final),
+            "tendencia": proyeccion['tendencia'],
         }
     
-    def detectar_anomalias(self, hoja_id: int, umbral_desviacion: float = 2.0) -> List[Dict]:
+    def detectar_anomalias(self, hoja_id: int, umbral_desviacion: float = 3.5,
+                           metodo: str = "mad") -> List[Dict]:
         """
-        Detecta movimientos inusuales basados en desviación estándar.
+        Detecta movimientos inusuales de los últimos 90 días.
+        
+        Cada movimiento se compara con su propio grupo (hoja, local,
+        categoría, ingreso/egreso); ver AnomaliaRepository.
         
         Args:
             hoja_id: ID de la cuenta
-            umbral_desviacion: Cuántas desviaciones estándar para considerar anomalía
-            
+            umbral_desviacion: Puntaje mínimo para considerar anomalía
+            metodo: 'mad' (z robusto) o 'zscore'
+        
         Returns:
             Lista de movimientos sospechosos
         """
-        # Obtener últimos 90 días
-        fecha_fin = date.today()
-        fecha_inicio = fecha_fin - timedelta(days=90)
-        
-        df = self.mov_repo.obtener_historial_con_saldo(
-            hoja_id, fecha_inicio, fecha_fin
+        return AnomaliaService().detectar(
+            [hoja_id],
+            umbral=umbral_desviacion,
+            metodo=metodo,
+            fecha_inicio=date.today() - timedelta(days=90),
         )
-        
-        if df.empty or len(df) < 5:
-            return []  # No hay suficientes datos
-        
-        # Calcular montos totales por movimiento
-        df['monto'] = df['ingreso'] + df['egreso']
-        
-        media = df['monto'].mean()
-        std = df['monto'].std()
-        
-        # Encontrar anomalías
-        anomalias = df[df['monto'] > (media + umbral_desviacion * std)]
-        
-        return anomalias.to_dict('records')
     
     def verificar_cuadre(self, hoja_id: int, saldo_esperado: float) -> Dict:
         """
         Verifica si el saldo calculado coincide con un saldo esperado.
         
-        Útil para conciliación bancaria.
+        Útil para conciliación bancaria; si no cuadra, ConciliacionService
+        empareja el extracto línea por línea para ubicar las diferencias.
         
         Returns:
             Dict con resultado de la verificación
@@ -0,0 +1,103 @@
+"""
+ConSmart - Búsqueda en Vivo
+===========================
+Pipeline de búsqueda con debounce y cancelación de consultas obsoletas.
+"""
+
+import threading
+from typing import Any, Callable, Optional
+
+import duckdb
+
+from src.database import get_db
+
+
+class BusquedaEnVivo:
+    """
+    Ejecuta consultas de búsqueda en segundo plano a medida que el usuario escribe.
+    
+    Cada pulsación reprograma la consulta tras una pausa (debounce). Si una
+    consulta anterior sigue en ejecución se interrumpe con DuckDB interrupt(),
+    y solo el resultado de la última petición llega al callback.
+    """
+    
+    def __init__(
+        self,
+        consulta: Callable[..., Any],
+        on_resultado: Callable[[Any, dict], None],
+        espera: float = 0.3,
+        on_error: Callable[[Exception], None] = None,
+    ):
+        """
+        Args:
+            consulta: Función que recibe cursor=... y los parámetros de búsqueda
+            on_resultado: Callback con (resultado, parametros) de la última búsqueda
+            espera: Segundos sin escribir antes de lanzar la consulta
+            on_error: Callback opcional para errores distintos a la cancelación
+        """
+        self.consulta = consulta
+        self.on_resultado = on_resultado
+        self.espera = espera
+        self.on_error = on_error
+        self.db = get_db()
+        
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._timer: Optional[threading.Timer] = None
+        self._cursor_activo: Optional[duckdb.DuckDBPyConnection] = None
+    
+    def programar(self, **parametros):
+        """Programa una búsqueda, descartando las anteriores aún no entregadas."""
+        with self._lock:
+            self._generacion += 1
+            self._cancelar_pendientes()
+            
+            self._timer = threading.Timer(
+                self.espera, self._ejecutar, args=(self._generacion, parametros)
+            )
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def cancelar(self):
+        """Cancela la búsqueda programada y la que esté en ejecución."""
+        with self._lock:
+            self._generacion += 1
+            self._cancelar_pendientes()
+    
+    def _cancelar_pendientes(self):
+        """Detiene el timer y la consulta en curso (requiere el lock)."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        
+        if self._cursor_activo is not None:
+            self._cursor_activo.interrupt()
+            self._cursor_activo = None
+    
+    def _ejecutar(self, generacion: int, parametros: dict):
+        """Ejecuta la consulta en el hilo del timer."""
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            cursor = self.db.cursor()
+            self._cursor_activo = cursor
+        
+        try:
+            resultado = self.consulta(cursor=cursor, **parametros)
+        except duckdb.InterruptException:
+            return  # Reemplazada por una búsqueda más reciente
+        except Exception as e:
+            if self.on_error and generacion == self._generacion:
+                self.on_error(e)
+            return
+        finally:
+            with self._lock:
+                if self._cursor_activo is cursor:
+                    self._cursor_activo = None
+            cursor.close()
+        
+        with self._lock:
+            vigente = generacion == self._generacion
+        
+        if vigente:
+            self.on_resultado(resultado, parametros)
@@ -0,0 +1,111 @@
+"""
+ConSmart - Caché de Resultados
+==============================
+Caché LRU acotado por memoria y etiquetado con versiones de datos.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class CacheResultados:
+    """
+    Caché LRU de resultados de consultas.
+    
+    Cada entrada guarda la etiqueta de versión de los datos con que se calculó;
+    si al consultarla la versión actual es otra, la entrada se descarta.
+    El tamaño total se limita en bytes, expulsando primero lo menos usado.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+        self.expulsiones = 0
+    
+    def obtener(self, clave: Hashable, version: Hashable) -> Optional[Any]:
+        """
+        Retorna el valor cacheado si existe y su versión sigue vigente.
+        
+        Returns:
+            El valor, o None si no está o quedó obsoleto
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            
+            if entrada is None:
+                self.misses += 1
+                return None
+            
+            valor, version_entrada, tamaño = entrada
+            if version_entrada != version:
+                del self._entradas[clave]
+                self._bytes -= tamaño
+                self.invalidaciones += 1
+                self.misses += 1
+                return None
+            
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return valor
+    
+    def guardar(self, clave: Hashable, version: Hashable, valor: Any):
+        """Guarda un valor, expulsando entradas antiguas si se excede el límite."""
+        tamaño = self._estimar_tamaño(valor)
+        if tamaño > self.max_bytes:
+            return  # No vale la pena cachear algo que no cabe
+        
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[2]
+            
+            self._entradas[clave] = (valor, version, tamaño)
+            self._bytes += tamaño
+            
+            while self._bytes > self.max_bytes and self._entradas:
+                _, (_, _, tamaño_expulsado) = self._entradas.popitem(last=False)
+                self._bytes -= tamaño_expulsado
+                self.expulsiones += 1
+    
+    def limpiar(self):
+        """Vacía el caché (las métricas se conservan)."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+    
+    def metricas(self) -> Dict:
+        """Retorna métricas de uso del caché."""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / consultas if consultas else 0.0,
+                "invalidaciones": self.invalidaciones,
+                "expulsiones": self.expulsiones,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+    
+    @staticmethod
+    def _estimar_tamaño(valor: Any) -> int:
+        """Estima el tamaño en memoria de un valor."""
+        if isinstance(valor, pd.DataFrame):
+            return int(valor.memory_usage(deep=True).sum())
+        if isinstance(valor, dict) and valor and all(
+                isinstance(v, np.ndarray) for v in valor.values()):
+            # Resultado columnar (fetchnumpy): suma de los arreglos
+            return sum(v.nbytes for v in valor.values())
+        return sys.getsizeof(valor)
@@ -0,0 +1,98 @@
+"""
+ConSmart - Carga Paralela de Saldos
+===================================
+Consulta saldos de varias cuentas en segundo plano y en paralelo.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.database import MovimientoRepository, get_db, get_versiones
+
+
+class CargadorSaldos:
+    """
+    Carga saldos de cuentas en un pool de hilos con stale-while-revalidate.
+    
+    Cada consulta usa su propio cursor de DuckDB, así que las cuentas se
+    calculan en paralelo. El último saldo conocido de cada hoja se conserva
+    para mostrarlo de inmediato mientras se revalida.
+    """
+    
+    # Compartidos entre instancias: sobreviven a la reconstrucción de vistas
+    _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="saldos")
+    _ultimos: Dict[int, Tuple[float, int]] = {}
+    _lock = threading.Lock()
+    
+    def __init__(self):
+        self.db = get_db()
+        self.mov_repo = MovimientoRepository()
+    
+    def saldo_conocido(self, hoja_id: int) -> Tuple[Optional[float], bool]:
+        """
+        Retorna el último saldo conocido de una hoja.
+        
+        Returns:
+            Tupla (saldo o None, vigente) donde vigente indica que no hubo
+            escrituras en la hoja desde que se calculó
+        """
+        with self._lock:
+            entrada = self._ultimos.get(hoja_id)
+        
+        if entrada is None:
+            return (None, False)
+        
+        saldo, version = entrada
+        return (saldo, version == get_versiones().version_movimientos(hoja_id))
+    
+    def cargar(self, hoja_ids: List[int],
+               on_saldo: Callable[[int, float], None],
+               on_error: Callable[[int, Exception], None] = None) -> List[Future]:
+        """
+        Lanza la consulta de saldo de cada hoja que no tenga un valor vigente.
+        
+        Args:
+            hoja_ids: Hojas a cargar
+            on_saldo: Callback (hoja_id, saldo), llamado desde un hilo del pool
+            on_error: Callback opcional (hoja_id, excepción)
+        
+        Returns:
+            Lista de futures de las consultas lanzadas
+        """
+        futuros = []
+        for hoja_id in hoja_ids:
+            saldo, vigente = self.saldo_conocido(hoja_id)
+            if vigente:
+                on_saldo(hoja_id, saldo)
+                continue
+            
+            futuros.append(
+                self._executor.submit(self._consultar, hoja_id, on_saldo, on_error)
+            )
+        return futuros
+    
+    def _consultar(self, hoja_id: int,
+                   on_saldo: Callable[[int, float], None],
+                   on_error: Callable[[int, Exception], None] = None):
+        """Consulta el saldo de una hoja en un hilo del pool."""
+        # La versión se lee antes de consultar: una escritura concurrente
+        # dejará el valor marcado como obsoleto
+        version = get_versiones().version_movimientos(hoja_id)
+        cursor = self.db.cursor()
+        
+        try:
+            saldo = self.mov_repo.obtener_saldo_actual(hoja_id, cursor=cursor)
+        except Exception as e:
+            if on_error:
+                on_error(hoja_id, e)
+            else:
+                print(f"Error cargando saldo de hoja {hoja_id}: {e}")
+            return
+        finally:
+            cursor.close()
+        
+        with self._lock:
+            self._ultimos[hoja_id] = (saldo, version)
+        
+        on_saldo(hoja_id, saldo)
@@ -0,0 +1,161 @@
+"""
+ConSmart - Conciliación Bancaria
+================================
+Importa extractos bancarios y los concilia contra los movimientos de una hoja.
+"""
+
+import unicodedata
+from pathlib import Path
+from typing import Dict, Union
+
+import pandas as pd
+
+from src.database import ConciliacionRepository
+
+
+# Nombre normalizado de columna en el extracto -> columna interna
+ALIAS_COLUMNAS = {
+    "fecha": "fecha",
+    "fecha_operacion": "fecha",
+    "monto": "monto",
+    "importe": "monto",
+    "ingreso": "ingreso",
+    "abono": "ingreso",
+    "deposito": "ingreso",
+    "egreso": "egreso",
+    "cargo": "egreso",
+    "retiro": "egreso",
+    "num_documento": "num_documento",
+    "documento": "num_documento",
+    "nro_documento": "num_documento",
+    "no_documento": "num_documento",
+    "referencia": "num_documento",
+    "nro_operacion": "num_documento",
+    "no_operacion": "num_documento",
+    "numero_operacion": "num_documento",
+    "descripcion": "descripcion",
+    "concepto": "descripcion",
+    "detalle": "descripcion",
+}
+
+
+def _normalizar_nombre(nombre) -> str:
+    """'Nº Operación ' -> 'no_operacion': minúsculas, sin tildes ni espacios."""
+    texto = unicodedata.normalize("NFKD", str(nombre).strip().lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return "_".join(texto.replace(".", " ").replace("º", "o").split())
+
+
+class ConciliacionService:
+    """
+    Conciliación de extractos bancarios.
+    
+    El emparejamiento completo se hace en DuckDB (ver
+    ConciliacionRepository); este servicio normaliza el extracto importado
+    y resume el resultado.
+    """
+    
+    def __init__(self):
+        self.repo = ConciliacionRepository()
+    
+    def leer_extracto(self, ruta: Union[str, Path]) -> pd.DataFrame:
+        """
+        Lee un extracto exportado por el banco (.csv o .xlsx).
+        
+        Returns:
+            Extracto normalizado (ver normalizar_extracto)
+        """
+        ruta = Path(ruta)
+        if ruta.suffix.lower() == ".csv":
+            # sep=None detecta ',' o ';' (los bancos usan ambos)
+            df = pd.read_csv(ruta, sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+        elif ruta.suffix.lower() == ".xlsx":
+            df = pd.read_excel(ruta, dtype=str, engine="openpyxl")
+        else:
+            raise ValueError(f"Formato de extracto no soportado: {ruta.suffix}")
+        
+        return self.normalizar_extracto(df)
+    
+    @staticmethod
+    def normalizar_extracto(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Lleva un extracto a las columnas que usa la conciliación.
+        
+        Acepta un monto con signo (monto/importe) o columnas separadas de
+        abonos y cargos, y los nombres de columna habituales de los bancos.
+        
+        Returns:
+            DataFrame con linea (1..n en el orden del extracto), fecha,
+            monto (abonos positivos, cargos negativos), num_documento y
+            descripcion
+        """
+        columnas = {}
+        for original in df.columns:
+            interna = ALIAS_COLUMNAS.get(_normalizar_nombre(original))
+            if interna and interna not in columnas.values():
+                columnas[original] = interna
+        df = df[list(columnas)].rename(columns=columnas)
+        
+        if "fecha" not in df.columns:
+            raise ValueError("El extracto no tiene columna de fecha")
+        
+        def _numero(columna: str) -> pd.Series:
+            if columna not in df.columns:
+                return pd.Series(0.0, index=df.index)
+            texto = df[columna].astype(str).str.replace(",", "").str.strip()
+            return pd.to_numeric(texto, errors="coerce").fillna(0.0)
+        
+        if "monto" in df.columns:
+            monto = _numero("monto")
+        elif "ingreso" in df.columns or "egreso" in df.columns:
+            monto = _numero("ingreso") - _numero("egreso").abs()
+        else:
+            raise ValueError("El extracto no tiene columna de monto, abono o cargo")
+        
+        fechas = df["fecha"]
+        if not pd.api.types.is_datetime64_any_dtype(fechas):
+            fechas = pd.to_datetime(fechas, dayfirst=True, errors="coerce")
+        
+        extracto = pd.DataFrame({
+            "linea": range(1, len(df) + 1),
+            "fecha": fechas.dt.normalize(),
+            "monto": monto.round(2),
+            "num_documento": df.get("num_documento", pd.Series(None, index=df.index, dtype=object)),
+            "descripcion": df.get("descripcion", pd.Series(None, index=df.index, dtype=object)),
+        })
+        
+        # Filas sin fecha o sin monto (totales, saldos iniciales) no se concilian
+        return extracto[extracto["fecha"].notna() & (extracto["monto"] != 0)].reset_index(drop=True)
+    
+    def conciliar(self, hoja_id: int, extracto: pd.DataFrame,
+                  dias_tolerancia: int = 3) -> Dict:
+        """
+        Concilia un extracto normalizado con los movimientos de una hoja.
+        
+        Args:
+            hoja_id: Hoja (cuenta bancaria) a conciliar
+            extracto: Resultado de leer_extracto o normalizar_extracto
+            dias_tolerancia: Diferencia máxima de días entre extracto y registro
+        
+        Returns:
+            Dict con los DataFrames conciliados, ambiguos, sin_movimiento y
+            sin_extracto, y un 'resumen' con cantidades y montos de cada grupo
+        """
+        if extracto.empty:
+            raise ValueError("El extracto no tiene líneas para conciliar")
+        
+        resultado = self.repo.conciliar(hoja_id, extracto, dias_tolerancia=dias_tolerancia)
+        
+        ambiguas = resultado['ambiguos'].drop_duplicates('linea')
+        resultado['resumen'] = {
+            "lineas": len(extracto),
+            "conciliadas": len(resultado['conciliados']),
+            "ambiguas": len(ambiguas),
+            "sin_movimiento": len(resultado['sin_movimiento']),
+            "sin_extracto": len(resultado['sin_extracto']),
+            "monto_extracto": float(extracto['monto'].sum()),
+            "monto_conciliado": float(resultado['conciliados']['monto'].sum()),
+            "monto_pendiente": float(ambiguas['monto'].sum() + resultado['sin_movimiento']['monto'].sum()),
+            "monto_sin_extracto": float(resultado['sin_extracto']['monto'].sum()),
+        }
+        return resultado
@@ -0,0 +1,151 @@
+"""
+ConSmart - Servicio de Consolidación
+====================================
+Totales y saldos en soles de cuentas en distintas monedas.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List
+import pandas as pd
+
+from src.database import ReporteRepository, get_versiones
+from src.database.versiones import VersionesDatos
+from .cache import CacheResultados
+from .tipo_cambio import get_indice_tipo_cambio
+
+
+class ConsolidacionService:
+    """
+    Consolida movimientos y saldos de hojas PEN y USD en soles.
+    
+    Cada monto se convierte con el tipo de cambio vigente en su fecha
+    (ASOF JOIN en DuckDB, ver ReporteRepository.obtener_consolidado).
+    """
+    
+    # Compartido entre instancias; se invalida con movimientos, config o tipo de cambio
+    _cache = CacheResultados(max_bytes=16 * 1024 * 1024)
+    
+    def __init__(self):
+        self.repo = ReporteRepository()
+        self.indice_tc = get_indice_tipo_cambio()
+    
+    def obtener_totales(self, agrupar_por: Iterable[str] = ("hoja", "periodo"),
+                        periodo: str = "mes",
+                        fecha_inicio: date = None,
+                        fecha_fin: date = None,
+                        hoja_ids: List[int] = None,
+                        tasa: str = "compra") -> pd.DataFrame:
+        """
+        Totales consolidados en soles por hoja, local y/o período.
+        
+        Args:
+            agrupar_por: Dimensiones entre 'hoja', 'local' y 'periodo'
+            periodo: Granularidad ('dia', 'mes', 'trimestre', 'año')
+            hoja_ids: Limitar a estas hojas (todas si es None)
+            tasa: 'compra' o 'venta'
+        
+        Returns:
+            DataFrame con ingreso_pen, egreso_pen, neto_pen, num_movimientos
+            y sin_tipo_cambio por grupo
+        """
+        agrupar_por = tuple(agrupar_por)
+        clave = (
+            "totales", agrupar_por, periodo, fecha_inicio, fecha_fin,
+            tuple(sorted(hoja_ids)) if hoja_ids else None, tasa,
+        )
+        version = self._version_datos()
+        
+        df = self._cache.obtener(clave, version)
+        if df is None:
+            df = self.repo.obtener_consolidado(
+                agrupar_por=agrupar_por,
+                periodo=periodo,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                hoja_ids=hoja_ids,
+                tasa=tasa,
+            )
+            self._cache.guardar(clave, version, df)
+        
+        return df.copy()
+    
+    def obtener_saldo_consolidado(self, fecha: date = None, tasa: str = "compra") -> Dict:
+        """
+        Saldo total en soles de todas las cuentas activas a una fecha.
+        
+        Returns:
+            Dict con total_pen, tipo_cambio, fecha_tipo_cambio, cuentas
+            (lista con saldo y saldo_pen por hoja) y sin_tipo_cambio
+            (nombres de hojas que no se pudieron convertir)
+        """
+        clave = ("saldo", fecha or date.today(), tasa)
+        version = self._version_datos()
+        
+        resumen = self._cache.obtener(clave, version)
+        if resumen is None:
+            df = self.repo.obtener_saldos_consolidados(fecha=fecha, tasa=tasa)
+            sin_tc = df['saldo_pen'].isna()
+            tipo_cambio = df['tipo_cambio'].dropna()
+            
+            resumen = {
+                "total_pen": float(df['saldo_pen'].sum()),
+                "tipo_cambio": float(tipo_cambio.iloc[0]) if not tipo_cambio.empty else None,
+                "fecha_tipo_cambio": (df['fecha_tipo_cambio'].dropna().iloc[0].date()
+                                      if not tipo_cambio.empty else None),
+                "cuentas": [
+                    {
+                        "hoja_id": int(c.hoja_id),
+                        "hoja": c.hoja,
+                        "moneda": c.moneda,
+                        "saldo": float(c.saldo),
+                        "saldo_pen": None if pd.isna(c.saldo_pen) else float(c.saldo_pen),
+                    }
+                    for c in df.itertuples()
+                ],
+                "sin_tipo_cambio": df.loc[sin_tc, 'hoja'].tolist(),
+            }
+            self._cache.guardar(clave, version, resumen)
+        
+        return dict(resumen)
+    
+    def consolidar_saldos(self, saldos: Iterable[tuple], tasa: str = "compra") -> Dict:
+        """
+        Suma en soles saldos ya calculados con el último tipo de cambio.
+        
+        Args:
+            saldos: Pares (moneda, saldo)
+            tasa: 'compra' o 'venta'
+        
+        Returns:
+            Dict con total_pen, tipo_cambio, fecha_tipo_cambio y sin_convertir
+            (cantidad de saldos en moneda extranjera sin tipo de cambio)
+        """
+        ultimo = self.indice_tc.vigente()
+        tipo_cambio = ultimo[tasa] if ultimo else None
+        
+        total = 0.0
+        sin_convertir = 0
+        for moneda, saldo in saldos:
+            if moneda == ReporteRepository.MONEDA_BASE:
+                total += saldo
+            elif tipo_cambio is not None:
+                total += saldo * tipo_cambio
+            else:
+                sin_convertir += 1
+        
+        return {
+            "total_pen": total,
+            "tipo_cambio": tipo_cambio,
+            "fecha_tipo_cambio": ultimo['fecha'] if ultimo else None,
+            "sin_convertir": sin_convertir,
+        }
+    
+    @staticmethod
+    def _version_datos() -> tuple:
+        """Versión de los datos de los que depende la consolidación."""
+        versiones = get_versiones()
+        return (
+            versiones.version_movimientos(),
+            versiones.version(VersionesDatos.CONFIG),
+            versiones.version(VersionesDatos.TIPO_CAMBIO),
+        )
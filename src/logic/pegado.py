@@ -0,0 +1,215 @@
+"""
+ConSmart - Pegado desde Hojas de Cálculo
+========================================
+Convierte bloques copiados de Excel o portales bancarios en movimientos.
+"""
+
+import csv
+import io
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.database import get_versiones
+from src.database.versiones import VersionesDatos
+from .services import ConfigService
+from .validators import MovimientoValidator
+
+
+# Orden de columnas esperado (el mismo del grid de ingreso)
+COLUMNAS_PEGADO = [
+    "hoja", "fecha", "local", "categoria", "num_documento",
+    "responsable", "descripcion", "ingreso", "egreso",
+]
+
+FORMATOS_FECHA = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]
+
+
+def _normalizar(nombres: pd.Series) -> pd.Series:
+    """Normaliza nombres para compararlos sin importar mayúsculas ni espacios."""
+    return nombres.str.strip().str.casefold()
+
+
+class CatalogoNombres:
+    """
+    Índices nombre -> id de hojas, locales y categorías.
+    
+    Se construyen con una consulta por tabla y se comparten entre instancias;
+    solo se reconstruyen cuando cambia la versión de la configuración.
+    """
+    
+    _indices: Optional[tuple] = None
+    _lock = threading.Lock()
+    
+    def __init__(self):
+        self.config_service = ConfigService()
+    
+    def _obtener(self) -> tuple:
+        """
+        Retorna los índices vigentes: (hojas, locales, categorias,
+        categorias_por_local, lista_hojas, lista_locales).
+        """
+        version = get_versiones().version(VersionesDatos.CONFIG)
+        
+        with self._lock:
+            if self._indices is None or self._indices[0] != version:
+                lista_hojas = [{"id": h['id'], "nombre": h['nombre']}
+                               for h in self.config_service.obtener_hojas()]
+                lista_locales = [{"id": l['id'], "nombre": l['nombre']}
+                                 for l in self.config_service.obtener_locales()]
+                hojas = {h['nombre'].strip().casefold(): h['id'] for h in lista_hojas}
+                locales = {l['nombre'].strip().casefold(): l['id'] for l in lista_locales}
+                
+                categorias = {}
+                categorias_por_local: Dict[int, List[Dict]] = {}
+                for c in self.config_service.obtener_todas_categorias():
+                    categorias[f"{c['local_id']}|{c['nombre'].strip().casefold()}"] = c['id']
+                    categorias_por_local.setdefault(c['local_id'], []).append(
+                        {"id": c['id'], "nombre": c['nombre']}
+                    )
+                
+                type(self)._indices = (
+                    version, hojas, locales, categorias, categorias_por_local,
+                    lista_hojas, lista_locales,
+                )
+            
+            return self._indices[1:]
+    
+    def listas(self) -> tuple:
+        """
+        Retorna hojas, locales y categorías por local (id y nombre), ordenados.
+        
+        Returns:
+            Tupla (hojas, locales, {local_id: categorias})
+        """
+        indices = self._obtener()
+        return indices[4], indices[5], indices[3]
+    
+    def categorias_de(self, local_id: int) -> List[Dict]:
+        """Categorías de un local, sin consultar la base de datos."""
+        return self._obtener()[3].get(local_id, [])
+    
+    def resolver(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrega hoja_id, local_id y categoria_id a partir de los nombres.
+        
+        Returns:
+            El mismo DataFrame con las columnas de ids (nulas si no existen)
+        """
+        hojas, locales, categorias = self._obtener()[:3]
+        
+        df['hoja_id'] = _normalizar(df['hoja']).map(hojas).astype("Int64")
+        df['local_id'] = _normalizar(df['local']).map(locales).astype("Int64")
+        
+        clave = df['local_id'].astype(str) + "|" + _normalizar(df['categoria'])
+        df['categoria_id'] = clave.map(categorias).astype("Int64")
+        return df
+
+
+def parsear_tsv(texto: str) -> pd.DataFrame:
+    """
+    Lee texto separado por tabulaciones (como lo copia Excel).
+    
+    Las filas vacías se omiten, las cortas se completan y las columnas
+    sobrantes se descartan. Una primera fila de encabezados se ignora.
+    
+    Returns:
+        DataFrame de texto con las columnas de COLUMNAS_PEGADO
+    """
+    ancho = len(COLUMNAS_PEGADO)
+    filas = [
+        (fila + [""] * ancho)[:ancho]
+        for fila in csv.reader(io.StringIO(texto), delimiter="\t")
+        if any(celda.strip() for celda in fila)
+    ]
+    
+    if filas and filas[0][0].strip().casefold() in ("hoja", "cuenta"):
+        filas = filas[1:]
+    
+    return pd.DataFrame(filas, columns=COLUMNAS_PEGADO, dtype=str)
+
+
+def _parsear_fechas(textos: pd.Series) -> pd.Series:
+    """Convierte fechas en cualquiera de los formatos aceptados (NaT si ninguno)."""
+    fechas = pd.Series(pd.NaT, index=textos.index, dtype="datetime64[ns]")
+    for formato in FORMATOS_FECHA:
+        fechas = fechas.fillna(pd.to_datetime(textos, format=formato, errors="coerce"))
+    return fechas
+
+
+def _parsear_montos(textos: pd.Series) -> pd.Series:
+    """Convierte montos con separadores o símbolo de moneda (vacío = 0, NaN si inválido)."""
+    limpios = textos.str.replace(r"[,\s]|S/|\$", "", regex=True)
+    return pd.to_numeric(limpios.mask(limpios == "", "0"), errors="coerce")
+
+
+def preparar_pegado(texto: str, catalogo: CatalogoNombres,
+                    default_hoja_id: str = None,
+                    default_fecha: str = None) -> List[Dict]:
+    """
+    Convierte texto pegado en filas listas para el grid, validadas en lote.
+    
+    Args:
+        texto: Texto copiado (columnas en el orden de COLUMNAS_PEGADO)
+        catalogo: Índices de nombres para resolver hoja, local y categoría
+        default_hoja_id: Hoja a usar si la celda viene vacía
+        default_fecha: Fecha a usar si la celda viene vacía
+    
+    Returns:
+        Lista de diccionarios con los campos de la fila y sus 'errores'
+    """
+    df = parsear_tsv(texto)
+    if df.empty:
+        return []
+    
+    df = df.apply(lambda columna: columna.str.strip())
+    
+    # Celdas vacías de hoja y fecha toman el valor por defecto del grid
+    df['fecha'] = df['fecha'].mask(df['fecha'] == "", default_fecha or "")
+    catalogo.resolver(df)
+    if default_hoja_id:
+        df['hoja_id'] = df['hoja_id'].mask(df['hoja'] == "", int(default_hoja_id))
+    
+    fechas = _parsear_fechas(df['fecha'])
+    ingresos = _parsear_montos(df['ingreso'])
+    egresos = _parsear_montos(df['egreso'])
+    
+    errores = MovimientoValidator.validar_lote(pd.DataFrame({
+        'hoja_id': df['hoja_id'],
+        'local_id': df['local_id'],
+        'categoria_id': df['categoria_id'],
+        'fecha': fechas,
+        'ingreso': ingresos,
+        'egreso': egresos,
+    }))
+    
+    # Nombres escritos pero inexistentes: mensaje específico en lugar del genérico
+    no_encontrados = [
+        ('hoja', 'hoja_id', "Debe seleccionar una hoja/cuenta", "Hoja '{}' no encontrada"),
+        ('local', 'local_id', "Debe seleccionar un local", "Local '{}' no encontrado"),
+        ('categoria', 'categoria_id', "Debe seleccionar una categoría",
+         "Categoría '{}' no encontrada en el local"),
+    ]
+    for columna, columna_id, generico, especifico in no_encontrados:
+        mascara = (df[columna] != "") & df[columna_id].isna()
+        for i in mascara.to_numpy().nonzero()[0]:
+            errores[i] = [
+                especifico.format(df[columna].iat[i]) if e == generico else e
+                for e in errores[i]
+            ]
+    
+    # Valores a mostrar: fecha normalizada y montos con 2 decimales si son válidos
+    df['fecha'] = fechas.dt.strftime("%Y-%m-%d").fillna(df['fecha'])
+    for columna, montos in (('ingreso', ingresos), ('egreso', egresos)):
+        df[columna] = montos.map("{:.2f}".format).where(montos > 0, "").mask(montos.isna(), df[columna])
+    
+    df = df[[
+        'hoja_id', 'fecha', 'local_id', 'categoria_id', 'num_documento',
+        'responsable', 'descripcion', 'ingreso', 'egreso',
+    ]].astype(object)
+    filas = df.where(df.notna(), None).to_dict('records')
+    
+    for fila, errores_fila in zip(filas, errores):
+        fila['errores'] = errores_fila
+    return filas
@@ -0,0 +1,196 @@
+"""
+ConSmart - Proyección de Flujo de Caja
+======================================
+Proyecta los saldos de todas las cuentas con un modelo lineal en NumPy.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from statistics import NormalDist
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.database import AgregadoMensualRepository, ConfigRepository, ReporteRepository, get_db
+
+
+# Horizontes (días) que se resumen en cada proyección
+HORIZONTES = (30, 60, 90)
+
+# Días de historia mínimos para estimar cada grupo de términos del modelo
+MIN_DIAS_TENDENCIA = 21
+MIN_DIAS_ESTACIONALIDAD = 56
+
+
+def _matriz_diseño(fechas: np.ndarray, origen: np.datetime64, terminos: int) -> np.ndarray:
+    """
+    Columnas del modelo para un arreglo de fechas.
+    
+    Términos en orden: constante, tendencia (por año), día de la semana
+    (6 indicadores, lunes como base) y fase del mes (2 armónicos de seno y
+    coseno). Se toman las primeras `terminos` columnas.
+    """
+    dias = (fechas - origen).astype(np.float64)
+    
+    # 1970-01-01 fue jueves: (días desde epoch + 3) % 7 da 0 = lunes
+    dia_semana = (fechas.astype("datetime64[D]").astype(np.int64) + 3) % 7
+    semana = (dia_semana[:, None] == np.arange(1, 7)[None, :]).astype(np.float64)
+    
+    inicio_mes = fechas.astype("datetime64[M]")
+    largo_mes = ((inicio_mes + 1).astype("datetime64[D]")
+                 - inicio_mes.astype("datetime64[D]")).astype(np.float64)
+    fase = 2 * np.pi * (fechas - inicio_mes.astype("datetime64[D]")).astype(np.float64) / largo_mes
+    
+    columnas = np.column_stack([
+        np.ones_like(dias),
+        dias / 365.0,
+        semana,
+        np.sin(fase), np.cos(fase), np.sin(2 * fase), np.cos(2 * fase),
+    ])
+    return columnas[:, :terminos]
+
+
+class ProyeccionService:
+    """
+    Proyección de saldos de todas las cuentas a la vez.
+    
+    Una consulta trae el flujo neto diario de todas las hojas; con él se
+    arma una matriz días × hojas y se ajusta por mínimos cuadrados (una
+    sola llamada a lstsq para todas las hojas) un modelo de tendencia más
+    estacionalidad semanal y mensual. El saldo proyectado es el saldo
+    actual más el flujo proyectado acumulado; el intervalo crece con la
+    raíz del horizonte según la dispersión de los residuos de cada hoja.
+    """
+    
+    # Compartido entre instancias: una proyección a la vez en segundo plano
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proyeccion")
+    
+    def __init__(self):
+        self.db = get_db()
+        self.reporte_repo = ReporteRepository()
+        self.agg_repo = AgregadoMensualRepository()
+        self.config_repo = ConfigRepository()
+    
+    def proyectar(self, hoja_ids: List[int] = None,
+                  horizonte: int = 90,
+                  dias_historia: int = 180,
+                  nivel: float = 0.8,
+                  hasta: date = None,
+                  cursor=None) -> Dict[int, Dict]:
+        """
+        Proyecta el saldo diario de cada hoja.
+        
+        Args:
+            hoja_ids: Hojas a proyectar (todas las activas si es None)
+            horizonte: Días a proyectar desde 'hasta'
+            dias_historia: Días de historia usados para ajustar el modelo
+            nivel: Nivel de confianza del intervalo (0.8 = 80%)
+            hasta: Último día con datos (hoy si es None)
+            cursor: Cursor opcional para ejecutar desde otro hilo
+        
+        Returns:
+            Dict hoja_id -> proyección con saldo_actual, flujo_diario (promedio
+            proyectado), tendencia, arreglos fechas/saldo/inferior/superior de
+            largo `horizonte` y 'horizontes' con saldo e intervalo a 30/60/90 días
+        """
+        if hoja_ids is None:
+            hoja_ids = [h['id'] for h in self.config_repo.obtener_hojas()]
+        if not hoja_ids:
+            return {}
+        
+        hasta = hasta or date.today()
+        inicio = hasta - timedelta(days=dias_historia - 1)
+        
+        flujos = self.reporte_repo.obtener_flujos_diarios(inicio, hasta, hoja_ids, cursor=cursor)
+        saldos = self.agg_repo.obtener_saldos(hoja_ids, fecha=hasta, cursor=cursor)
+        
+        # Matriz días × hojas con el flujo neto (0 en días sin movimientos)
+        columna = {hoja_id: j for j, hoja_id in enumerate(hoja_ids)}
+        origen = np.datetime64(inicio, "D")
+        y = np.zeros((dias_historia, len(hoja_ids)))
+        if len(flujos['fecha']):
+            filas = (flujos['fecha'].astype("datetime64[D]") - origen).astype(np.int64)
+            cols = np.array([columna[h] for h in flujos['hoja_id'].tolist()], dtype=np.int64)
+            np.add.at(y, (filas, cols), flujos['neto'])
+        
+        if dias_historia >= MIN_DIAS_ESTACIONALIDAD:
+            terminos = 12
+        elif dias_historia >= MIN_DIAS_TENDENCIA:
+            terminos = 8
+        else:
+            terminos = 1
+        
+        fechas_hist = origen + np.arange(dias_historia)
+        x = _matriz_diseño(fechas_hist, origen, terminos)
+        coeficientes, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+        
+        residuos = y - x @ coeficientes
+        libertad = max(dias_historia - terminos, 1)
+        sigma = np.sqrt((residuos ** 2).sum(axis=0) / libertad)
+        
+        # Flujo proyectado y su acumulado: horizonte × hojas
+        fechas = np.datetime64(hasta, "D") + np.arange(1, horizonte + 1)
+        flujo = _matriz_diseño(fechas, origen, terminos) @ coeficientes
+        acumulado = np.cumsum(flujo, axis=0)
+        
+        z = NormalDist().inv_cdf((1 + nivel) / 2)
+        margen = z * sigma[None, :] * np.sqrt(np.arange(1, horizonte + 1))[:, None]
+        
+        actuales = np.array([saldos[h] for h in hoja_ids])
+        saldo = actuales[None, :] + acumulado
+        
+        proyecciones = {}
+        for j, hoja_id in enumerate(hoja_ids):
+            flujo_diario = float(flujo[:, j].mean())
+            if abs(flujo_diario) < 0.01:
+                tendencia = "estable"
+            else:
+                tendencia = "positiva" if flujo_diario > 0 else "negativa"
+            
+            proyecciones[hoja_id] = {
+                "saldo_actual": float(actuales[j]),
+                "flujo_diario": flujo_diario,
+                "tendencia": tendencia,
+                "fechas": fechas,
+                "saldo": saldo[:, j],
+                "inferior": saldo[:, j] - margen[:, j],
+                "superior": saldo[:, j] + margen[:, j],
+                "horizontes": {
+                    dias: {
+                        "saldo": float(saldo[dias - 1, j]),
+                        "inferior": float(saldo[dias - 1, j] - margen[dias - 1, j]),
+                        "superior": float(saldo[dias - 1, j] + margen[dias - 1, j]),
+                    }
+                    for dias in HORIZONTES if dias <= horizonte
+                },
+            }
+        
+        return proyecciones
+    
+    def proyectar_en_segundo_plano(self, on_listo: Callable[[Dict[int, Dict]], None],
+                                   on_error: Callable[[Exception], None] = None,
+                                   **kwargs) -> Future:
+        """
+        Ejecuta proyectar() en un hilo con su propio cursor.
+        
+        Args:
+            on_listo: Callback con el resultado, llamado desde el hilo
+            on_error: Callback opcional con la excepción
+            **kwargs: Argumentos de proyectar()
+        """
+        def _tarea():
+            cursor = self.db.cursor()
+            try:
+                proyecciones = self.proyectar(cursor=cursor, **kwargs)
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                else:
+                    print(f"Error proyectando saldos: {e}")
+                return
+            finally:
+                cursor.close()
+            
+            on_listo(proyecciones)
+        
+        return self._executor.submit(_tarea)
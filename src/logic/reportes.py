@@ -0,0 +1,160 @@
+"""
+ConSmart - Reportes
+===================
+Estado de resultados por local, categoría y período.
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.database import ReporteRepository, get_versiones
+from src.database.versiones import VersionesDatos
+from .cache import CacheResultados
+
+
+# Formato de la columna de cada período en la tabla exportada
+FORMATOS_PERIODO = {"dia": "%Y-%m-%d", "mes": "%Y-%m", "trimestre": "%Y-%m", "año": "%Y"}
+
+VALORES = ("ingreso", "egreso", "neto")
+
+
+def _con_nulos(columna: np.ndarray, nulo) -> np.ndarray:
+    """Reemplaza las posiciones enmascaradas de una columna de fetchnumpy por un nulo."""
+    return np.where(np.ma.getmaskarray(columna), nulo, np.ma.getdata(columna))
+
+
+class EstadoResultadosService:
+    """
+    Genera estados de resultados (ingresos/egresos) con subtotales.
+    
+    Todo el reporte sale de una consulta con GROUPING SETS
+    (ver ReporteRepository.obtener_estado_resultados); el resultado es
+    columnar (arreglos de NumPy) y se cachea por versión de los datos.
+    """
+    
+    # Compartido entre instancias; se invalida con movimientos, config o tipo de cambio
+    _cache = CacheResultados(max_bytes=16 * 1024 * 1024)
+    
+    def __init__(self):
+        self.repo = ReporteRepository()
+    
+    def generar(self, fecha_inicio: date = None,
+                fecha_fin: date = None,
+                periodo: str = "mes",
+                hoja_ids: List[int] = None,
+                local_ids: List[int] = None,
+                tasa: str = "compra") -> Dict[str, np.ndarray]:
+        """
+        Estado de resultados en soles por local × categoría × período.
+        
+        Returns:
+            Columnas del reporte (ver ReporteRepository.obtener_estado_resultados);
+            la columna 'nivel' distingue detalle y subtotales
+        """
+        clave = (
+            "resultados", fecha_inicio, fecha_fin, periodo,
+            tuple(sorted(hoja_ids)) if hoja_ids else None,
+            tuple(sorted(local_ids)) if local_ids else None,
+            tasa,
+        )
+        version = self._version_datos()
+        
+        reporte = self._cache.obtener(clave, version)
+        if reporte is None:
+            reporte = self.repo.obtener_estado_resultados(
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                periodo=periodo,
+                hoja_ids=hoja_ids,
+                local_ids=local_ids,
+                tasa=tasa,
+            )
+            self._cache.guardar(clave, version, reporte)
+        
+        # Los arreglos son compartidos con el caché: se entregan como solo lectura
+        columnas = {}
+        for nombre, arreglo in reporte.items():
+            vista = arreglo.view()
+            vista.flags.writeable = False
+            columnas[nombre] = vista
+        return columnas
+    
+    def generar_anual(self, anio: int, **kwargs) -> Dict[str, np.ndarray]:
+        """Estado de resultados mensual de un año completo."""
+        return self.generar(date(anio, 1, 1), date(anio, 12, 31), periodo="mes", **kwargs)
+    
+    @staticmethod
+    def a_tabla(reporte: Dict[str, np.ndarray], valor: str = "neto",
+                periodo: str = "mes") -> pd.DataFrame:
+        """
+        Pivotea el reporte: una fila por local/categoría y una columna por período.
+        
+        Args:
+            reporte: Resultado de generar()
+            valor: 'ingreso', 'egreso' o 'neto'
+            periodo: Granularidad con la que se generó (para rotular columnas)
+        
+        Returns:
+            DataFrame con índice (local, categoria), columnas de período y
+            'Total'; los subtotales por local y el total general van como filas
+        """
+        if valor not in VALORES:
+            raise ValueError(f"Valor no soportado: {valor}")
+        
+        df = pd.DataFrame({
+            "nivel": reporte["nivel"],
+            "periodo": _con_nulos(reporte["periodo"], np.datetime64("NaT")),
+            "local": _con_nulos(reporte["local"], None),
+            "categoria": _con_nulos(reporte["categoria"], None),
+            valor: reporte[valor],
+        })
+        
+        df["local"] = df["local"].where(~df["nivel"].isin(["periodo", "total"]), "TOTAL")
+        df["categoria"] = df["categoria"].fillna("Subtotal").where(df["local"] != "TOTAL", "")
+        
+        periodos = df["periodo"].dt.strftime(FORMATOS_PERIODO.get(periodo, "%Y-%m-%d"))
+        df["columna"] = periodos.fillna("Total")
+        
+        # Filas en el orden de la consulta (cada subtotal tras sus categorías)
+        filas = pd.MultiIndex.from_frame(df[["local", "categoria"]].drop_duplicates())
+        columnas = sorted(df.loc[df["periodo"].notna(), "columna"].unique()) + ["Total"]
+        tabla = df.pivot_table(
+            index=["local", "categoria"], columns="columna", values=valor,
+            aggfunc="sum", fill_value=0.0,
+        )
+        return tabla.reindex(index=filas, columns=columnas, fill_value=0.0)
+    
+    def exportar(self, reporte: Dict[str, np.ndarray], ruta: Path,
+                 valor: str = "neto", periodo: str = "mes") -> Path:
+        """
+        Exporta el reporte pivoteado a Excel (.xlsx) o CSV (.csv).
+        
+        Returns:
+            Ruta del archivo generado
+        """
+        ruta = Path(ruta)
+        tabla = self.a_tabla(reporte, valor=valor, periodo=periodo)
+        
+        if ruta.suffix.lower() == ".xlsx":
+            tabla.to_excel(ruta, sheet_name="Estado de Resultados", engine="openpyxl")
+        elif ruta.suffix.lower() == ".csv":
+            # utf-8-sig para que Excel reconozca tildes al abrir el CSV
+            tabla.to_csv(ruta, encoding="utf-8-sig")
+        else:
+            raise ValueError(f"Formato de exportación no soportado: {ruta.suffix}")
+        
+        return ruta
+    
+    @staticmethod
+    def _version_datos() -> tuple:
+        """Versión de los datos de los que depende el reporte."""
+        versiones = get_versiones()
+        return (
+            versiones.version_movimientos(),
+            versiones.version(VersionesDatos.CONFIG),
+            versiones.version(VersionesDatos.TIPO_CAMBIO),
+        )
@@ -8,26 +8,33 @@ from datetime import date
 from typing import Dict, List, Tuple, Optional
 import pandas as pd
 
-from src.database import MovimientoRepository, ConfigRepository
+from src.database import MovimientoRepository, ConfigRepository, get_versiones
+from src.database.versiones import VersionesDatos
 from .validators import MovimientoValidator
 from .balance_utils import BalanceCalculator
+from .cache import CacheResultados
 
 
 class MovimientoService:
     """Servicio para gestionar movimientos contables."""
     
+    # Compartido entre instancias: cada vista crea su propio servicio
+    _cache_historial = CacheResultados(max_bytes=64 * 1024 * 1024)
+    
     def __init__(self):
         self.repo = MovimientoRepository()
         self.config_repo = ConfigRepository()
         self.calculator = BalanceCalculator()
     
-    def crear_movimiento(self, datos: dict) -> Tuple[bool, int, List[str]]:
+    def crear_movimiento(self, datos: dict,
+                         permitir_duplicado: bool = False) -> Tuple[bool, int, List[str]]:
         """
         Crea un nuevo movimiento con validación completa.
         
         Args:
             datos: Diccionario con los campos del movimiento
-            
+            permitir_duplicado: Guardar aunque ya exista uno igual
+        
         Returns:
             Tupla (exito, id_creado, errores)
         """
@@ -37,13 +44,77 @@ class MovimientoService:
         if not es_valido:
             return (False, 0, errores)
         
-        # Crear movimiento
+        # Crear movimiento; la búsqueda de duplicados va en la misma transacción
         try:
-            nuevo_id = self.repo.crear(datos)
-            return (True, nuevo_id, [])
+            creados, duplicados = self.repo.crear_lote(
+                [dict(datos, permitir_duplicado=permitir_duplicado)],
+                verificar_duplicados=True,
+            )
+            if duplicados:
+                return (False, 0, [self.describir_duplicado(duplicados[0])])
+            
+            return (True, creados[0], [])
         except Exception as e:
             return (False, 0, [f"Error al guardar: {str(e)}"])
     
+    def crear_movimientos(self, lista: List[dict]) -> Tuple[List[int], Dict[int, List[str]],
+                                                            Dict[int, List[Dict]]]:
+        """
+        Valida y crea varios movimientos en una sola transacción.
+        
+        Todo el lote se compara con los movimientos existentes en una sola
+        consulta, dentro de la transacción que lo guarda; los posibles
+        duplicados no se guardan salvo que traigan 'permitir_duplicado' en
+        True.
+        
+        Args:
+            lista: Diccionarios con los campos de cada movimiento
+        
+        Returns:
+            Tupla (guardados, errores, duplicados), todos por posición en
+            lista: las posiciones guardadas, los errores de cada posición
+            no guardada (inválida o por falla al guardar) y los movimientos
+            existentes que coinciden con cada posible duplicado
+        """
+        validos = []
+        errores = {}
+        for i, datos in enumerate(lista):
+            es_valido, errores_fila = MovimientoValidator.validar(datos)
+            if es_valido:
+                validos.append(i)
+            else:
+                errores[i] = errores_fila
+        
+        if not validos:
+            return ([], errores, {})
+        
+        try:
+            creados, encontrados = self.repo.crear_lote(
+                [lista[i] for i in validos], verificar_duplicados=True
+            )
+        except Exception as e:
+            # El lote es una sola transacción: no se guardó ninguno
+            for i in validos:
+                errores[i] = [f"Error al guardar: {str(e)}"]
+            return ([], errores, {})
+        
+        guardados = [validos[j] for j in sorted(creados)]
+        duplicados = {validos[j]: existentes for j, existentes in encontrados.items()}
+        return (guardados, errores, duplicados)
+    
+    @staticmethod
+    def describir_duplicado(existentes: List[Dict]) -> str:
+        """Texto de advertencia para un movimiento que parece duplicado."""
+        existente = existentes[0]
+        texto = f"Posible duplicado del movimiento #{existente['id']}"
+        if existente.get('num_documento'):
+            texto += f" (doc. {existente['num_documento']})"
+        if existente.get('created_by'):
+            texto += f", registrado por {existente['created_by']}"
+        if len(existentes) > 1:
+            texto += f" y {len(existentes) - 1} más"
+        return texto
+    
     def obtener_historial(self, hoja_id: int,
                           fecha_inicio: date = None,
                           fecha_fin: date = None) -> pd.DataFrame:
@@ -56,14 +127,84 @@ class MovimientoService:
                                     local_id: int = None,
                                     fecha_inicio: date = None,
                                     fecha_fin: date = None,
-                                    texto_busqueda: str = None) -> pd.DataFrame:
-        """Obtiene el historial con múltiples filtros."""
-        return self.repo.obtener_historial_filtrado(
-            hoja_id=hoja_id,
-            local_id=local_id,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            texto_busqueda=texto_busqueda
+                                    texto_busqueda: str = None,
+                                    cursor=None) -> pd.DataFrame:
+        """
+        Obtiene el historial con múltiples filtros.
+        
+        Los resultados se cachean por combinación de filtros hasta que una
+        escritura en la hoja correspondiente (o en la configuración) los
+        invalide. Cada llamada recibe su propia copia: modificarla no altera
+        el caché.
+        """
+        clave = ("historial",) + self._normalizar_filtros(
+            hoja_id, local_id, fecha_inicio, fecha_fin, texto_busqueda
+        )
+        version = self._version_datos(hoja_id)
+        
+        df = self._cache_historial.obtener(clave, version)
+        if df is None:
+            df = self.repo.obtener_historial_filtrado(
+                hoja_id=hoja_id,
+                local_id=local_id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                texto_busqueda=texto_busqueda,
+                cursor=cursor,
+            )
+            self._cache_historial.guardar(clave, version, df)
+        
+        return df.copy()
+    
+    def obtener_resumen_filtrado(self, hoja_id: int = None,
+                                  local_id: int = None,
+                                  fecha_inicio: date = None,
+                                  fecha_fin: date = None,
+                                  texto_busqueda: str = None,
+                                  cursor=None) -> Dict:
+        """Obtiene los totales del historial filtrado sin cargar las filas."""
+        clave = ("resumen",) + self._normalizar_filtros(
+            hoja_id, local_id, fecha_inicio, fecha_fin, texto_busqueda
+        )
+        version = self._version_datos(hoja_id)
+        
+        resumen = self._cache_historial.obtener(clave, version)
+        if resumen is None:
+            resumen = self.repo.obtener_resumen_filtrado(
+                hoja_id=hoja_id,
+                local_id=local_id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                texto_busqueda=texto_busqueda,
+                cursor=cursor,
+            )
+            self._cache_historial.guardar(clave, version, resumen)
+        
+        return dict(resumen)
+    
+    def metricas_cache(self) -> Dict:
+        """Retorna las métricas del caché de historial (hits, misses, hit_rate...)."""
+        return self._cache_historial.metricas()
+    
+    @staticmethod
+    def _normalizar_filtros(hoja_id, local_id, fecha_inicio, fecha_fin,
+                            texto_busqueda) -> tuple:
+        """Convierte los filtros en una clave de caché estable."""
+        return (
+            hoja_id or None,
+            local_id or None,
+            fecha_inicio,
+            fecha_fin,
+            texto_busqueda.lower() if texto_busqueda else None,
+        )
+    
+    @staticmethod
+    def _version_datos(hoja_id: int = None) -> tuple:
+        """Versión de los datos de los que depende una consulta filtrada."""
+        versiones = get_versiones()
+        return (
+            versiones.version_movimientos(hoja_id),
+            versiones.version(VersionesDatos.CONFIG),
         )
     
     def obtener_movimiento(self, movimiento_id: int) -> Optional[Dict]:
@@ -86,6 +227,49 @@ class MovimientoService:
             print(f"Error al eliminar movimiento: {e}")
             return False
     
+    def actualizar_movimiento_con_delta(self, movimiento_id: int,
+                                         datos: dict) -> Optional[Dict]:
+        """
+        Actualiza un movimiento y retorna el cambio aplicado.
+        
+        Permite que la UI parchee solo la fila afectada en lugar de recargar.
+        
+        Returns:
+            Dict con 'anterior', 'nuevo' y 'delta_saldo', o None si falla
+        """
+        anterior = self.repo.obtener_por_id(movimiento_id)
+        if not anterior or not self.actualizar_movimiento(movimiento_id, datos):
+            return None
+        
+        nuevo = self.repo.obtener_por_id(movimiento_id)
+        return {
+            "anterior": anterior,
+            "nuevo": nuevo,
+            "delta_saldo": self._neto(nuevo) - self._neto(anterior),
+        }
+    
+    def eliminar_movimiento_con_delta(self, movimiento_id: int) -> Optional[Dict]:
+        """
+        Elimina un movimiento y retorna el cambio aplicado.
+        
+        Returns:
+            Dict con 'anterior', 'nuevo' (None) y 'delta_saldo', o None si falla
+        """
+        anterior = self.repo.obtener_por_id(movimiento_id)
+        if not anterior or not self.eliminar_movimiento(movimiento_id):
+            return None
+        
+        return {
+            "anterior": anterior,
+            "nuevo": None,
+            "delta_saldo": -self._neto(anterior),
+        }
+    
+    @staticmethod
+    def _neto(movimiento: dict) -> float:
+        """Efecto de un movimiento sobre el saldo."""
+        return float(movimiento.get('ingreso') or 0) - float(movimiento.get('egreso') or 0)
+    
     def contar_movimientos_hoy(self) -> int:
         """Cuenta los movimientos registrados hoy."""
         return self.repo.contar_movimientos_por_fecha(date.today())
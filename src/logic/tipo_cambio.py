@@ -0,0 +1,124 @@
+"""
+ConSmart - Índice de Tipos de Cambio
+====================================
+Serie completa de tipos de cambio en memoria, con búsqueda binaria.
+"""
+
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.database import ConfigRepository, get_versiones
+from src.database.versiones import VersionesDatos
+
+
+class IndiceTipoCambio:
+    """
+    Singleton con la serie de tipos de cambio en arreglos ordenados por fecha.
+    
+    La tasa de un día es la del último registro en o antes de esa fecha
+    (los días sin registro arrastran el anterior). Se recarga con una sola
+    consulta cuando cambia la versión de tipo_cambio (guardar_tipo_cambio).
+    """
+    
+    TASAS = ("compra", "venta")
+    
+    _instance: Optional['IndiceTipoCambio'] = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._serie = None
+        return cls._instance
+    
+    def _obtener(self) -> tuple:
+        """Retorna (fechas, {tasa: valores}) de la versión vigente."""
+        version = get_versiones().version(VersionesDatos.TIPO_CAMBIO)
+        
+        with self._lock:
+            if self._serie is None or self._serie[0] != version:
+                filas = ConfigRepository().obtener_serie_tipo_cambio()
+                
+                fechas = np.array([f[0] for f in filas], dtype="datetime64[D]")
+                valores = {
+                    tasa: np.array([np.nan if f[i] is None else float(f[i]) for f in filas],
+                                   dtype=np.float64)
+                    for i, tasa in enumerate(self.TASAS, start=1)
+                }
+                self._serie = (version, fechas, valores)
+            
+            return self._serie[1:]
+    
+    def __len__(self) -> int:
+        return len(self._obtener()[0])
+    
+    def vigente(self, fecha: date = None) -> Optional[Dict]:
+        """
+        Tipo de cambio vigente a una fecha (o el más reciente).
+        
+        Returns:
+            Dict con fecha (del registro usado), compra y venta, o None si
+            la fecha es anterior al primer registro
+        """
+        fechas, valores = self._obtener()
+        if fechas.size == 0:
+            return None
+        
+        if fecha is None:
+            i = fechas.size - 1
+        else:
+            i = int(np.searchsorted(fechas, np.datetime64(fecha, "D"), side="right")) - 1
+            if i < 0:
+                return None
+        
+        return {
+            "fecha": fechas[i].item(),
+            **{tasa: None if np.isnan(valores[tasa][i]) else float(valores[tasa][i])
+               for tasa in self.TASAS},
+        }
+    
+    def tasas(self, fechas, tasa: str = "compra") -> np.ndarray:
+        """
+        Tasas vigentes para un arreglo de fechas.
+        
+        Args:
+            fechas: Secuencia de fechas (date, datetime64, Series de pandas)
+            tasa: 'compra' o 'venta'
+        
+        Returns:
+            Arreglo de float con NaN en las fechas anteriores al primer registro
+        """
+        if tasa not in self.TASAS:
+            raise ValueError(f"Tasa no soportada: {tasa}")
+        
+        serie_fechas, valores = self._obtener()
+        buscadas = np.asarray(fechas, dtype="datetime64[D]")
+        if serie_fechas.size == 0:
+            return np.full(buscadas.shape, np.nan)
+        
+        indices = np.searchsorted(serie_fechas, buscadas, side="right") - 1
+        resultado = valores[tasa][np.maximum(indices, 0)]
+        return np.where(indices >= 0, resultado, np.nan)
+    
+    def convertir(self, montos, fechas, tasa: str = "compra") -> np.ndarray:
+        """
+        Convierte montos en dólares a soles con la tasa vigente de cada fecha.
+        
+        Args:
+            montos: Montos en moneda extranjera
+            fechas: Fecha de cada monto (misma longitud)
+            tasa: 'compra' o 'venta'
+        
+        Returns:
+            Arreglo de montos en soles (NaN si no hay tipo de cambio)
+        """
+        return np.asarray(montos, dtype=np.float64) * self.tasas(fechas, tasa)
+
+
+# Instancia global
+def get_indice_tipo_cambio() -> IndiceTipoCambio:
+    """Obtiene el índice de tipos de cambio en memoria."""
+    return IndiceTipoCambio()
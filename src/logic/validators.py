@@ -7,6 +7,8 @@ Validaciones para asegurar integridad de datos contables.
 from datetime import date, datetime
 from typing import List, Tuple
 
+import pandas as pd
+
 
 class MovimientoValidator:
     """Valida los datos de un movimiento antes de guardarlo."""
@@ -80,6 +82,49 @@ class MovimientoValidator:
         
         return (len(errores) == 0, errores)
     
+    @staticmethod
+    def validar_lote(df: pd.DataFrame) -> List[List[str]]:
+        """
+        Valida muchos movimientos a la vez con las reglas de validar().
+        
+        Cada regla se evalúa sobre la columna completa; solo se recorren
+        en Python las filas que fallan.
+        
+        Args:
+            df: Columnas hoja_id, local_id, categoria_id (nulos si faltan),
+                fecha (datetime64, NaT si falta o es inválida), ingreso y
+                egreso (float, NaN si no son números)
+            
+        Returns:
+            Lista de errores por fila (vacía si la fila es válida)
+        """
+        ingreso = df['ingreso']
+        egreso = df['egreso']
+        montos_invalidos = ingreso.isna() | egreso.isna()
+        ingreso = ingreso.fillna(0)
+        egreso = egreso.fillna(0)
+        
+        reglas = [
+            (df['hoja_id'].isna(), "Debe seleccionar una hoja/cuenta"),
+            (df['local_id'].isna(), "Debe seleccionar un local"),
+            (df['categoria_id'].isna(), "Debe seleccionar una categoría"),
+            (df['fecha'].isna(), "La fecha es obligatoria (YYYY-MM-DD o DD/MM/YYYY)"),
+            (df['fecha'] > pd.Timestamp(date.today()), "La fecha no puede ser futura"),
+            (montos_invalidos, "Los montos deben ser números válidos"),
+            (ingreso < 0, "El ingreso no puede ser negativo"),
+            (egreso < 0, "El egreso no puede ser negativo"),
+            ((ingreso > 0) & (egreso > 0),
+             "Un movimiento no puede tener ingreso y egreso simultáneamente"),
+            ((ingreso == 0) & (egreso == 0) & ~montos_invalidos,
+             "Debe ingresar un monto en ingreso o egreso"),
+        ]
+        
+        errores = [[] for _ in range(len(df))]
+        for mascara, mensaje in reglas:
+            for i in mascara.to_numpy().nonzero()[0]:
+                errores[i].append(mensaje)
+        return errores
+    
     @staticmethod
     def validar_monto(valor: str) -> Tuple[bool, float, str]:
         """
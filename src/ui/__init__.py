@@ -1,10 +1,21 @@
 """
 Módulo UI de ConSmart
+
+Componentes y vistas se importan en el primer uso (ver src.carga_diferida).
 """
 
+from src.carga_diferida import exportar_bajo_demanda
+
 from .theme import AppTheme, Styles, Icons
-from .components import ExcelRow, MovimientosTable, SaldoCard
-from .views import EntryView, AdminView, DashboardView
+
+__getattr__ = exportar_bajo_demanda(__name__, {
+    "ExcelRow": ".components",
+    "MovimientosTable": ".components",
+    "SaldoCard": ".components",
+    "EntryView": ".views",
+    "AdminView": ".views",
+    "DashboardView": ".views",
+})
 
 __all__ = [
     "AppTheme",
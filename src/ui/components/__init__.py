@@ -1,10 +1,21 @@
 """
 Componentes UI reutilizables de ConSmart
+
+Se importan en el primer uso: data_table carga pandas y numpy.
 """
 
-from .excel_row import ExcelRow
-from .excel_grid import ExcelGrid, ExcelGridRow
-from .data_table import MovimientosTable, SaldoCard
+from src.carga_diferida import exportar_bajo_demanda
+
+__getattr__ = exportar_bajo_demanda(__name__, {
+    "ExcelRow": ".excel_row",
+    "ExcelGrid": ".excel_grid",
+    "ExcelGridRow": ".excel_grid",
+    "MovimientosTable": ".data_table",
+    "SaldoCard": ".data_table",
+    "ModeloOpciones": ".opciones",
+    "OpcionesConfig": ".opciones",
+    "get_opciones_config": ".opciones",
+})
 
 __all__ = [
     "ExcelRow",
@@ -12,4 +23,7 @@ __all__ = [
     "ExcelGridRow",
     "MovimientosTable",
     "SaldoCard",
+    "ModeloOpciones",
+    "OpcionesConfig",
+    "get_opciones_config",
 ]
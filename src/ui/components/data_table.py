@@ -5,18 +5,178 @@ Tabla con historial de movimientos y saldo acumulado.
 """
 
 import flet as ft
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional
+import numpy as np
 import pandas as pd
 
 from src.ui.theme import AppTheme, Styles, Icons
 
 
+# Columnas de presentación precalculadas para la tabla de movimientos
+COLUMNAS_VISTA = [
+    'id', 'fecha_str', 'local_str', 'categoria_str', 'descripcion_str',
+    'ingreso_str', 'ingreso_color', 'egreso_str', 'egreso_color',
+    'saldo_str', 'saldo_color',
+]
+
+
+def formatear_montos(valores: pd.Series, solo_positivos: bool = False) -> pd.Series:
+    """
+    Formatea una columna numérica como '1,234.56' en una sola pasada por columna.
+    
+    Con solo_positivos=True, los valores en cero o negativos se muestran como "-"
+    y no se formatean.
+    """
+    numeros = pd.to_numeric(valores, errors='coerce').fillna(0)
+    mascara = numeros > 0 if solo_positivos else pd.Series(True, index=numeros.index)
+    
+    resultado = pd.Series("-", index=numeros.index, dtype=object)
+    resultado[mascara] = list(map("{:,.2f}".format, numeros[mascara].tolist()))
+    return resultado
+
+
+def formatear_movimientos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula las columnas de presentación de la tabla para todo el resultado.
+    
+    Fechas, montos, colores y descripción truncada se obtienen con operaciones
+    de columna, de modo que construir una fila solo requiere buscar valores.
+    
+    Returns:
+        DataFrame con id y las columnas *_str / *_color
+    """
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_VISTA)
+    
+    ingreso = pd.to_numeric(df['ingreso'], errors='coerce').fillna(0)
+    egreso = pd.to_numeric(df['egreso'], errors='coerce').fillna(0)
+    saldo = pd.to_numeric(df['saldo'], errors='coerce').fillna(0)
+    
+    def _texto(columna: str) -> pd.Series:
+        if columna not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[columna].fillna("").astype(str)
+    
+    return pd.DataFrame({
+        'id': df['id'].astype('int64'),
+        'fecha_str': pd.to_datetime(df['fecha']).dt.strftime("%Y-%m-%d"),
+        'local_str': _texto('local'),
+        'categoria_str': _texto('categoria'),
+        'descripcion_str': _texto('descripcion').str.slice(0, 30),
+        'ingreso_str': formatear_montos(ingreso, solo_positivos=True),
+        'ingreso_color': np.where(ingreso > 0, AppTheme.INGRESO, AppTheme.TEXT_DISABLED),
+        'egreso_str': formatear_montos(egreso, solo_positivos=True),
+        'egreso_color': np.where(egreso > 0, AppTheme.EGRESO, AppTheme.TEXT_DISABLED),
+        'saldo_str': formatear_montos(saldo),
+        'saldo_color': np.where(saldo >= 0, AppTheme.SALDO_POSITIVO, AppTheme.SALDO_NEGATIVO),
+    }, index=df.index)
+
+
+class FilaMovimiento:
+    """
+    Fila reutilizable de la tabla virtualizada.
+    Se construye una sola vez y luego se re-asigna a distintos registros
+    a medida que el usuario hace scroll.
+    """
+    
+    def __init__(self, on_edit: Callable[[int], None], on_delete: Callable[[int], None]):
+        self.on_edit = on_edit
+        self.on_delete = on_delete
+        self.movimiento_id: Optional[int] = None
+        
+        self.txt_fecha = ft.Text("", size=12, width=90)
+        self.txt_local = ft.Text("", size=12, width=100, overflow=ft.TextOverflow.ELLIPSIS)
+        self.txt_categoria = ft.Text("", size=12, width=120, overflow=ft.TextOverflow.ELLIPSIS)
+        self.txt_descripcion = ft.Text(
+            "", size=12, width=180, overflow=ft.TextOverflow.ELLIPSIS, max_lines=1
+        )
+        self.txt_ingreso = ft.Text("", size=12, width=90, text_align=ft.TextAlign.RIGHT)
+        self.txt_egreso = ft.Text("", size=12, width=90, text_align=ft.TextAlign.RIGHT)
+        self.txt_saldo = ft.Text(
+            "", size=12, width=100, text_align=ft.TextAlign.RIGHT, weight=ft.FontWeight.BOLD
+        )
+        
+        self.control = ft.Container(
+            content=ft.Row([
+                self.txt_fecha,
+                self.txt_local,
+                self.txt_categoria,
+                self.txt_descripcion,
+                self.txt_ingreso,
+                self.txt_egreso,
+                self.txt_saldo,
+                ft.Row([
+                    ft.IconButton(
+                        icon=Icons.EDIT,
+                        icon_size=16,
+                        icon_color=AppTheme.INFO,
+                        tooltip="Editar",
+                        on_click=lambda e: self._on_edit_click(),
+                    ),
+                    ft.IconButton(
+                        icon=Icons.DELETE,
+                        icon_size=16,
+                        icon_color=AppTheme.ERROR,
+                        tooltip="Eliminar",
+                        on_click=lambda e: self._on_delete_click(),
+                    ),
+                ], spacing=0, width=80),
+            ], spacing=8, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+            height=MovimientosTable.ALTO_FILA,
+            padding=ft.Padding.symmetric(horizontal=8),
+            border=ft.border.only(bottom=ft.border.BorderSide(1, AppTheme.DIVIDER)),
+            visible=False,
+        )
+    
+    def asignar(self, vista: Dict[str, np.ndarray], idx: int):
+        """
+        Asigna un registro a la fila reutilizando los controles existentes.
+        
+        Solo consulta valores ya formateados por formatear_movimientos().
+        """
+        self.movimiento_id = int(vista['id'][idx])
+        
+        self.txt_fecha.value = vista['fecha_str'][idx]
+        self.txt_local.value = vista['local_str'][idx]
+        self.txt_categoria.value = vista['categoria_str'][idx]
+        self.txt_descripcion.value = vista['descripcion_str'][idx]
+        self.txt_ingreso.value = vista['ingreso_str'][idx]
+        self.txt_ingreso.color = vista['ingreso_color'][idx]
+        self.txt_egreso.value = vista['egreso_str'][idx]
+        self.txt_egreso.color = vista['egreso_color'][idx]
+        self.txt_saldo.value = vista['saldo_str'][idx]
+        self.txt_saldo.color = vista['saldo_color'][idx]
+        
+        self.control.visible = True
+    
+    def ocultar(self):
+        """Oculta la fila cuando no hay registro que mostrar."""
+        self.movimiento_id = None
+        self.control.visible = False
+    
+    def _on_edit_click(self):
+        """Maneja clic en editar."""
+        if self.on_edit and self.movimiento_id is not None:
+            self.on_edit(self.movimiento_id)
+    
+    def _on_delete_click(self):
+        """Maneja clic en eliminar."""
+        if self.on_delete and self.movimiento_id is not None:
+            self.on_delete(self.movimiento_id)
+
+
 class MovimientosTable:
     """
-    Tabla para mostrar movimientos con saldo acumulado.
-    Incluye ordenamiento, paginación y formato de moneda.
+    Tabla virtualizada para mostrar movimientos con saldo acumulado.
+    
+    Solo se crean controles para la ventana visible más un margen, y se
+    reutilizan al hacer scroll: mostrar 100k filas cuesta lo mismo que 50.
     """
     
+    ALTO_FILA = 40
+    FILAS_VISIBLES = 15
+    FILAS_BUFFER = 10
+    
     def __init__(
         self,
         on_edit: Callable[[int], None] = None,
@@ -27,30 +187,56 @@ class MovimientosTable:
         self.on_delete = on_delete
         self.page = page
         self._data: pd.DataFrame = pd.DataFrame()
+        self._vista: Dict[str, np.ndarray] = {}
         self._control: ft.Control = None
+        self._inicio: int = 0
+        self._pool: List[FilaMovimiento] = []
     
     def build(self) -> ft.Control:
         """Construye y retorna el control."""
-        self.data_table = ft.DataTable(
-            columns=[
-                ft.DataColumn(ft.Text("Fecha", weight=ft.FontWeight.BOLD)),
-                ft.DataColumn(ft.Text("Local", weight=ft.FontWeight.BOLD)),
-                ft.DataColumn(ft.Text("Categoría", weight=ft.FontWeight.BOLD)),
-                ft.DataColumn(ft.Text("Descripción", weight=ft.FontWeight.BOLD)),
-                ft.DataColumn(ft.Text("Ingreso", weight=ft.FontWeight.BOLD), numeric=True),
-                ft.DataColumn(ft.Text("Egreso", weight=ft.FontWeight.BOLD), numeric=True),
-                ft.DataColumn(ft.Text("Saldo", weight=ft.FontWeight.BOLD), numeric=True),
-                ft.DataColumn(ft.Text("", weight=ft.FontWeight.BOLD)),  # Acciones
-            ],
-            rows=[],
+        encabezado = ft.Container(
+            content=ft.Row([
+                ft.Text("Fecha", size=12, weight=ft.FontWeight.BOLD, width=90),
+                ft.Text("Local", size=12, weight=ft.FontWeight.BOLD, width=100),
+                ft.Text("Categoría", size=12, weight=ft.FontWeight.BOLD, width=120),
+                ft.Text("Descripción", size=12, weight=ft.FontWeight.BOLD, width=180),
+                ft.Text("Ingreso", size=12, weight=ft.FontWeight.BOLD, width=90, text_align=ft.TextAlign.RIGHT),
+                ft.Text("Egreso", size=12, weight=ft.FontWeight.BOLD, width=90, text_align=ft.TextAlign.RIGHT),
+                ft.Text("Saldo", size=12, weight=ft.FontWeight.BOLD, width=100, text_align=ft.TextAlign.RIGHT),
+                ft.Text("", width=80),  # Acciones
+            ], spacing=8),
+            height=45,
+            padding=ft.Padding.symmetric(horizontal=8),
+            bgcolor=ft.Colors.GREY_100,
+            border_radius=ft.border_radius.only(top_left=8, top_right=8),
+        )
+        
+        # Pool fijo de filas reutilizables
+        tam_pool = self.FILAS_VISIBLES + 2 * self.FILAS_BUFFER
+        self._pool = [
+            FilaMovimiento(self._on_edit_click, self._on_delete_click)
+            for _ in range(tam_pool)
+        ]
+        
+        # Espaciadores que simulan la altura de las filas fuera de la ventana
+        self.espacio_superior = ft.Container(height=0)
+        self.espacio_inferior = ft.Container(height=0)
+        
+        self.lista = ft.ListView(
+            controls=[self.espacio_superior]
+                     + [fila.control for fila in self._pool]
+                     + [self.espacio_inferior],
+            spacing=0,
+            height=self.ALTO_FILA * self.FILAS_VISIBLES,
+            on_scroll=self._on_scroll,
+            scroll_interval=50,
+        )
+        
+        self.contenedor_tabla = ft.Container(
+            content=ft.Column([encabezado, self.lista], spacing=0),
             border=ft.border.all(1, AppTheme.DIVIDER),
             border_radius=8,
-            vertical_lines=ft.border.BorderSide(1, AppTheme.DIVIDER),
-            horizontal_lines=ft.border.BorderSide(1, AppTheme.DIVIDER),
-            heading_row_color=ft.Colors.GREY_100,
-            heading_row_height=45,
-            data_row_min_height=40,
-            data_row_max_height=50,
+            visible=False,
         )
         
         self.mensaje_vacio = ft.Container(
@@ -66,117 +252,150 @@ class MovimientosTable:
             visible=True,
         )
         
-        return ft.Column([
-            ft.Container(
-                content=self.data_table,
-                visible=False,
-            ),
+        self._control = ft.Column([
+            self.contenedor_tabla,
             self.mensaje_vacio,
-        ], scroll=ft.ScrollMode.AUTO, expand=True)
+        ], expand=True)
+        
+        return self._control
     
     def cargar_datos(self, df: pd.DataFrame):
         """Carga un DataFrame en la tabla."""
-        self._data = df
+        self._data = df.reset_index(drop=True)
+        self._vista = {
+            columna: np.array(valores, dtype=object)
+            for columna, valores in formatear_movimientos(self._data).items()
+        }
+        self._inicio = 0
+        self._actualizar_filas()
+        
+        # Volver al inicio del scroll con los datos nuevos
+        if self.page and not self._data.empty:
+            self.page.run_task(self.lista.scroll_to, offset=0)
+    
+    def liberar(self):
+        """Suelta los datos cargados sin actualizar la UI (al descartar la vista)."""
+        self._data = pd.DataFrame()
+        self._vista = {}
+        for fila in self._pool:
+            fila.ocultar()
+    
+    def actualizar_fila(self, movimiento_id: int, nuevo: dict, delta_saldo: float) -> bool:
+        """
+        Aplica la edición de un movimiento sin recargar la tabla.
+        
+        Actualiza la fila editada y desplaza el saldo de las filas posteriores
+        (las que se muestran encima, por el orden descendente).
+        
+        Returns:
+            False si el movimiento no está en la tabla
+        """
+        pos = self._posicion(movimiento_id)
+        if pos is None:
+            return False
+        
+        for campo in ('descripcion', 'ingreso', 'egreso'):
+            if campo in nuevo and campo in self._data.columns:
+                valor = nuevo[campo]
+                self._data.at[pos, campo] = float(valor or 0) if campo != 'descripcion' else valor
+        
+        if delta_saldo:
+            col_saldo = self._data.columns.get_loc('saldo')
+            self._data.iloc[:pos + 1, col_saldo] += delta_saldo
+            self._reformatear(0, pos + 1)
+        else:
+            self._reformatear(pos, pos + 1)
+        
+        self._actualizar_filas()
+        return True
+    
+    def eliminar_fila(self, movimiento_id: int, delta_saldo: float) -> bool:
+        """
+        Quita un movimiento eliminado sin recargar la tabla.
+        
+        Returns:
+            False si el movimiento no está en la tabla
+        """
+        pos = self._posicion(movimiento_id)
+        if pos is None:
+            return False
+        
+        self._data = self._data.drop(index=pos).reset_index(drop=True)
+        self._vista = {
+            columna: np.delete(valores, pos)
+            for columna, valores in self._vista.items()
+        }
+        
+        if delta_saldo and pos > 0:
+            col_saldo = self._data.columns.get_loc('saldo')
+            self._data.iloc[:pos, col_saldo] += delta_saldo
+            self._reformatear(0, pos)
+        
+        self._inicio = min(self._inicio, max(0, len(self._data) - len(self._pool)))
         self._actualizar_filas()
+        return True
+    
+    def _posicion(self, movimiento_id: int) -> Optional[int]:
+        """Retorna la posición de un movimiento en los datos cargados."""
+        if self._data.empty:
+            return None
+        
+        posiciones = np.flatnonzero(self._vista['id'] == movimiento_id)
+        return int(posiciones[0]) if len(posiciones) else None
+    
+    def _reformatear(self, desde: int, hasta: int):
+        """Recalcula las columnas de presentación de un rango de filas."""
+        parcial = formatear_movimientos(self._data.iloc[desde:hasta])
+        for columna, valores in parcial.items():
+            self._vista[columna][desde:hasta] = valores.to_numpy(dtype=object)
     
     def _actualizar_filas(self):
-        """Actualiza las filas de la tabla."""
+        """Actualiza la ventana visible de la tabla."""
         if self._data.empty:
-            self.data_table.parent.visible = False
+            self.contenedor_tabla.visible = False
             self.mensaje_vacio.visible = True
         else:
-            self.data_table.parent.visible = True
+            self.contenedor_tabla.visible = True
             self.mensaje_vacio.visible = False
-            
-            filas = []
-            for _, row in self._data.iterrows():
-                filas.append(self._crear_fila(row))
-            
-            self.data_table.rows = filas
+            self._renderizar_ventana()
         
         if self.page:
-            self.page.update()
+            self._control.update()
     
-    def _crear_fila(self, row) -> ft.DataRow:
-        """Crea una fila de la tabla a partir de un registro."""
-        # Formato de fecha
-        fecha_str = str(row['fecha']) if 'fecha' in row else ""
-        
-        # Colores según tipo de movimiento
-        ingreso = float(row.get('ingreso', 0))
-        egreso = float(row.get('egreso', 0))
-        saldo = float(row.get('saldo', 0))
-        
-        return ft.DataRow(
-            cells=[
-                ft.DataCell(ft.Text(fecha_str, size=12)),
-                ft.DataCell(ft.Text(str(row.get('local', '')), size=12)),
-                ft.DataCell(ft.Text(str(row.get('categoria', '')), size=12)),
-                ft.DataCell(
-                    ft.Container(
-                        content=ft.Text(
-                            str(row.get('descripcion', ''))[:30], 
-                            size=12,
-                            overflow=ft.TextOverflow.ELLIPSIS,
-                        ),
-                        width=150,
-                    )
-                ),
-                ft.DataCell(self._crear_monto_ingreso(ingreso)),
-                ft.DataCell(self._crear_monto_egreso(egreso)),
-                ft.DataCell(self._crear_monto_saldo(saldo)),
-                ft.DataCell(
-                    ft.Row([
-                        ft.IconButton(
-                            icon=Icons.EDIT,
-                            icon_size=16,
-                            icon_color=AppTheme.INFO,
-                            tooltip="Editar",
-                            on_click=lambda e, id=row['id']: self._on_edit_click(id),
-                        ),
-                        ft.IconButton(
-                            icon=Icons.DELETE,
-                            icon_size=16,
-                            icon_color=AppTheme.ERROR,
-                            tooltip="Eliminar",
-                            on_click=lambda e, id=row['id']: self._on_delete_click(id),
-                        ),
-                    ], spacing=0)
-                ),
-            ],
-        )
+    def _renderizar_ventana(self):
+        """Asigna los registros de la ventana actual a las filas del pool."""
+        total = len(self._data)
+        
+        for i, fila in enumerate(self._pool):
+            idx = self._inicio + i
+            if idx < total:
+                fila.asignar(self._vista, idx)
+            else:
+                fila.ocultar()
+        
+        visibles = min(len(self._pool), max(0, total - self._inicio))
+        self.espacio_superior.height = self._inicio * self.ALTO_FILA
+        self.espacio_inferior.height = (total - self._inicio - visibles) * self.ALTO_FILA
     
-    def _crear_monto_ingreso(self, valor: float) -> ft.Text:
-        """Crea texto formateado para ingreso."""
-        if valor > 0:
-            return ft.Text(
-                f"{valor:,.2f}",
-                size=12,
-                color=AppTheme.INGRESO,
-                weight=ft.FontWeight.W_500,
-            )
-        return ft.Text("-", size=12, color=AppTheme.TEXT_DISABLED)
-    
-    def _crear_monto_egreso(self, valor: float) -> ft.Text:
-        """Crea texto formateado para egreso."""
-        if valor > 0:
-            return ft.Text(
-                f"{valor:,.2f}",
-                size=12,
-                color=AppTheme.EGRESO,
-                weight=ft.FontWeight.W_500,
-            )
-        return ft.Text("-", size=12, color=AppTheme.TEXT_DISABLED)
-    
-    def _crear_monto_saldo(self, valor: float) -> ft.Text:
-        """Crea texto formateado para saldo."""
-        color = AppTheme.SALDO_POSITIVO if valor >= 0 else AppTheme.SALDO_NEGATIVO
-        return ft.Text(
-            f"{valor:,.2f}",
-            size=12,
-            color=color,
-            weight=ft.FontWeight.BOLD,
-        )
+    def _on_scroll(self, e: ft.OnScrollEvent):
+        """Desplaza la ventana de filas cuando el scroll sale del margen."""
+        if self._data.empty:
+            return
+        
+        primera_visible = int(e.pixels // self.ALTO_FILA)
+        
+        # La ventana avanza en bloques de FILAS_BUFFER para no re-asignar en cada evento
+        inicio = max(0, (primera_visible // self.FILAS_BUFFER) * self.FILAS_BUFFER - self.FILAS_BUFFER)
+        inicio = min(inicio, max(0, len(self._data) - len(self._pool)))
+        
+        if inicio == self._inicio:
+            return
+        
+        self._inicio = inicio
+        self._renderizar_ventana()
+        
+        if self.page:
+            self.lista.update()
     
     def _on_edit_click(self, id: int):
         """Maneja clic en editar."""
@@ -5,41 +5,59 @@ Grid de entrada tipo Excel para ingresar múltiples movimientos simultáneamente
 """
 
 import flet as ft
+from collections import deque
 from datetime import date, datetime
-from typing import Callable, Optional, List, Dict
+from typing import Callable, Optional, List, Dict, Iterable, Tuple
 import uuid
 
 from src.ui.theme import AppTheme, Styles, Icons
-from src.logic import MovimientoValidator
+from src.logic import MovimientoValidator, CatalogoNombres, preparar_pegado, AnomaliaService
+from .opciones import ModeloOpciones, OpcionesConfig, get_opciones_config
 
 
 class ExcelGridRow:
-    """Una fila individual del grid de Excel."""
+    """
+    Una fila individual del grid de Excel.
+    
+    Cada edición marca la fila como sucia y recalcula su validación, que
+    queda cacheada hasta el siguiente cambio; al guardar solo se procesan
+    las filas sucias.
+    
+    Los dropdowns solo llevan la opción seleccionada; la lista completa se
+    toma del modelo compartido (OpcionesConfig) cuando el dropdown se enfoca.
+    """
     
     def __init__(
         self,
         row_id: str,
-        hojas: List[Dict],
-        locales: List[Dict],
-        obtener_categorias: Callable[[int], List[Dict]],
+        opciones: OpcionesConfig,
         on_delete: Callable[[str], None],
         page: ft.Page = None,
         default_hoja_id: str = None,
         default_fecha: str = None,
     ):
         self.row_id = row_id
-        self.hojas = hojas
-        self.locales = locales
-        self.obtener_categorias = obtener_categorias
+        self.opciones = opciones
         self.on_delete = on_delete
         self.page = page
         self.default_hoja_id = default_hoja_id
         self.default_fecha = default_fecha or date.today().strftime("%Y-%m-%d")
-        self._categorias_actuales: List[Dict] = []
         self._control: ft.Control = None
+        
+        # Modelo con que se llenó cada dropdown ('hoja', 'local', 'categoria')
+        self._modelos_cargados: Dict[str, ModeloOpciones] = {}
+        
+        self.sucio = False      # Editada desde la creación o el último guardado
+        self.guardada = False   # Guardada y sin cambios posteriores
+        self.advertencia_aceptada = False  # Monto inusual ya advertido al usuario
+        self.duplicado_aceptado = False    # Posible duplicado ya advertido al usuario
+        self._validacion: Optional[tuple] = None  # (datos, es_valido, errores)
     
     def build(self) -> ft.Control:
-        """Construye y retorna la fila."""
+        """Construye y retorna la fila (una sola vez; las filas se reciclan)."""
+        if self._control is not None:
+            return self._control
+        
         # Número de fila
         self.lbl_numero = ft.Text(
             "1",
@@ -51,12 +69,14 @@ class ExcelGridRow:
         
         # Dropdown de Hoja
         self.dd_hoja = ft.Dropdown(
-            options=[ft.dropdown.Option(key=str(h['id']), text=h['nombre']) for h in self.hojas],
+            options=self.opciones.hojas().crear_opciones(solo=self.default_hoja_id or ""),
             value=self.default_hoja_id,
             width=120,
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=0),
             text_size=12,
+            on_select=self._on_editar,
+            on_focus=lambda e: self._cargar_opciones('hoja'),
         )
         
         # Campo de Fecha
@@ -66,16 +86,18 @@ class ExcelGridRow:
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=4),
             text_size=12,
+            on_change=self._on_editar,
         )
         
         # Dropdown de Local
         self.dd_local = ft.Dropdown(
-            options=[ft.dropdown.Option(key=str(l['id']), text=l['nombre']) for l in self.locales],
+            options=[],
             width=120,
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=0),
             text_size=12,
             on_select=self._on_local_change,
+            on_focus=lambda e: self._cargar_opciones('local'),
         )
         
         # Dropdown de Categoría
@@ -85,6 +107,8 @@ class ExcelGridRow:
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=0),
             text_size=12,
+            on_select=self._on_editar,
+            on_focus=lambda e: self._cargar_opciones('categoria'),
         )
         
         # Número de documento
@@ -93,6 +117,7 @@ class ExcelGridRow:
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=4),
             text_size=12,
+            on_change=self._on_editar,
         )
         
         # Responsable
@@ -101,6 +126,7 @@ class ExcelGridRow:
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=4),
             text_size=12,
+            on_change=self._on_editar,
         )
         
         # Descripción
@@ -109,6 +135,7 @@ class ExcelGridRow:
             dense=True,
             content_padding=ft.Padding.symmetric(horizontal=8, vertical=4),
             text_size=12,
+            on_change=self._on_editar,
         )
         
         # Ingreso
@@ -182,18 +209,112 @@ class ExcelGridRow:
         """Establece el número de fila."""
         self.lbl_numero.value = str(numero)
     
+    def reiniciar(self, row_id: str, default_hoja_id: str = None, default_fecha: str = None):
+        """
+        Prepara una fila reciclada para usarla como fila nueva.
+        
+        Conserva los controles ya construidos y solo restablece sus valores.
+        """
+        self.row_id = row_id
+        self.default_hoja_id = default_hoja_id
+        self.default_fecha = default_fecha or date.today().strftime("%Y-%m-%d")
+        self.sucio = False
+        self.guardada = False
+        self.advertencia_aceptada = False
+        self.duplicado_aceptado = False
+        self._validacion = None
+        
+        if self._control is None:
+            return
+        
+        self.dd_hoja.value = self.default_hoja_id
+        self.txt_fecha.value = self.default_fecha
+        self.dd_local.value = None
+        self.dd_categoria.value = None
+        self._opciones_minimas()
+        for campo in (self.txt_doc, self.txt_responsable, self.txt_descripcion,
+                      self.txt_ingreso, self.txt_egreso):
+            campo.value = ""
+        self.estado.bgcolor = AppTheme.DIVIDER
+        self.estado.tooltip = "Pendiente"
+    
+    def cargar_datos(self, datos: dict):
+        """
+        Rellena la fila con datos ya resueltos (p. ej. pegados desde Excel).
+        
+        Args:
+            datos: Campos de la fila con ids y 'errores' de la validación en lote
+        """
+        def _clave(valor) -> Optional[str]:
+            return str(valor) if valor else None
+        
+        self.dd_hoja.value = _clave(datos['hoja_id'])
+        self.txt_fecha.value = datos['fecha']
+        self.dd_local.value = _clave(datos['local_id'])
+        self.dd_categoria.value = _clave(datos['categoria_id'])
+        self._opciones_minimas()
+        
+        self.txt_doc.value = datos['num_documento']
+        self.txt_responsable.value = datos['responsable']
+        self.txt_descripcion.value = datos['descripcion']
+        self.txt_ingreso.value = datos['ingreso']
+        self.txt_egreso.value = datos['egreso']
+        
+        self.sucio = True
+        self.guardada = False
+        self.advertencia_aceptada = False
+        self.duplicado_aceptado = False
+        self._validacion = None
+        
+        # Sin update(): la fila aún no está montada, la envía el contenedor
+        if datos['errores']:
+            self.estado.bgcolor = AppTheme.ERROR
+            self.estado.tooltip = ", ".join(datos['errores'])
+    
+    def _modelo(self, nombre: str) -> ModeloOpciones:
+        """Modelo de opciones vigente para un dropdown de la fila."""
+        if nombre == 'hoja':
+            return self.opciones.hojas()
+        if nombre == 'local':
+            return self.opciones.locales()
+        return self.opciones.categorias(int(self.dd_local.value) if self.dd_local.value else None)
+    
+    def _dropdown(self, nombre: str) -> ft.Dropdown:
+        """Dropdown de la fila por nombre."""
+        return {'hoja': self.dd_hoja, 'local': self.dd_local, 'categoria': self.dd_categoria}[nombre]
+    
+    def _opciones_minimas(self):
+        """Deja en cada dropdown solo la opción seleccionada (sin actualizar la UI)."""
+        for nombre in ('hoja', 'local', 'categoria'):
+            dropdown = self._dropdown(nombre)
+            dropdown.options = self._modelo(nombre).crear_opciones(solo=dropdown.value or "")
+        self._modelos_cargados.clear()
+    
+    def _cargar_opciones(self, nombre: str):
+        """Llena un dropdown con todas las opciones al enfocarlo."""
+        modelo = self._modelo(nombre)
+        if self._modelos_cargados.get(nombre) is modelo:
+            return  # Ya tiene la lista completa de la versión vigente
+        
+        dropdown = self._dropdown(nombre)
+        dropdown.options = modelo.crear_opciones()
+        self._modelos_cargados[nombre] = modelo
+        
+        if self.page:
+            try:
+                dropdown.update()
+            except RuntimeError:
+                pass  # La fila aún no está en la página
+    
     def _on_local_change(self, e):
-        """Cuando cambia el local, actualiza las categorías."""
+        """Cuando cambia el local, limpia la categoría (sus opciones se cargan al enfocarla)."""
         if self.dd_local.value:
-            local_id = int(self.dd_local.value)
-            self._categorias_actuales = self.obtener_categorias(local_id)
-            self.dd_categoria.options = [
-                ft.dropdown.Option(key=str(c['id']), text=c['nombre'])
-                for c in self._categorias_actuales
-            ]
             self.dd_categoria.value = None
+            self.dd_categoria.options = []
+            self._modelos_cargados.pop('categoria', None)
             if self.page:
                 self.dd_categoria.update()
+        self._on_editar()
     
     def _on_ingreso_change(self, e):
         """Si se ingresa un valor en ingreso, limpia egreso."""
@@ -202,6 +323,7 @@ class ExcelGridRow:
             self.txt_egreso.value = ""
             if self.page:
                 self.txt_egreso.update()
+        self._on_editar()
     
     def _on_egreso_change(self, e):
         """Si se ingresa un valor en egreso, limpia ingreso."""
@@ -210,6 +332,39 @@ class ExcelGridRow:
             self.txt_ingreso.value = ""
             if self.page:
                 self.txt_ingreso.update()
+        self._on_editar()
+    
+    def _on_editar(self, e=None):
+        """Marca la fila como modificada y revalida sus datos."""
+        self.sucio = True
+        self.guardada = False
+        self.advertencia_aceptada = False
+        self.duplicado_aceptado = False
+        self._validacion = None
+        
+        _, es_valido, errores = self.validar()
+        
+        # Solo se corrige un indicador ya visible; los errores nuevos se
+        # muestran al guardar para no marcar en rojo una fila a medio escribir
+        if self.estado.bgcolor in (AppTheme.SUCCESS, AppTheme.WARNING) or (
+            self.estado.bgcolor == AppTheme.ERROR and (es_valido or self.esta_vacia())
+        ):
+            self.resetear_estado()
+        elif self.estado.bgcolor == AppTheme.ERROR:
+            self.marcar_error(", ".join(errores))
+    
+    def validar(self) -> tuple:
+        """
+        Valida la fila, reutilizando el resultado si no cambió desde la última vez.
+        
+        Returns:
+            Tupla (datos, es_valido, errores)
+        """
+        if self._validacion is None:
+            datos = self.obtener_datos()
+            es_valido, errores = MovimientoValidator.validar(datos)
+            self._validacion = (datos, es_valido, errores)
+        return self._validacion
     
     def _validar_monto(self, valor_str: str) -> float:
         """Convierte y valida un monto."""
@@ -237,7 +392,7 @@ class ExcelGridRow:
     
     def esta_vacia(self) -> bool:
         """Verifica si la fila está vacía (sin datos significativos)."""
-        datos = self.obtener_datos()
+        datos = self.validar()[0]
         return (
             not datos['local_id'] and
             not datos['categoria_id'] and
@@ -246,52 +401,75 @@ class ExcelGridRow:
             datos['egreso'] == 0
         )
     
-    def marcar_exito(self):
+    def marcar_exito(self, actualizar: bool = True):
         """Marca la fila como guardada exitosamente."""
-        self.estado.bgcolor = AppTheme.SUCCESS
-        self.estado.tooltip = "Guardado"
-        if self.page:
-            self.estado.update()
+        self.sucio = False
+        self.guardada = True
+        self._mostrar_estado(AppTheme.SUCCESS, "Guardado", actualizar)
     
-    def marcar_error(self, mensaje: str):
+    def marcar_error(self, mensaje: str, actualizar: bool = True):
         """Marca la fila con error."""
-        self.estado.bgcolor = AppTheme.ERROR
-        self.estado.tooltip = mensaje
-        if self.page:
-            self.estado.update()
+        self._mostrar_estado(AppTheme.ERROR, mensaje, actualizar)
     
-    def resetear_estado(self):
+    def marcar_advertencia(self, mensaje: str, actualizar: bool = True):
+        """Marca la fila con una advertencia que no impide guardarla."""
+        self._mostrar_estado(AppTheme.WARNING, mensaje, actualizar)
+    
+    def resetear_estado(self, actualizar: bool = True):
         """Resetea el indicador de estado."""
-        self.estado.bgcolor = AppTheme.DIVIDER
-        self.estado.tooltip = "Pendiente"
-        if self.page:
-            self.estado.update()
+        self._mostrar_estado(AppTheme.DIVIDER, "Pendiente", actualizar)
+    
+    def _mostrar_estado(self, color: str, tooltip: str, actualizar: bool):
+        """
+        Cambia el indicador de estado solo si es distinto al actual.
+        
+        Con actualizar=False el cambio viaja en la siguiente actualización
+        del contenedor de filas.
+        """
+        if self.estado.bgcolor == color and self.estado.tooltip == tooltip:
+            return
+        
+        self.estado.bgcolor = color
+        self.estado.tooltip = tooltip
+        if actualizar and self.page:
+            try:
+                self.estado.update()
+            except RuntimeError:
+                pass  # La fila aún no está en la página
 
 
 class ExcelGrid:
     """
     Grid tipo Excel para ingreso masivo de movimientos.
     Permite agregar múltiples filas y guardarlas todas juntas.
+    
+    Las filas eliminadas se reciclan y las altas/bajas se envían al cliente
+    como una sola actualización del contenedor de filas.
     """
     
+    # Filas eliminadas que se conservan para reutilizar sus controles
+    MAX_FILAS_RECICLADAS = 100
+    
+    # Filas pegadas que se dibujan de una vez; el resto al hacer scroll
+    FILAS_POR_BLOQUE = 100
+    
     def __init__(
         self,
-        hojas: List[Dict],
-        locales: List[Dict],
-        on_submit_all: Callable[[List[dict]], None],
-        obtener_categorias: Callable[[int], List[Dict]],
+        on_submit_all: Callable[[List[dict]], Tuple[List[str], Dict[str, str], Dict[str, str]]],
         page: ft.Page = None,
         filas_iniciales: int = 5,
     ):
-        self.hojas = hojas
-        self.locales = locales
         self.on_submit_all = on_submit_all
-        self.obtener_categorias = obtener_categorias
+        self.opciones = get_opciones_config()
+        self.anomalias = AnomaliaService()
         self.page = page
         self.filas_iniciales = filas_iniciales
         
         self._filas: Dict[str, ExcelGridRow] = {}
         self._filas_orden: List[str] = []
+        self._recicladas: deque = deque()
+        self._pendientes: deque = deque()  # Filas pegadas aún no dibujadas
+        self._catalogo: Optional[CatalogoNombres] = None
         self._control: ft.Control = None
     
     def build(self) -> ft.Control:
@@ -321,16 +499,16 @@ class ExcelGrid:
             border_radius=ft.border_radius.only(top_left=8, top_right=8),
         )
         
-        # Contenedor de filas
-        self.filas_container = ft.Column(
+        # Contenedor de filas (ListView: el cliente solo dibuja las visibles)
+        self.filas_container = ft.ListView(
             controls=[],
             spacing=0,
-            scroll=ft.ScrollMode.AUTO,
+            on_scroll=self._on_scroll,
+            scroll_interval=100,
         )
         
         # Agregar filas iniciales
-        for _ in range(self.filas_iniciales):
-            self._agregar_fila()
+        self.agregar_filas(self.filas_iniciales, actualizar=False)
         
         # Barra de acciones
         self.barra_acciones = ft.Container(
@@ -348,6 +526,14 @@ class ExcelGrid:
                         bgcolor=AppTheme.BACKGROUND,
                         color=AppTheme.PRIMARY,
                     ),
+                    ft.Button(
+                        content=ft.Text("📋 Pegar desde Excel"),
+                        on_click=self._on_pegar,
+                        bgcolor=AppTheme.BACKGROUND,
+                        color=AppTheme.PRIMARY,
+                        tooltip="Columnas: Hoja, Fecha, Local, Categoría, N° Doc, "
+                                "Responsable, Descripción, Ingreso, Egreso",
+                    ),
                     ft.Container(expand=True),
                     ft.Text("", size=12, color=AppTheme.TEXT_SECONDARY),  # Contador
                     ft.Button(
@@ -402,99 +588,254 @@ class ExcelGrid:
         self._actualizar_numeros()
         return self._control
     
-    def _agregar_fila(self, default_hoja_id: str = None, default_fecha: str = None):
-        """Agrega una nueva fila al grid."""
-        row_id = str(uuid.uuid4())
-        
+    def agregar_filas(
+        self,
+        cantidad: int = 1,
+        default_hoja_id: str = None,
+        default_fecha: str = None,
+        actualizar: bool = True,
+    ) -> List[ExcelGridRow]:
+        """
+        Agrega filas al final del grid.
+        
+        Args:
+            cantidad: Número de filas a agregar
+            default_hoja_id: Hoja por defecto (si no, la de la última fila)
+            default_fecha: Fecha por defecto (si no, la de la última fila)
+            actualizar: Si es False, el llamador hace la actualización
+        
+        Returns:
+            Las filas agregadas
+        """
         # Obtener valores por defecto de la última fila si existe
         if self._filas_orden and not default_hoja_id:
             ultima_fila = self._filas[self._filas_orden[-1]]
             default_hoja_id = ultima_fila.dd_hoja.value
             default_fecha = ultima_fila.txt_fecha.value
         
-        fila = ExcelGridRow(
+        desde = len(self._filas_orden)
+        nuevas = []
+        for _ in range(cantidad):
+            fila = self._obtener_fila(default_hoja_id, default_fecha)
+            self._filas[fila.row_id] = fila
+            self._filas_orden.append(fila.row_id)
+            self.filas_container.controls.append(fila.build())
+            nuevas.append(fila)
+        
+        self._actualizar_numeros(desde)
+        
+        if actualizar:
+            self._actualizar_filas()
+        return nuevas
+    
+    def eliminar_filas(self, row_ids: Iterable[str], minimo: int = 1,
+                       actualizar: bool = True) -> int:
+        """
+        Quita filas del grid y las recicla.
+        
+        Args:
+            row_ids: Filas a quitar (en orden de preferencia)
+            minimo: Filas que deben quedar como mínimo en el grid
+            actualizar: Si es False, el llamador hace la actualización
+        
+        Returns:
+            Número de filas quitadas
+        """
+        quitar = [r for r in dict.fromkeys(row_ids) if r in self._filas]
+        quitar = set(quitar[:max(0, len(self._filas) - minimo)])
+        if not quitar:
+            return 0
+        
+        desde = None
+        orden = []
+        for i, row_id in enumerate(self._filas_orden):
+            if row_id in quitar:
+                if desde is None:
+                    desde = i
+                self._reciclar(self._filas.pop(row_id))
+            else:
+                orden.append(row_id)
+        
+        self._filas_orden = orden
+        self.filas_container.controls = [self._filas[r].build() for r in orden]
+        self._actualizar_numeros(desde)
+        
+        if actualizar:
+            self._actualizar_filas()
+        return len(quitar)
+    
+    def _obtener_fila(self, default_hoja_id: str = None, default_fecha: str = None) -> ExcelGridRow:
+        """Reutiliza una fila reciclada o crea una nueva."""
+        row_id = str(uuid.uuid4())
+        
+        if self._recicladas:
+            fila = self._recicladas.popleft()
+            fila.reiniciar(row_id, default_hoja_id, default_fecha)
+            return fila
+        
+        return ExcelGridRow(
             row_id=row_id,
-            hojas=self.hojas,
-            locales=self.locales,
-            obtener_categorias=self.obtener_categorias,
+            opciones=self.opciones,
             on_delete=self._eliminar_fila,
             page=self.page,
             default_hoja_id=default_hoja_id,
             default_fecha=default_fecha,
         )
+    
+    def _reciclar(self, fila: ExcelGridRow):
+        """Guarda una fila quitada para reutilizar sus controles."""
+        if len(self._recicladas) < self.MAX_FILAS_RECICLADAS:
+            self._recicladas.append(fila)
+    
+    def _actualizar_filas(self):
+        """Envía al cliente solo el contenedor de filas."""
+        try:
+            self.filas_container.update()
+        except RuntimeError:
+            pass  # El grid aún no está en la página
+    
+    def _agregar_fila(self, default_hoja_id: str = None, default_fecha: str = None):
+        """Agrega una nueva fila al grid."""
+        self._materializar_pendientes(actualizar=False)
+        self.agregar_filas(1, default_hoja_id, default_fecha)
+    
+    def _agregar_multiples_filas(self, cantidad: int):
+        """Agrega múltiples filas."""
+        self._materializar_pendientes(actualizar=False)
+        self.agregar_filas(cantidad)
+    
+    async def _on_pegar(self, e):
+        """Pega el contenido del portapapeles como filas nuevas."""
+        texto = await self.page.clipboard.get() if self.page else None
+        self.pegar_texto(texto or "")
+    
+    def pegar_texto(self, texto: str) -> int:
+        """
+        Convierte texto separado por tabulaciones en filas del grid.
+        
+        Los nombres se resuelven con el catálogo cacheado y todas las filas
+        se validan en lote; se dibuja un primer bloque y el resto a medida
+        que se hace scroll.
+        
+        Returns:
+            Número de filas pegadas
+        """
+        default_hoja_id = default_fecha = None
+        if self._filas_orden:
+            ultima_fila = self._filas[self._filas_orden[-1]]
+            default_hoja_id = ultima_fila.dd_hoja.value
+            default_fecha = ultima_fila.txt_fecha.value
         
-        self._filas[row_id] = fila
-        self._filas_orden.append(row_id)
-        self.filas_container.controls.append(fila.build())
+        if self._catalogo is None:
+            self._catalogo = CatalogoNombres()
+        
+        filas = preparar_pegado(texto, self._catalogo, default_hoja_id, default_fecha)
+        if not filas:
+            self._mostrar_mensaje("⚠️ El portapapeles no tiene filas para pegar", AppTheme.WARNING)
+            return 0
+        
+        # Las filas vacías del final se reemplazan por las pegadas
+        vacias = []
+        for row_id in reversed(self._filas_orden):
+            if not self._filas[row_id].esta_vacia():
+                break
+            vacias.append(row_id)
+        self.eliminar_filas(vacias, minimo=0, actualizar=False)
+        
+        self._pendientes.extend(filas)
+        self._renderizar_pendientes(self.FILAS_POR_BLOQUE, actualizar=False)
+        self._actualizar_filas()
+        
+        con_errores = sum(1 for f in filas if f['errores'])
+        if con_errores:
+            self._mostrar_mensaje(
+                f"📋 {len(filas)} fila(s) pegada(s); {con_errores} con errores (indicador rojo)",
+                AppTheme.WARNING,
+            )
+        else:
+            self._mostrar_mensaje(f"📋 {len(filas)} fila(s) pegada(s)", AppTheme.SUCCESS)
+        return len(filas)
+    
+    def _renderizar_pendientes(self, cantidad: int, actualizar: bool = True):
+        """Dibuja las siguientes filas pegadas pendientes."""
+        cantidad = min(cantidad, len(self._pendientes))
+        if cantidad == 0:
+            return
         
-        self._actualizar_numeros()
+        bloque = [self._pendientes.popleft() for _ in range(cantidad)]
+        filas = self.agregar_filas(cantidad, actualizar=False)
+        for fila, datos in zip(filas, bloque):
+            fila.cargar_datos(datos)
         
-        if self.page:
-            self.page.update()
+        if actualizar:
+            self._actualizar_filas()
     
-    def _agregar_multiples_filas(self, cantidad: int):
-        """Agrega múltiples filas."""
-        for _ in range(cantidad):
-            self._agregar_fila()
+    def _materializar_pendientes(self, actualizar: bool = True):
+        """Dibuja todas las filas pegadas pendientes (antes de guardar o agregar)."""
+        self._renderizar_pendientes(len(self._pendientes), actualizar)
+    
+    def _on_scroll(self, e: ft.OnScrollEvent):
+        """Dibuja el siguiente bloque de filas pegadas al acercarse al final."""
+        if self._pendientes and e.extent_after < 400:
+            self._renderizar_pendientes(self.FILAS_POR_BLOQUE)
     
     def _eliminar_fila(self, row_id: str):
         """Elimina una fila del grid."""
-        if row_id in self._filas and len(self._filas) > 1:
-            # Encontrar índice
-            idx = self._filas_orden.index(row_id)
-            
-            # Eliminar de las estructuras
-            del self._filas[row_id]
-            self._filas_orden.remove(row_id)
-            del self.filas_container.controls[idx]
-            
-            self._actualizar_numeros()
-            
-            if self.page:
-                self.page.update()
+        self.eliminar_filas([row_id])
     
-    def _actualizar_numeros(self):
-        """Actualiza los números de fila."""
-        for i, row_id in enumerate(self._filas_orden):
-            self._filas[row_id].set_numero(i + 1)
+    def _actualizar_numeros(self, desde: int = 0):
+        """Actualiza los números de fila a partir de una posición."""
+        for i in range(desde, len(self._filas_orden)):
+            self._filas[self._filas_orden[i]].set_numero(i + 1)
     
     def _limpiar_todo(self, e):
         """Limpia todas las filas y deja solo las iniciales."""
-        # Limpiar estructuras
+        self._pendientes.clear()
+        self.eliminar_filas(list(self._filas_orden), minimo=0, actualizar=False)
+        self.agregar_filas(self.filas_iniciales, actualizar=False)
+        self._actualizar_filas()
+        
+        self._ocultar_mensaje()
+    
+    def liberar(self):
+        """Suelta todas las filas sin actualizar la UI (al descartar la vista)."""
         self._filas.clear()
         self._filas_orden.clear()
+        self._recicladas.clear()
+        self._pendientes.clear()
         self.filas_container.controls.clear()
-        
-        # Agregar filas iniciales nuevas
-        for _ in range(self.filas_iniciales):
-            self._agregar_fila()
-        
-        self._ocultar_mensaje()
-        
-        if self.page:
-            self.page.update()
     
     def _guardar_todo(self, e):
-        """Valida y guarda todos los movimientos."""
-        # Recolectar datos de filas no vacías
+        """Valida y guarda los movimientos de las filas modificadas."""
+        self._materializar_pendientes(actualizar=False)
+        
+        # Solo filas sucias: las guardadas o sin tocar no se releen
         movimientos = []
         errores_filas = []
+        advertidas = 0
         
         for row_id in self._filas_orden:
             fila = self._filas[row_id]
-            fila.resetear_estado()
+            if not fila.sucio or fila.esta_vacia():
+                continue
             
-            if not fila.esta_vacia():
-                datos = fila.obtener_datos()
-                
-                # Validar
-                es_valido, errores = MovimientoValidator.validar(datos)
-                
-                if es_valido:
-                    movimientos.append(datos)
+            datos, es_valido, errores = fila.validar()
+            
+            if es_valido:
+                advertencia = self._advertencia_monto(fila, datos)
+                if advertencia:
+                    fila.marcar_advertencia(advertencia, actualizar=False)
+                    fila.advertencia_aceptada = True
+                    advertidas += 1
                 else:
-                    fila.marcar_error(", ".join(errores))
-                    errores_filas.append((fila.lbl_numero.value, errores))
+                    fila.resetear_estado(actualizar=False)
+                movimientos.append(dict(datos, permitir_duplicado=fila.duplicado_aceptado))
+            else:
+                fila.marcar_error(", ".join(errores), actualizar=False)
+                errores_filas.append((fila.lbl_numero.value, errores))
+        
+        # Todos los indicadores cambiados viajan en una sola actualización
+        self._actualizar_filas()
         
         if errores_filas:
             # Mostrar errores
@@ -506,16 +847,64 @@ class ExcelGrid:
             self._mostrar_mensaje("⚠️ No hay movimientos para guardar", AppTheme.WARNING)
             return
         
-        # Llamar callback con todos los movimientos
+        if advertidas:
+            msg = (f"⚠️ {advertidas} egreso(s) inusual(es) para su hoja y categoría. "
+                   "Revise los indicadores amarillos y presione Guardar de nuevo para confirmar.")
+            self._mostrar_mensaje(msg, AppTheme.WARNING)
+            return
+        
+        # Llamar callback con todos los movimientos; retorna por row_id las
+        # filas guardadas, el error de las que fallaron y la advertencia de
+        # las que no se guardaron por parecer duplicadas
         if self.on_submit_all:
-            self.on_submit_all(movimientos)
+            guardadas, errores, duplicadas = self.on_submit_all(movimientos)
+            guardadas = set(guardadas)
             
-            # Marcar filas guardadas como exitosas
+            # Solo las filas guardadas dejan de estar pendientes; las que
+            # fallaron quedan en rojo y las duplicadas en amarillo, y se
+            # vuelven a enviar al presionar Guardar de nuevo
             for mov in movimientos:
-                if mov['row_id'] in self._filas:
-                    self._filas[mov['row_id']].marcar_exito()
+                fila = self._filas.get(mov['row_id'])
+                if fila is None:
+                    continue
+                if mov['row_id'] in guardadas:
+                    fila.marcar_exito(actualizar=False)
+                elif mov['row_id'] in duplicadas:
+                    fila.marcar_advertencia(duplicadas[mov['row_id']], actualizar=False)
+                    fila.duplicado_aceptado = True
+                else:
+                    fila.marcar_error(errores.get(mov['row_id'], "No se guardó"), actualizar=False)
+            self._actualizar_filas()
             
-            self._mostrar_mensaje(f"✅ {len(movimientos)} movimiento(s) guardado(s)", AppTheme.SUCCESS)
+            no_guardadas = len(movimientos) - len(guardadas) - len(duplicadas)
+            if no_guardadas:
+                msg = (f"❌ {no_guardadas} movimiento(s) no se guardaron"
+                       f"{f' ({len(guardadas)} sí)' if guardadas else ''}. "
+                       "Revise los indicadores rojos.")
+                self._mostrar_mensaje(msg, AppTheme.ERROR)
+            elif duplicadas:
+                msg = (f"⚠️ {len(duplicadas)} movimiento(s) parecen ya registrados y no se guardaron. "
+                       "Revise los indicadores amarillos y presione Guardar de nuevo para confirmar.")
+                self._mostrar_mensaje(msg, AppTheme.WARNING)
+            else:
+                self._mostrar_mensaje(f"✅ {len(guardadas)} movimiento(s) guardado(s)", AppTheme.SUCCESS)
+    
+    def _advertencia_monto(self, fila: ExcelGridRow, datos: dict) -> Optional[str]:
+        """
+        Texto de advertencia si el egreso de la fila es inusualmente alto.
+        
+        Usa las estadísticas en memoria, sin consultar la historia; cada
+        fila se advierte una sola vez mientras no se edite.
+        """
+        if fila.advertencia_aceptada or not datos['egreso']:
+            return None
+        
+        puntaje = self.anomalias.evaluar_monto(datos)
+        if puntaje is None:
+            return None
+        
+        return (f"Egreso inusual: {puntaje['z']:.1f} desviaciones sobre el promedio "
+                f"de {puntaje['media']:,.2f} ({puntaje['n']} movimientos)")
     
     def _mostrar_mensaje(self, texto: str, color: str):
         """Muestra un mensaje de estado."""
@@ -534,25 +923,14 @@ class ExcelGrid:
     
     def limpiar_guardados(self):
         """Limpia las filas que fueron guardadas exitosamente."""
-        filas_a_eliminar = []
-        
-        for row_id in self._filas_orden:
-            fila = self._filas[row_id]
-            if fila.estado.bgcolor == AppTheme.SUCCESS:
-                filas_a_eliminar.append(row_id)
-        
-        for row_id in filas_a_eliminar:
-            if len(self._filas) > 1:
-                idx = self._filas_orden.index(row_id)
-                del self._filas[row_id]
-                self._filas_orden.remove(row_id)
-                del self.filas_container.controls[idx]
+        guardadas = [
+            row_id for row_id in self._filas_orden
+            if self._filas[row_id].guardada
+        ]
+        self.eliminar_filas(guardadas, actualizar=False)
         
         # Si quedó muy pocas filas, agregar más
-        while len(self._filas) < 3:
-            self._agregar_fila()
+        if len(self._filas) < 3:
+            self.agregar_filas(3 - len(self._filas), actualizar=False)
         
-        self._actualizar_numeros()
-        
-        if self.page:
-            self.page.update()
+        self._actualizar_filas()
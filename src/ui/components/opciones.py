@@ -0,0 +1,108 @@
+"""
+ConSmart - Modelos de Opciones
+==============================
+Opciones de hojas, locales y categorías compartidas por los dropdowns del grid.
+"""
+
+import flet as ft
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.database import get_versiones
+from src.database.versiones import VersionesDatos
+from src.logic import CatalogoNombres
+
+
+class ModeloOpciones:
+    """
+    Lista inmutable de opciones (clave, texto) que referencian todas las filas.
+    
+    Un control de Flet solo puede tener un padre, así que los ft.dropdown.Option
+    se crean a partir del modelo cuando un dropdown los necesita: solo la
+    opción seleccionada al dibujar la fila, y la lista completa al enfocarlo.
+    """
+    
+    __slots__ = ("pares", "_textos")
+    
+    def __init__(self, pares: Iterable[Tuple[str, str]]):
+        self.pares: Tuple[Tuple[str, str], ...] = tuple(pares)
+        self._textos: Dict[str, str] = dict(self.pares)
+    
+    def __len__(self) -> int:
+        return len(self.pares)
+    
+    def crear_opciones(self, solo: Optional[str] = None) -> List[ft.dropdown.Option]:
+        """
+        Crea los controles Option del modelo.
+        
+        Args:
+            solo: Si se indica, crea únicamente la opción con esa clave
+        
+        Returns:
+            Lista de opciones (vacía si la clave no existe)
+        """
+        if solo is not None:
+            texto = self._textos.get(solo)
+            return [ft.dropdown.Option(key=solo, text=texto)] if texto is not None else []
+        return [ft.dropdown.Option(key=clave, text=texto) for clave, texto in self.pares]
+
+
+SIN_OPCIONES = ModeloOpciones(())
+
+
+class OpcionesConfig:
+    """
+    Singleton con los modelos de opciones de la configuración.
+    
+    Se construyen una sola vez por versión de la configuración (hojas,
+    locales, categorías) y se comparten entre todas las filas y vistas.
+    """
+    
+    _instance: Optional['OpcionesConfig'] = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._modelos = None
+        return cls._instance
+    
+    def _obtener(self) -> tuple:
+        """Retorna (hojas, locales, categorias_por_local) de la versión vigente."""
+        version = get_versiones().version(VersionesDatos.CONFIG)
+        
+        with self._lock:
+            if self._modelos is None or self._modelos[0] != version:
+                hojas, locales, categorias = CatalogoNombres().listas()
+                
+                def _modelo(filas: List[Dict]) -> ModeloOpciones:
+                    return ModeloOpciones((str(f['id']), f['nombre']) for f in filas)
+                
+                self._modelos = (
+                    version,
+                    _modelo(hojas),
+                    _modelo(locales),
+                    {local_id: _modelo(filas) for local_id, filas in categorias.items()},
+                )
+            
+            return self._modelos[1:]
+    
+    def hojas(self) -> ModeloOpciones:
+        """Opciones de hojas/cuentas activas."""
+        return self._obtener()[0]
+    
+    def locales(self) -> ModeloOpciones:
+        """Opciones de locales activos."""
+        return self._obtener()[1]
+    
+    def categorias(self, local_id: Optional[int]) -> ModeloOpciones:
+        """Opciones de categorías de un local."""
+        if not local_id:
+            return SIN_OPCIONES
+        return self._obtener()[2].get(local_id, SIN_OPCIONES)
+
+
+# Instancia global
+def get_opciones_config() -> OpcionesConfig:
+    """Obtiene los modelos de opciones compartidos."""
+    return OpcionesConfig()
@@ -1,13 +1,23 @@
 """
 Vistas de ConSmart
+
+Cada vista se importa la primera vez que se usa (ver src.carga_diferida).
 """
 
-from .entry_view import EntryView
-from .history_view import HistoryView
-from .admin_view import AdminView
-from .dashboard_view import DashboardView
-from .login_view import LoginView
-from .usuarios_view import UsuariosView, RolesInfoView
+from src.carga_diferida import exportar_bajo_demanda
+
+__getattr__ = exportar_bajo_demanda(__name__, {
+    "EntryView": ".entry_view",
+    "HistoryView": ".history_view",
+    "AdminView": ".admin_view",
+    "DashboardView": ".dashboard_view",
+    "LoginView": ".login_view",
+    "UsuariosView": ".usuarios_view",
+    "RolesInfoView": ".usuarios_view",
+    "RegistroVistas": ".registro_vistas",
+    "version_datos_general": ".registro_vistas",
+    "version_datos_config": ".registro_vistas",
+})
 
 __all__ = [
     "EntryView",
@@ -17,4 +27,7 @@ __all__ = [
     "LoginView",
     "UsuariosView",
     "RolesInfoView",
+    "RegistroVistas",
+    "version_datos_general",
+    "version_datos_config",
 ]
@@ -114,6 +114,19 @@ class AdminView:
             self.contenido,
         ], expand=True)
     
+    def refresh(self):
+        """Recarga las listas de configuración (vista reutilizada)."""
+        if not hasattr(self, 'lista_hojas'):
+            return
+        
+        self._cargar_hojas()
+        self._cargar_locales()
+        try:
+            self.lista_hojas.update()
+            self.lista_locales.update()
+        except RuntimeError:
+            pass
+    
     def _on_tab_change(self, e):
         """Cambia el contenido según el tab seleccionado."""
         idx = self.tabs.selected_index
@@ -8,7 +8,9 @@ import flet as ft
 from datetime import date, timedelta
 
 from src.ui.theme import AppTheme, Styles, Icons
-from src.logic import BalanceCalculator, ConfigService
+from src.logic import (
+    BalanceCalculator, ConfigService, CargadorSaldos, ConsolidacionService, ProyeccionService,
+)
 
 
 class DashboardView:
@@ -20,9 +22,20 @@ class DashboardView:
         self.page = page
         self.calculator = BalanceCalculator()
         self.config_service = ConfigService()
+        self.cargador = CargadorSaldos()
+        self.consolidacion = ConsolidacionService()
+        self.proyeccion = ProyeccionService()
+        self._tarjetas: dict = {}
+        self._saldos: dict = {}
     
     def build(self) -> ft.Control:
         """Construye y retorna el control."""
+        # Total en soles de todas las cuentas (se completa al llegar los saldos)
+        self.txt_consolidado = ft.Text("", size=13, color=AppTheme.TEXT_SECONDARY, visible=False)
+        self.contenedor_proyeccion = ft.Container(padding=ft.Padding.symmetric(vertical=16))
+        self.contenedor_saldos = ft.Container(content=self._crear_grid_saldos())
+        self._cargar_proyeccion()
+        
         return ft.Column([
             ft.Container(
                 content=ft.Text("🏠 Dashboard", **Styles.titulo_pagina()),
@@ -31,7 +44,14 @@ class DashboardView:
             
             # Resumen de saldos
             ft.Text("Saldos de Cuentas", **Styles.subtitulo()),
-            self._crear_grid_saldos(),
+            self.contenedor_saldos,
+            self.txt_consolidado,
+            
+            ft.Divider(height=32),
+            
+            # Proyección de saldos a 30/60/90 días
+            ft.Text("Proyección de Saldos", **Styles.subtitulo()),
+            self.contenedor_proyeccion,
             
             ft.Divider(height=32),
             
@@ -40,21 +60,51 @@ class DashboardView:
             self._crear_acciones_rapidas(),
         ], expand=True, scroll=ft.ScrollMode.AUTO)
     
+    def refresh(self):
+        """Recarga las tarjetas cuando cambiaron los datos (vista reutilizada)."""
+        self.contenedor_saldos.content = self._crear_grid_saldos()
+        self._cargar_proyeccion()
+        try:
+            self.contenedor_saldos.update()
+            self.contenedor_proyeccion.update()
+        except RuntimeError:
+            pass
+    
+    def dispose(self):
+        """Libera las tarjetas; los saldos que lleguen después se ignoran."""
+        self._tarjetas = {}
+        self.contenedor_saldos.content = None
+        self.contenedor_proyeccion.content = None
+    
     def _crear_grid_saldos(self) -> ft.Control:
-        """Crea el grid con las tarjetas de saldo."""
-        saldos = self.calculator.obtener_saldos_todas_cuentas()
+        """
+        Crea el grid con las tarjetas de saldo.
+        
+        Las tarjetas se muestran de inmediato (con el último saldo conocido si
+        lo hay) y cada una se completa cuando termina su consulta en segundo plano.
+        """
+        hojas = self.config_service.obtener_hojas()
         
         tarjetas = []
-        for cuenta in saldos:
-            moneda = "S/" if cuenta['moneda'] == 'PEN' else "$"
-            color = AppTheme.SALDO_POSITIVO if cuenta['saldo'] >= 0 else AppTheme.SALDO_NEGATIVO
+        self._tarjetas = {}
+        self._saldos = {}
+        for cuenta in hojas:
             tipo_icon = Icons.ACCOUNT if cuenta['tipo'] == 'banco' else Icons.MONEY
+            saldo, vigente = self.cargador.saldo_conocido(cuenta['id'])
+            
+            txt_saldo = ft.Text("...", size=22, weight=ft.FontWeight.BOLD, color=AppTheme.TEXT_DISABLED)
+            if saldo is not None:
+                self._mostrar_saldo(cuenta, txt_saldo, saldo)
+            
+            indicador = ft.ProgressRing(width=12, height=12, stroke_width=2, visible=not vigente)
+            self._tarjetas[cuenta['id']] = (cuenta, txt_saldo, indicador)
             
             tarjeta = ft.Container(
                 content=ft.Column([
                     ft.Row([
                         ft.Icon(tipo_icon, color=AppTheme.PRIMARY, size=20),
                         ft.Text(cuenta['nombre'], weight=ft.FontWeight.W_600),
+                        indicador,
                     ]),
                     ft.Text(
                         cuenta['tipo'].capitalize(),
@@ -62,12 +112,7 @@ class DashboardView:
                         color=AppTheme.TEXT_SECONDARY,
                     ),
                     ft.Container(height=8),
-                    ft.Text(
-                        f"{moneda} {cuenta['saldo']:,.2f}",
-                        size=22,
-                        weight=ft.FontWeight.BOLD,
-                        color=color,
-                    ),
+                    txt_saldo,
                 ]),
                 padding=16,
                 bgcolor=ft.Colors.WHITE,
@@ -87,11 +132,126 @@ class DashboardView:
                 padding=20,
             )
         
+        # Consultas en paralelo; cada tarjeta se actualiza al llegar su saldo
+        self.cargador.cargar(list(self._tarjetas.keys()), self._on_saldo_cargado)
+        
         return ft.Container(
             content=ft.Row(tarjetas, wrap=True, spacing=16, run_spacing=16),
             padding=ft.Padding.symmetric(vertical=16),
         )
     
+    def _mostrar_saldo(self, cuenta: dict, txt_saldo: ft.Text, saldo: float):
+        """Escribe un saldo en la tarjeta de una cuenta."""
+        moneda = "S/" if cuenta['moneda'] == 'PEN' else "$"
+        txt_saldo.value = f"{moneda} {saldo:,.2f}"
+        txt_saldo.color = AppTheme.SALDO_POSITIVO if saldo >= 0 else AppTheme.SALDO_NEGATIVO
+    
+    def _on_saldo_cargado(self, hoja_id: int, saldo: float):
+        """Completa la tarjeta de una cuenta cuando llega su saldo."""
+        if hoja_id not in self._tarjetas:
+            return
+        
+        cuenta, txt_saldo, indicador = self._tarjetas[hoja_id]
+        self._mostrar_saldo(cuenta, txt_saldo, saldo)
+        indicador.visible = False
+        self._saldos[hoja_id] = saldo
+        
+        try:
+            txt_saldo.update()
+            indicador.update()
+        except RuntimeError:
+            pass  # Aún no está en la página; se enviará con el primer render
+        
+        self._actualizar_consolidado()
+    
+    def _actualizar_consolidado(self):
+        """Muestra el total en soles cuando llegaron los saldos de todas las cuentas."""
+        tarjetas = self._tarjetas
+        if not tarjetas or len(self._saldos) < len(tarjetas):
+            return
+        
+        consolidado = self.consolidacion.consolidar_saldos(
+            (cuenta['moneda'], self._saldos[hoja_id])
+            for hoja_id, (cuenta, _, _) in tarjetas.items()
+        )
+        
+        texto = f"Total consolidado: S/ {consolidado['total_pen']:,.2f}"
+        if consolidado['tipo_cambio'] is not None:
+            texto += (f"  (T.C. compra {consolidado['tipo_cambio']:.3f} del "
+                      f"{consolidado['fecha_tipo_cambio'].strftime('%d/%m/%Y')})")
+        if consolidado['sin_convertir']:
+            texto += (f"  ⚠️ {consolidado['sin_convertir']} cuenta(s) en moneda "
+                      f"extranjera sin tipo de cambio registrado")
+        
+        self.txt_consolidado.value = texto
+        self.txt_consolidado.visible = True
+        try:
+            self.txt_consolidado.update()
+        except RuntimeError:
+            pass
+    
+    def _cargar_proyeccion(self):
+        """Lanza la proyección de todas las cuentas en segundo plano."""
+        if not self._tarjetas:
+            self.contenedor_proyeccion.content = None
+            return
+        
+        self.contenedor_proyeccion.content = ft.Text(
+            "Calculando proyección...", size=13, color=AppTheme.TEXT_SECONDARY,
+        )
+        self.proyeccion.proyectar_en_segundo_plano(
+            self._on_proyeccion, hoja_ids=list(self._tarjetas.keys()),
+        )
+    
+    def _on_proyeccion(self, proyecciones: dict):
+        """Muestra la tabla de saldos proyectados con su intervalo."""
+        tarjetas = self._tarjetas
+        if not tarjetas or not proyecciones:
+            return
+        
+        horizontes = list(next(iter(proyecciones.values()))['horizontes'])
+        
+        def _celda(texto: str, ancho: int, **kwargs) -> ft.Control:
+            return ft.Container(content=ft.Text(texto, **kwargs), width=ancho)
+        
+        filas = [ft.Row([
+            _celda("Cuenta", 180, weight=ft.FontWeight.W_600),
+            *[_celda(f"{dias} días", 200, weight=ft.FontWeight.W_600) for dias in horizontes],
+        ])]
+        
+        for hoja_id, (cuenta, _, _) in tarjetas.items():
+            proyeccion = proyecciones.get(hoja_id)
+            if proyeccion is None:
+                continue
+            
+            moneda = "S/" if cuenta['moneda'] == 'PEN' else "$"
+            celdas = [_celda(cuenta['nombre'], 180)]
+            for dias in horizontes:
+                horizonte = proyeccion['horizontes'][dias]
+                color = (AppTheme.SALDO_POSITIVO if horizonte['saldo'] >= 0
+                         else AppTheme.SALDO_NEGATIVO)
+                celdas.append(ft.Container(
+                    content=ft.Column([
+                        ft.Text(f"{moneda} {horizonte['saldo']:,.2f}", color=color,
+                                weight=ft.FontWeight.BOLD),
+                        ft.Text(f"{horizonte['inferior']:,.0f} – {horizonte['superior']:,.0f}",
+                                size=11, color=AppTheme.TEXT_SECONDARY),
+                    ], spacing=0),
+                    width=200,
+                ))
+            filas.append(ft.Row(celdas))
+        
+        filas.append(ft.Text(
+            "Tendencia y estacionalidad de los últimos 180 días; rango con 80% de confianza.",
+            size=11, color=AppTheme.TEXT_SECONDARY,
+        ))
+        
+        self.contenedor_proyeccion.content = ft.Column(filas, spacing=8)
+        try:
+            self.contenedor_proyeccion.update()
+        except RuntimeError:
+            pass
+    
     def _crear_acciones_rapidas(self) -> ft.Control:
         """Crea botones de acciones rápidas."""
         return ft.Container(
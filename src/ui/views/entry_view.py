@@ -9,7 +9,7 @@ from datetime import date
 
 from src.ui.theme import AppTheme, Styles, Icons
 from src.ui.components import ExcelGrid, SaldoCard
-from src.logic import MovimientoService, ConfigService, BalanceCalculator
+from src.logic import MovimientoService, BalanceCalculator
 
 
 class EntryView:
@@ -21,30 +21,33 @@ class EntryView:
     def __init__(self, page: ft.Page):
         self.page = page
         self.mov_service = MovimientoService()
-        self.config_service = ConfigService()
         self.calculator = BalanceCalculator()
     
     def build(self) -> ft.Control:
         """Construye y retorna el control."""
-        # Cargar datos iniciales
-        self.hojas = self.config_service.obtener_hojas()
-        self.locales = self.config_service.obtener_locales()
-        
         # Obtener saldos de todas las cuentas
         saldos = self.calculator.obtener_saldos_todas_cuentas()
         
         # Grid de ingreso masivo tipo Excel
         self.excel_grid = ExcelGrid(
-            hojas=self.hojas,
-            locales=self.locales,
             on_submit_all=self._guardar_movimientos,
-            obtener_categorias=self._obtener_categorias,
             page=self.page,
             filas_iniciales=5,
         )
         
         # Contador de movimientos del día
-        movimientos_hoy = self.mov_service.contar_movimientos_hoy()
+        self.lbl_hoy = ft.Text(
+            self._texto_hoy(),
+            size=11,
+            color=AppTheme.TEXT_SECONDARY,
+        )
+        
+        # Saldos compactos
+        self.fila_saldos = ft.Row(
+            self._crear_chips_saldos(saldos),
+            spacing=8,
+            wrap=True,
+        )
         
         # Construir grid
         grid_content = self.excel_grid.build()
@@ -60,11 +63,7 @@ class EntryView:
                     ft.Container(
                         content=ft.Row([
                             ft.Icon(Icons.CALENDAR, size=14, color=AppTheme.TEXT_SECONDARY),
-                            ft.Text(
-                                f"Hoy: {date.today().strftime('%d/%m/%Y')} • {movimientos_hoy} mov.",
-                                size=11,
-                                color=AppTheme.TEXT_SECONDARY,
-                            ),
+                            self.lbl_hoy,
                         ], spacing=6),
                         padding=ft.Padding.symmetric(horizontal=10, vertical=4),
                         bgcolor=ft.Colors.GREY_100,
@@ -84,15 +83,7 @@ class EntryView:
             # Barra inferior con saldos compactos
             ft.Container(
                 content=ft.Row([
-                    ft.Row([
-                        ft.Text("💰 Saldos:", size=11, weight=ft.FontWeight.W_600, color=AppTheme.TEXT_SECONDARY),
-                    ] + [
-                        self._crear_chip_saldo(cuenta['nombre'], cuenta['saldo'], 
-                                              "S/" if cuenta.get('moneda') == 'PEN' else "$")
-                        for cuenta in saldos
-                    ] if saldos else [
-                        ft.Text("Sin cuentas", size=11, color=AppTheme.TEXT_DISABLED)
-                    ], spacing=8, wrap=True),
+                    self.fila_saldos,
                     ft.Text(
                         "Tab: siguiente campo • Seleccione Local para ver Categorías",
                         size=10,
@@ -106,6 +97,44 @@ class EntryView:
             ),
         ], expand=True)
     
+    def refresh(self):
+        """
+        Actualiza saldos y contador del día (vista reutilizada).
+        
+        Las filas del grid se conservan para no perder datos sin guardar.
+        """
+        saldos = self.calculator.obtener_saldos_todas_cuentas()
+        self.fila_saldos.controls = self._crear_chips_saldos(saldos)
+        self.lbl_hoy.value = self._texto_hoy()
+        
+        try:
+            self.fila_saldos.update()
+            self.lbl_hoy.update()
+        except RuntimeError:
+            pass
+    
+    def dispose(self):
+        """Libera las filas del grid."""
+        self.excel_grid.liberar()
+    
+    def _texto_hoy(self) -> str:
+        """Texto del contador de movimientos del día."""
+        movimientos_hoy = self.mov_service.contar_movimientos_hoy()
+        return f"Hoy: {date.today().strftime('%d/%m/%Y')} • {movimientos_hoy} mov."
+    
+    def _crear_chips_saldos(self, saldos: list) -> list:
+        """Crea los controles de la barra de saldos."""
+        if not saldos:
+            return [ft.Text("Sin cuentas", size=11, color=AppTheme.TEXT_DISABLED)]
+        
+        return [
+            ft.Text("💰 Saldos:", size=11, weight=ft.FontWeight.W_600, color=AppTheme.TEXT_SECONDARY),
+        ] + [
+            self._crear_chip_saldo(cuenta['nombre'], cuenta['saldo'], 
+                                  "S/" if cuenta.get('moneda') == 'PEN' else "$")
+            for cuenta in saldos
+        ]
+    
     def _crear_chip_saldo(self, nombre: str, saldo: float, moneda: str) -> ft.Container:
         """Crea un chip compacto de saldo."""
         color = AppTheme.SALDO_POSITIVO if saldo >= 0 else AppTheme.SALDO_NEGATIVO
@@ -126,26 +155,21 @@ class EntryView:
             border=ft.border.all(1, AppTheme.DIVIDER),
         )
     
-    def _obtener_categorias(self, local_id: int):
-        """Obtiene categorías filtradas por local."""
-        return self.config_service.obtener_categorias_por_local(local_id)
-    
-    def _guardar_movimientos(self, movimientos: list):
-        """Guarda múltiples movimientos a la vez."""
-        guardados = 0
-        errores_total = []
+    def _guardar_movimientos(self, movimientos: list) -> tuple:
+        """
+        Guarda múltiples movimientos a la vez.
         
-        for datos in movimientos:
-            exito, nuevo_id, errores = self.mov_service.crear_movimiento(datos)
-            if exito:
-                guardados += 1
-            else:
-                errores_total.extend(errores)
+        Returns:
+            Tupla (guardadas, errores, duplicadas) por row_id: las filas
+            guardadas, el error de cada fila que no se pudo guardar y la
+            advertencia de las no guardadas por parecer duplicadas
+        """
+        guardados, errores, duplicados = self.mov_service.crear_movimientos(movimientos)
         
-        if guardados > 0:
+        if guardados:
             # Mostrar snackbar de éxito
             self.page.snack_bar = ft.SnackBar(
-                content=ft.Text(f"✅ {guardados} movimiento(s) guardado(s) correctamente"),
+                content=ft.Text(f"✅ {len(guardados)} movimiento(s) guardado(s) correctamente"),
                 bgcolor=AppTheme.SUCCESS,
             )
             self.page.snack_bar.open = True
@@ -154,9 +178,10 @@ class EntryView:
             # Limpiar filas guardadas
             self.excel_grid.limpiar_guardados()
             
-            # Actualizar saldos (reconstruir la vista sería mejor, pero por ahora solo notificamos)
+            # Actualizar saldos
             self._actualizar_saldos()
         
+        errores_total = [error for errores_fila in errores.values() for error in errores_fila]
         if errores_total:
             self.page.snack_bar = ft.SnackBar(
                 content=ft.Text(f"⚠️ Errores: {', '.join(errores_total[:3])}"),
@@ -164,10 +189,16 @@ class EntryView:
             )
             self.page.snack_bar.open = True
             self.page.update()
+        
+        return (
+            [movimientos[i]['row_id'] for i in guardados],
+            {movimientos[i]['row_id']: ", ".join(errores_fila) for i, errores_fila in errores.items()},
+            {
+                movimientos[i]['row_id']: self.mov_service.describir_duplicado(existentes)
+                for i, existentes in duplicados.items()
+            },
+        )
     
     def _actualizar_saldos(self):
-        """Notifica que los saldos se actualizaron."""
-        # Los saldos se actualizarán al recargar la vista
-        # Por ahora solo actualizamos la página
-        if self.page:
-            self.page.update()
+        """Refresca la barra de saldos y el contador tras guardar."""
+        self.refresh()
@@ -10,7 +10,7 @@ from typing import Optional
 
 from src.ui.theme import AppTheme, Styles, Icons
 from src.ui.components import MovimientosTable, SaldoCard
-from src.logic import MovimientoService, ConfigService, BalanceCalculator
+from src.logic import MovimientoService, ConfigService, BalanceCalculator, BusquedaEnVivo
 
 
 class HistoryView:
@@ -26,6 +26,14 @@ class HistoryView:
         
         self._hoja_seleccionada_id: int = None
         self._local_seleccionado_id: int = None
+        self._filtros: dict = {}
+        
+        # Búsqueda en vivo: debounce + cancelación de consultas obsoletas
+        self._busqueda = BusquedaEnVivo(
+            consulta=self._consultar,
+            on_resultado=self._on_resultado_busqueda,
+        )
+        self._resumen: dict = {"ingresos": 0.0, "egresos": 0.0, "num_movimientos": 0}
     
     def build(self) -> ft.Control:
         """Construye y retorna el control."""
@@ -213,6 +221,16 @@ class HistoryView:
             ),
         ], expand=True, scroll=ft.ScrollMode.AUTO)
     
+    def refresh(self):
+        """Recarga el resultado con los filtros actuales (vista reutilizada)."""
+        if self._filtros:
+            self._cargar_datos()
+    
+    def dispose(self):
+        """Cancela búsquedas pendientes y libera los datos de la tabla."""
+        self._busqueda.cancelar()
+        self.tabla.liberar()
+    
     def _crear_card_resumen(self, titulo: str, valor: str, icono: str, color: str) -> ft.Container:
         """Crea una tarjeta de resumen."""
         return ft.Container(
@@ -288,8 +306,17 @@ class HistoryView:
         pass  # Esperar a que el usuario presione "Aplicar"
     
     def _on_buscar_change(self, e):
-        """Cuando cambia el texto de búsqueda."""
-        pass  # Búsqueda en tiempo real podría ser muy pesada
+        """Cuando cambia el texto de búsqueda, programa una consulta en segundo plano."""
+        self._busqueda.programar(**self._leer_filtros())
+    
+    def _on_resultado_busqueda(self, resultado: tuple, filtros: dict):
+        """Recibe el resultado de la última búsqueda en vivo."""
+        resumen, df = resultado
+        self._filtros = filtros
+        self._mostrar_resumen(
+            resumen['total_ingresos'], resumen['total_egresos'], resumen['num_movimientos']
+        )
+        self.tabla.cargar_datos(df)
     
     def _aplicar_filtros(self, e):
         """Aplica los filtros y actualiza la tabla."""
@@ -308,9 +335,8 @@ class HistoryView:
         
         self._cargar_datos()
     
-    def _cargar_datos(self):
-        """Carga los datos según los filtros aplicados."""
-        # Obtener parámetros de filtro
+    def _leer_filtros(self) -> dict:
+        """Lee los valores de filtro desde los controles."""
         hoja_id = int(self.dd_cuenta.value) if self.dd_cuenta.value else None
         local_id = int(self.dd_local.value) if self.dd_local.value else None
         
@@ -327,26 +353,50 @@ class HistoryView:
         
         texto_busqueda = self.txt_buscar.value.strip() if self.txt_buscar.value else None
         
-        # Cargar datos
-        df = self.mov_service.obtener_historial_filtrado(
-            hoja_id=hoja_id,
-            local_id=local_id,
-            fecha_inicio=fecha_desde,
-            fecha_fin=fecha_hasta,
-            texto_busqueda=texto_busqueda,
+        return {
+            "hoja_id": hoja_id,
+            "local_id": local_id,
+            "fecha_inicio": fecha_desde,
+            "fecha_fin": fecha_hasta,
+            "texto_busqueda": texto_busqueda,
+        }
+    
+    def _consultar(self, cursor=None, **filtros) -> tuple:
+        """Obtiene el resumen agregado y las filas para unos filtros."""
+        resumen = self.mov_service.obtener_resumen_filtrado(cursor=cursor, **filtros)
+        df = self.mov_service.obtener_historial_filtrado(cursor=cursor, **filtros)
+        return resumen, df
+    
+    def _cargar_datos(self):
+        """Carga los datos según los filtros aplicados."""
+        # Una búsqueda en vivo pendiente quedaría obsoleta
+        self._busqueda.cancelar()
+        self._filtros = self._leer_filtros()
+        
+        # Las tarjetas se calculan en SQL, antes de traer las filas
+        resumen = self.mov_service.obtener_resumen_filtrado(**self._filtros)
+        self._mostrar_resumen(
+            resumen['total_ingresos'], resumen['total_egresos'], resumen['num_movimientos']
         )
         
+        df = self.mov_service.obtener_historial_filtrado(**self._filtros)
         self.tabla.cargar_datos(df)
-        
-        # Actualizar estadísticas
-        if not df.empty:
-            total_ingresos = df['ingreso'].sum() if 'ingreso' in df.columns else 0
-            total_egresos = df['egreso'].sum() if 'egreso' in df.columns else 0
+    
+    def _mostrar_resumen(self, total_ingresos: float, total_egresos: float,
+                         num_movimientos: int):
+        """Actualiza las tarjetas de resumen y el contador de movimientos."""
+        self._resumen = {
+            "ingresos": float(total_ingresos),
+            "egresos": float(total_egresos),
+            "num_movimientos": int(num_movimientos),
+        }
+        
+        if num_movimientos:
             balance = total_ingresos - total_egresos
-            num_movimientos = len(df)
             
             # Determinar moneda
             moneda = "S/"
+            hoja_id = self._filtros.get('hoja_id')
             if hoja_id:
                 hoja = next((h for h in self.hojas if h['id'] == hoja_id), None)
                 if hoja and hoja.get('moneda') == 'USD':
@@ -368,6 +418,40 @@ class HistoryView:
         if self.page:
             self.lbl_paginacion.update()
     
+    def _aplicar_cambio(self, cambio: dict):
+        """
+        Parchea la tabla y el resumen con el resultado de una edición o eliminación.
+        
+        Si el cambio puede mover la fila de posición o sacarla del filtro
+        (otra fecha, descripción con búsqueda activa), recarga todo.
+        """
+        anterior = cambio['anterior']
+        nuevo = cambio['nuevo']
+        
+        if nuevo is None:
+            parcheado = self.tabla.eliminar_fila(anterior['id'], cambio['delta_saldo'])
+        else:
+            requiere_recarga = nuevo['fecha'] != anterior['fecha'] or (
+                self._filtros.get('texto_busqueda')
+                and nuevo['descripcion'] != anterior['descripcion']
+            )
+            parcheado = not requiere_recarga and self.tabla.actualizar_fila(
+                nuevo['id'], nuevo, cambio['delta_saldo']
+            )
+        
+        if not parcheado:
+            self._cargar_datos()
+            return
+        
+        def _monto(mov, campo):
+            return float(mov.get(campo) or 0) if mov else 0.0
+        
+        self._mostrar_resumen(
+            self._resumen['ingresos'] + _monto(nuevo, 'ingreso') - _monto(anterior, 'ingreso'),
+            self._resumen['egresos'] + _monto(nuevo, 'egreso') - _monto(anterior, 'egreso'),
+            self._resumen['num_movimientos'] - (1 if nuevo is None else 0),
+        )
+    
     def _editar_movimiento(self, movimiento_id: int):
         """Abre diálogo para editar un movimiento."""
         # Cargar datos del movimiento
@@ -389,13 +473,13 @@ class HistoryView:
                 'ingreso': float(txt_ingreso.value or 0),
                 'egreso': float(txt_egreso.value or 0),
             }
-            exito = self.mov_service.actualizar_movimiento(movimiento_id, datos)
+            cambio = self.mov_service.actualizar_movimiento_con_delta(movimiento_id, datos)
             
             dialog.open = False
             self.page.update()
             
-            if exito:
-                self._cargar_datos()
+            if cambio:
+                self._aplicar_cambio(cambio)
                 self.page.snack_bar = ft.SnackBar(
                     content=ft.Text("✅ Movimiento actualizado"),
                     bgcolor=AppTheme.SUCCESS,
@@ -427,12 +511,12 @@ class HistoryView:
     def _eliminar_movimiento(self, movimiento_id: int):
         """Confirma y elimina un movimiento."""
         def confirmar(e):
-            exito = self.mov_service.eliminar_movimiento(movimiento_id)
+            cambio = self.mov_service.eliminar_movimiento_con_delta(movimiento_id)
             dialog.open = False
             self.page.update()
             
-            if exito:
-                self._cargar_datos()
+            if cambio:
+                self._aplicar_cambio(cambio)
                 self.page.snack_bar = ft.SnackBar(
                     content=ft.Text("✅ Movimiento eliminado"),
                     bgcolor=AppTheme.SUCCESS,
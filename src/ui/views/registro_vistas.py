@@ -0,0 +1,110 @@
+"""
+ConSmart - Registro de Vistas
+=============================
+Mantiene vivas las vistas de la navegación principal entre cambios de pestaña.
+"""
+
+import flet as ft
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from src.database import get_versiones
+from src.database.versiones import VersionesDatos
+
+
+def version_datos_general() -> tuple:
+    """Versión de movimientos y configuración (dependencia por defecto de una vista)."""
+    versiones = get_versiones()
+    return (
+        versiones.version_movimientos(),
+        versiones.version(VersionesDatos.CONFIG),
+    )
+
+
+def version_datos_config() -> tuple:
+    """Versión de la configuración solamente."""
+    return (get_versiones().version(VersionesDatos.CONFIG),)
+
+
+class RegistroVistas:
+    """
+    Construye cada vista una sola vez por sesión y la conserva en un LRU acotado.
+    
+    Al volver a una vista se reutiliza su control (con sus filas sin guardar,
+    filtros, scroll...). Si los datos de los que depende cambiaron desde la
+    última visita, se llama a su hook refresh(). Las vistas expulsadas del LRU
+    o cerradas con limpiar() reciben dispose().
+    """
+    
+    def __init__(self, page: ft.Page, max_vistas: int = 4):
+        self.page = page
+        self.max_vistas = max_vistas
+        self._fabricas: Dict[str, tuple] = {}
+        self._vivas: "OrderedDict[str, list]" = OrderedDict()
+    
+    def registrar(self, nombre: str, fabrica: Callable[[], Any],
+                  version: Callable[[], Hashable] = version_datos_general):
+        """
+        Registra una vista.
+        
+        Args:
+            nombre: Identificador de la vista
+            fabrica: Crea la instancia de la vista (con build(), y opcionalmente
+                     refresh() y dispose())
+            version: Retorna la versión de los datos de los que depende
+        """
+        self._fabricas[nombre] = (fabrica, version)
+    
+    def mostrar(self, nombre: str, contenedor: ft.Container):
+        """
+        Coloca una vista en el contenedor, construyéndola solo la primera vez.
+        
+        Si la vista ya estaba viva y sus datos cambiaron, se llama a refresh()
+        después de montarla, para que pueda actualizar sus controles.
+        """
+        fabrica, version = self._fabricas[nombre]
+        refrescar = None
+        
+        if nombre in self._vivas:
+            self._vivas.move_to_end(nombre)
+            entrada = self._vivas[nombre]
+            vista, control, version_vista = entrada
+            
+            version_actual = version()
+            if version_actual != version_vista:
+                entrada[2] = version_actual
+                refrescar = getattr(vista, 'refresh', None)
+        else:
+            # La versión se toma antes de construir: cambios durante build()
+            # se detectan en la siguiente visita
+            version_actual = version()
+            vista = fabrica()
+            control = vista.build()
+            self._vivas[nombre] = [vista, control, version_actual]
+            
+            while len(self._vivas) > self.max_vistas:
+                _, (expulsada, _, _) = self._vivas.popitem(last=False)
+                self._liberar(expulsada)
+        
+        contenedor.content = control
+        try:
+            contenedor.update()
+        except RuntimeError:
+            pass  # El contenedor aún no está en la página
+        
+        if refrescar:
+            refrescar()
+    
+    def limpiar(self):
+        """Libera todas las vistas vivas (p. ej. al cerrar sesión)."""
+        while self._vivas:
+            _, (vista, _, _) = self._vivas.popitem(last=False)
+            self._liberar(vista)
+    
+    def _liberar(self, vista: Any):
+        """Llama al hook dispose() de una vista si lo tiene."""
+        if hasattr(vista, 'dispose'):
+            try:
+                vista.dispose()
+            except Exception as e:
+                print(f"Error liberando vista: {e}")